@@ -1,59 +1,359 @@
 import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
+import hashlib
+import queue
+import asyncio
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import llm_client
+import prompt_compactor
+from llm_coalesce import AsyncSingleFlight, SingleFlight
+from llm_output import iter_json_array
+from resume_model import as_resume
+from telemetry import log, log_exception
 
-load_dotenv()
+# Bump when the prompt changes so memoized rewrites from the old prompt are not reused
+PROMPT_VERSION = "3"
+ENHANCE_CONCURRENCY = int(os.getenv("ENHANCE_CONCURRENCY", 4))  # sections enhanced in parallel
+ENHANCE_MEMO_SIZE = int(os.getenv("ENHANCE_MEMO_SIZE", 20000))  # rewritten bullets kept in memory
+ENHANCE_SECTION_RETRIES = int(os.getenv("ENHANCE_SECTION_RETRIES", 1))  # re-asks for items a response lost
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+DEFAULT_JOB_DESCRIPTION = "General Professional Software/Tech Role"
 
-def enhance_resume_content(resume_data, job_description=""):
-    # FIXED: Use the correct model name
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
-    
-    # Convert resume data to string for the prompt
-    resume_json = json.dumps(resume_data, indent=2)
-    
-    prompt = f"""
+
+class BulletMemo:
+    """LRU of rewritten text keyed on (kind, original text, job description hash, prompt version)"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+bullet_memo = BulletMemo(ENHANCE_MEMO_SIZE)
+# Identical sections being enhanced at the same moment (double clicks, retried requests) share one call
+section_flight = SingleFlight("enhance")
+section_flight_async = AsyncSingleFlight("enhance_async")
+
+
+def _memo_key(kind, text, jd_hash):
+    return (kind, text, jd_hash, PROMPT_VERSION)
+
+
+def _sections(resume):
+    """
+    The rewritable units of a Resume: (path, kind, context, items). path
+    locates the value to replace, items are the strings to send.
+    """
+    units = []
+    if resume.summary:
+        units.append((("summary",), "professional summary", "", [resume.summary]))
+    if resume.skills:
+        units.append((("skills",), "skill", "", list(resume.skills)))
+    for group, kind in (("experience", "work experience bullet point"), ("projects", "project bullet point")):
+        for i, entry in enumerate(getattr(resume, group)):
+            if not entry.description:
+                continue
+            context = " at ".join(p for p in (entry.title, getattr(entry, "company", "")) if p)
+            units.append(((group, i, "description"), kind, context, list(entry.description)))
+    return units
+
+
+# Extra instructions for kinds of item that aren't prose
+_KIND_RULES = {
+    "skill": "5. Keep each a short skill name; use the Job Description's name for it where it lists the same skill.",
+}
+
+
+def _build_prompt(kind, context, items, job_description):
+    """job_description is expected already compacted (see iter_enhancement_events)"""
+    return prompt_compactor.squeeze(f"""
     You are an expert Resume Writer and ATS Optimization Specialist.
-    
-    Task: Enhance the following resume JSON data. 
-    1. Improve grammar, clarity, and impact of bullet points. Use strong action verbs.
-    2. Optimize for ATS keywords based on the provided Job Description (if any).
-    3. Return the output as valid JSON matching the exact structure of the input.
+    Task: Rewrite each {kind} in the JSON array below.
+    1. Improve grammar, clarity, and impact. Use strong action verbs.
+    2. Work in ATS keywords from the Job Description where they truthfully apply. Do not invent facts.
+    3. Return ONLY a JSON array of exactly {len(items)} strings, in the same order.
     4. Do not add Markdown formatting like ```json.
-    5. Keep all existing fields, just improve the content.
-    
+    {_KIND_RULES.get(kind, "")}
+    Items:
+    {prompt_compactor.compact_json(items)}
+    Role: {context or "Not specified"}
     Job Description:
-    {job_description if job_description else "General Professional Software/Tech Role"}
-    
-    Input Resume JSON:
-    {resume_json}
-    
-    Return ONLY the enhanced JSON, no explanations.
-    """
-    
+    {job_description or DEFAULT_JOB_DESCRIPTION}
+    """)
+
+
+def _from_memo(kind, items, jd_hash, on_item=None):
+    results = [bullet_memo.get(_memo_key(kind, item, jd_hash)) for item in items]
+    if on_item:
+        for i, value in enumerate(results):
+            if value is not None:
+                on_item(i, value)
+    return results
+
+
+def _prompt_for(kind, context, pending, job_description):
+    prompt = _build_prompt(kind, context, pending, job_description)
+    prompt_compactor.report("enhance", json.dumps(pending, ensure_ascii=False),
+                            prompt_compactor.compact_json(pending), prompt)
+    return prompt
+
+
+def _accept(kind, values, results, todo, pending, jd_hash, on_item=None):
+    """Matches the model's values (an iterable, possibly still streaming) to the pending items"""
+    for n, value in enumerate(values):
+        if n >= len(pending):
+            break  # extra items can't be matched to inputs, keep what lined up
+        i, original = todo[n], pending[n]
+        value = str(value).strip() or original
+        bullet_memo.put(_memo_key(kind, original, jd_hash), value)
+        results[i] = value
+        if on_item:
+            on_item(i, value)
+
+
+def _enhance_items(kind, context, items, job_description, jd_hash, on_item=None):
+    """
+    Rewrites items, sending only those not already in the memo. The model's
+    response is streamed and on_item(index, text) is called for each item as
+    soon as it is available. Items a broken or truncated response didn't
+    deliver are asked for again on their own (ENHANCE_SECTION_RETRIES times),
+    then fall back to the originals.
+    """
+    results = _from_memo(kind, items, jd_hash, on_item)
+
+    for attempt in range(1 + ENHANCE_SECTION_RETRIES):
+        todo = [i for i, value in enumerate(results) if value is None]
+        if not todo:
+            break
+        if attempt:
+            log.info(f"Re-asking for {len(todo)} {kind}(s) the model didn't return")
+        pending = [items[i] for i in todo]
+        received = []
+        prompt = _prompt_for(kind, context, pending, job_description)
+
+        def chunks():
+            for chunk in llm_client.generate_stream(prompt):
+                received.append(chunk)
+                yield chunk
+
+        try:
+            _accept(kind, iter_json_array(chunks()), results, todo, pending, jd_hash, on_item)
+        except json.JSONDecodeError as e:
+            log.warning(f"Enhancement answer is not valid JSON: {e}",
+                        extra={"fields": {"response": "".join(received)[:200]}})
+        except Exception as e:
+            log_exception("enhance_items", e)
+            break
+
+    # Anything the model still didn't return stays as written
+    return [value if value is not None else items[i] for i, value in enumerate(results)]
+
+
+async def _enhance_items_async(kind, context, items, job_description, jd_hash, on_item=None):
+    """_enhance_items with an async model call; the answer is decoded once it is complete"""
+    results = _from_memo(kind, items, jd_hash, on_item)
+
+    for attempt in range(1 + ENHANCE_SECTION_RETRIES):
+        todo = [i for i, value in enumerate(results) if value is None]
+        if not todo:
+            break
+        if attempt:
+            log.info(f"Re-asking for {len(todo)} {kind}(s) the model didn't return")
+        pending = [items[i] for i in todo]
+        response_text = ""
+        prompt = _prompt_for(kind, context, pending, job_description)
+
+        try:
+            response_text = await llm_client.generate_async(prompt)
+            _accept(kind, iter_json_array([response_text]), results, todo, pending, jd_hash, on_item)
+        except json.JSONDecodeError as e:
+            log.warning(f"Enhancement answer is not valid JSON: {e}",
+                        extra={"fields": {"response": response_text[:200]}})
+        except Exception as e:
+            log_exception("enhance_items", e)
+            break
+
+    return [value if value is not None else items[i] for i, value in enumerate(results)]
+
+
+def _apply(resume, path, values):
+    """Writes rewritten values back at path"""
+    if path == ("summary",):
+        resume.summary = values[0]
+        return
+    if path == ("skills",):
+        resume.skills = list(values)
+        return
+    group, i, field = path
+    setattr(getattr(resume, group)[i], field, list(values))
+
+
+def _job_description(job_description):
+    """(hash the memo is keyed on, compacted text for the prompts)"""
+    raw_job_description = job_description or ""
+    jd_hash = hashlib.sha256(raw_job_description.strip().encode("utf-8")).hexdigest()
+    # Sent with every section, so it is compacted (and capped) once per request
+    job_description = prompt_compactor.compact_job_description(raw_job_description)
+    if raw_job_description:
+        prompt_compactor.report("enhance_job_description", raw_job_description, job_description)
+    return jd_hash, job_description
+
+
+def iter_enhancement_events(resume_data, job_description=""):
+    """
+    Enhances the summary, the skills list and each experience/project
+    bullet list, yielding progress as it happens:
+
+      ("item", path, index, text)  one rewritten bullet or skill, as soon as it streams in
+      ("section", path, value)     a finished section (summary text, skills or bullet list)
+      ("done", enhanced)           the full enhanced Resume
+
+    Sections are sent to the model concurrently and each bullet is memoized
+    on (text, job description, prompt version), so after an edit only the
+    changed bullets cost a model call. A section already being enhanced for
+    another request is waited for rather than sent again. Closing the
+    generator early drops the sections that haven't started; contact
+    details, education and certifications are facts and pass through as is.
+    """
+    resume = as_resume(resume_data)
+    enhanced = resume.copy()
+    jd_hash, job_description = _job_description(job_description)
+    units = _sections(resume)
+    events = queue.Queue()
+
+    def run(path, kind, context, items):
+        def on_item(i, text):
+            events.put(("item", path, i, text))
+
+        try:
+            values, shared = section_flight.do(
+                (kind, context, tuple(items), jd_hash),
+                lambda: _enhance_items(kind, context, items, job_description, jd_hash, on_item=on_item))
+            if shared:
+                # Joined another request's call: its items arrive all at once
+                for i, text in enumerate(values):
+                    on_item(i, text)
+        except Exception as e:
+            log_exception("enhance_section", e)
+            values = items
+        events.put(("section", path, values))
+
+    pool = ThreadPoolExecutor(max_workers=ENHANCE_CONCURRENCY)
     try:
-        response = model.generate_content(prompt)
-        enhanced_text = response.text.strip()
-        
-        # Clean up markdown formatting
-        if enhanced_text.startswith("```json"):
-            enhanced_text = enhanced_text[7:-3]
-        elif enhanced_text.startswith("```"):
-            enhanced_text = enhanced_text[3:-3]
-            
-        enhanced_text = enhanced_text.strip()
-        
-        enhanced_json = json.loads(enhanced_text)
-        print("✅ Successfully enhanced resume with AI")
-        return enhanced_json
-        
-    except json.JSONDecodeError as e:
-        print(f"❌ Enhancement JSON Error: {e}")
-        print(f"Response was: {response.text[:200]}...")
-        return resume_data
-        
-    except Exception as e:
-        print(f"❌ Enhancement Error: {e}")
-        return resume_data  # Return original if AI fails
\ No newline at end of file
+        for unit in units:
+            # Copy the request context so model calls made by the workers show up in its spans
+            pool.submit(contextvars.copy_context().run, run, *unit)
+        remaining = len(units)
+        while remaining:
+            event = events.get()
+            if event[0] == "section":
+                remaining -= 1
+                _, path, values = event
+                _apply(enhanced, path, values)
+                event = ("section", path, _get(enhanced, path))
+            yield event
+    finally:
+        # Closed early (the SSE client went away): sections not started yet are never sent
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    log.info("Enhanced resume with the model")
+    yield ("done", enhanced)
+
+
+def _get(resume, path):
+    value = resume
+    for key in path:
+        value = value[key] if isinstance(key, int) else getattr(value, key)
+    return value
+
+
+def enhance_resume_content(resume_data, job_description=""):
+    """Enhanced copy of the resume, as a Resume; see iter_enhancement_events for how it is done"""
+    for event in iter_enhancement_events(resume_data, job_description):
+        if event[0] == "done":
+            return event[1]
+
+
+async def iter_enhancement_events_async(resume_data, job_description=""):
+    """
+    iter_enhancement_events for the ASGI app, as an async generator of the
+    same events. Sections are coroutines on the event loop rather than pool
+    threads; each section's items arrive together once its answer is
+    complete. Closing the generator early cancels the remaining sections
+    and, through section_flight_async, their model calls, unless another
+    request is waiting for the same section.
+    """
+    resume = as_resume(resume_data)
+    enhanced = resume.copy()
+    jd_hash, job_description = _job_description(job_description)
+    units = _sections(resume)
+    events = asyncio.Queue()
+    slots = asyncio.Semaphore(ENHANCE_CONCURRENCY)
+
+    async def run(path, kind, context, items):
+        def on_item(i, text):
+            events.put_nowait(("item", path, i, text))
+
+        try:
+            async with slots:
+                values, shared = await section_flight_async.do(
+                    (kind, context, tuple(items), jd_hash),
+                    lambda: _enhance_items_async(kind, context, items, job_description, jd_hash, on_item=on_item))
+            if shared:
+                for i, text in enumerate(values):
+                    on_item(i, text)
+        except Exception as e:
+            log_exception("enhance_section", e)
+            values = items
+        events.put_nowait(("section", path, values))
+
+    tasks = [asyncio.ensure_future(run(*unit)) for unit in units]
+    try:
+        remaining = len(units)
+        while remaining:
+            event = await events.get()
+            if event[0] == "section":
+                remaining -= 1
+                _, path, values = event
+                _apply(enhanced, path, values)
+                event = ("section", path, _get(enhanced, path))
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    log.info("Enhanced resume with the model")
+    yield ("done", enhanced)
+
+
+async def enhance_resume_content_async(resume_data, job_description=""):
+    """enhance_resume_content with async model calls; see iter_enhancement_events_async"""
+    async for event in iter_enhancement_events_async(resume_data, job_description):
+        if event[0] == "done":
+            return event[1]
@@ -1,54 +1,328 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+import time
+_import_started = time.perf_counter()
+
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
 import os
 from werkzeug.utils import secure_filename
 import json
-from resume_parser import parse_resume
+import shutil
+import tempfile
+import threading
+import functools
+# llm_client comes first: it loads .env, the one place configuration is read from
+import llm_client
+import llm_coalesce
 from ats_score import calculate_ats_score
-from ai_enhancer import enhance_resume_content
-from resume_generator import generate_resume
-import traceback
+from ai_enhancer import enhance_resume_content, iter_enhancement_events, bullet_memo
+from parse_cache import ParseCache
+from jobs import JobQueue
+from artifact_store import ArtifactStore
+from static_assets import AssetStore
+from backpressure import ConcurrencyLimit, Overloaded, RequestGate
+from config import load_config
+from resume_model import Resume, ResumeValidationError
+from lazy_imports import lazy_module
+import lazy_imports
+import telemetry
+from telemetry import span, log, log_exception
 
-# --- App Initialization ---
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
-CORS(app)
+# Heavy modules (PyPDF2, python-docx, reportlab, numpy) load on first use
+resume_parser = lazy_module('resume_parser')
+resume_generator = lazy_module('resume_generator')
+resume_templates = lazy_module('resume_templates')
+batch_ingest = lazy_module('batch_ingest')
+bulk_score = lazy_module('bulk_score')
+similarity_index = lazy_module('similarity_index')
 
-# --- Configuration ---
-UPLOAD_FOLDER = 'uploads'
-OUTPUT_FOLDER = 'static/generated'
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# --- Components one app instance owns ---
+class Services:
+    """
+    The parse cache, artifact store, job queue, similarity index and
+    request limits of one app, built from its config by create_app. Routes reach it through
+    services(); job handlers get it as their first argument.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        os.makedirs(config['UPLOAD_FOLDER'], exist_ok=True)
+        os.makedirs(config['OUTPUT_FOLDER'], exist_ok=True)
+        # Repeat uploads skip extraction and the LLM
+        self.parse_cache = ParseCache(config['PARSE_CACHE_PATH'], ttl_seconds=config['PARSE_CACHE_TTL'],
+                                      max_entries=config['PARSE_CACHE_MAX_ENTRIES'])
+        # The frontend, fingerprinted and precompressed once, then served from memory
+        self.assets = AssetStore(config['FRONTEND_FOLDER'], precompress=config['STATIC_PRECOMPRESS'])
+        # Generated documents, content-addressed and kept under a size budget (None when turned off)
+        self.artifact_store = None
+        if config['ARTIFACT_CACHE_MAX_BYTES']:
+            self.artifact_store = ArtifactStore(config['OUTPUT_FOLDER'], max_bytes=config['ARTIFACT_CACHE_MAX_BYTES'])
+        # Endpoint groups, so LLM-bound requests can't take every server thread
+        self.limits = {
+            'llm': ConcurrencyLimit('llm', config['LLM_ENDPOINT_CONCURRENCY'], config['LLM_ENDPOINT_QUEUE'],
+                                    config['ADMISSION_MAX_WAIT']),
+            'cpu': ConcurrencyLimit('cpu', config['CPU_ENDPOINT_CONCURRENCY'], config['CPU_ENDPOINT_QUEUE'],
+                                    config['ADMISSION_MAX_WAIT']),
+        }
+        self.gate = RequestGate()
+        self._similarity_index = None
+        self._similarity_lock = threading.Lock()
+        # Job queue (?async=true on upload/enhance/generate)
+        self.job_queue = JobQueue(max_workers=config['JOB_WORKERS'], db_path=config['JOB_DB_PATH'],
+                                  retention_seconds=config['JOB_RETENTION'], lease_seconds=config['JOB_LEASE_SECONDS'])
+        self.job_queue.register('upload', functools.partial(run_upload, self))
+        self.job_queue.register('enhance', functools.partial(run_enhance, self))
+        self.job_queue.register('generate', functools.partial(run_generate, self))
+        self.job_queue.resume_pending()
+
+    @property
+    def similarity_index(self):
+        """Opened on first use so numpy stays out of startup; None when SIMILARITY_INDEX_PATH is empty"""
+        if self._similarity_index is None and self.config['SIMILARITY_INDEX_PATH']:
+            with self._similarity_lock:
+                if self._similarity_index is None:
+                    self._similarity_index = similarity_index.SimilarityIndex(
+                        self.config['SIMILARITY_INDEX_PATH'], threshold=self.config['SIMILARITY_DUPLICATE_THRESHOLD'],
+                        autosave_every=self.config['SIMILARITY_SAVE_EVERY'])
+        return self._similarity_index
+
+    def shutdown(self, timeout=None):
+        """
+        Graceful stop: new requests get 503, requests in flight (including
+        open streams) and then background jobs get up to timeout seconds
+        (SHUTDOWN_TIMEOUT) in total to finish.
+        """
+        timeout = self.config['SHUTDOWN_TIMEOUT'] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        log.info("Draining requests and jobs", extra={"fields": {"timeout_s": timeout}})
+        requests_done = self.gate.close(timeout)
+        jobs_done = self.job_queue.shutdown(wait=True, timeout=max(0.0, deadline - time.monotonic()))
+        if self._similarity_index is not None:
+            self._similarity_index.save()
+        log.info("Shutdown complete", extra={"fields": {"requests_drained": requests_done, "jobs_drained": jobs_done}})
+        return requests_done and jobs_done
+
+    def stats(self):
+        return {"requests": self.gate.stats(), **{name: limit.stats() for name, limit in self.limits.items()}}
 
-# --- Create necessary directories ---
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    def artifact_stats(self):
+        if self.artifact_store is None:
+            return {"enabled": False}
+        return self.artifact_store.stats()
+
+    def similarity_stats(self):
+        # Reported without opening the index
+        if self._similarity_index is None:
+            return {"loaded": False}
+        return {"loaded": True, **self._similarity_index.stats()}
+
+    def collect_metrics(self):
+        """Gauges from the stats the components already keep"""
+        samples = []
+        for prefix, stats in (("resume_parse_cache", self.parse_cache.stats()),
+                              ("resume_artifacts", self.artifact_stats()),
+                              ("resume_static", self.assets.stats())):
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    samples.append((f"{prefix}_{key}", f"{prefix.replace('_', ' ')} {key}", value))
+        for status, count in self.job_queue.stats().items():
+            samples.append((f"resume_jobs_{status}", f"jobs currently {status}", count))
+        for key, value in llm_client.metrics().items():
+            if isinstance(value, (int, float)):
+                samples.append((f"resume_llm_{key}", f"LLM client {key}", value))
+        for name, stats in llm_coalesce.stats().items():
+            for key, value in stats.items():
+                samples.append((f"resume_llm_coalesce_{name}_{key}", f"{name} model call coalescing {key}", value))
+        for name, limit in self.limits.items():
+            for key, value in limit.stats().items():
+                samples.append((f"resume_admission_{name}_{key}", f"{name} endpoints {key}", value))
+        samples.append(("resume_requests_in_flight", "requests in flight", self.gate.stats()["in_flight"]))
+        if self._similarity_index is not None:
+            stats = self._similarity_index.stats()
+            samples.append(("resume_similarity_indexed", "resumes in the similarity index", stats["resumes"]))
+            samples.append(("resume_similarity_unsaved", "similarity index additions not yet saved", stats["unsaved"]))
+        return samples
+
+def services():
+    return current_app.extensions['resume_builder']
 
 # --- HELPER FUNCTION (This was missing) ---
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def wants_async():
+    """True when the client asked for a job id instead of waiting (?async=true)"""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def overloaded(message, retry_after=1):
+    response = jsonify({"error": message})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def release_when_sent(response, callback):
+    """
+    Runs callback once the server is done sending the response. send_file
+    bodies are direct_passthrough, which werkzeug hands to the server without
+    Response.close, so their close callbacks would never run; they are sent
+    through the normal (closing) path instead.
+    """
+    response.direct_passthrough = False
+    response.call_on_close(callback)
+
+def limited(group):
+    """
+    Runs the view only once it gets a slot in the group's ConcurrencyLimit,
+    answering 503 when it can't. Streamed responses keep the slot until the
+    stream is closed.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limit = services().limits[group]
+            try:
+                limit.acquire()
+            except Overloaded as e:
+                return overloaded(str(e), e.retry_after)
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                limit.release()
+                raise
+            if response.is_streamed:
+                release_when_sent(response, limit.release)
+            else:
+                limit.release()
+            return response
+        return wrapper
+    return decorator
+
+def submit_job(kind, payload):
+    job_queue = services().job_queue
+    if job_queue.pending() >= current_app.config['JOB_QUEUE_MAX']:
+        # An upload saved for the job would never be picked up
+        if payload.get('filepath') and os.path.exists(payload['filepath']):
+            os.remove(payload['filepath'])
+        return overloaded("Too many jobs queued", retry_after=5)
+    # Job payloads are stored as JSON
+    if isinstance(payload.get('resume_data'), Resume):
+        payload = dict(payload, resume_data=payload['resume_data'].to_dict())
+    job_id = job_queue.submit(kind, payload)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+# --- Work shared by the sync routes and the job queue ---
+def run_upload(svc, payload):
+    filepath = payload.get('filepath')
+    try:
+        if filepath:
+            parsed_data = resume_parser.parse_resume(filepath, cache=svc.parse_cache)
+        else:
+            # Parsed straight from the uploaded bytes, nothing written to disk
+            parsed_data = resume_parser.parse_resume(payload['content'], cache=svc.parse_cache, filename=payload['filename'])
+        return upload_response(svc, parsed_data, payload.get('filename') or os.path.basename(filepath),
+                               payload.get('job_description'))
+    finally:
+        # Clean up uploaded file
+        if filepath and os.path.exists(filepath):
+            os.remove(filepath)
+
+def upload_response(svc, parsed_data, filename, job_description):
+    """The upload answer for a parsed resume: its data, ATS score and duplicates"""
+    resume = Resume.from_dict(parsed_data)
+    ats_result = calculate_ats_score(resume, job_description)
+    response = {
+        "success": True,
+        "data": resume.to_dict(),
+        "ats_score": ats_result
+    }
+    index = svc.similarity_index
+    if index is not None and parsed_data != resume_parser.create_fallback_structure():
+        with span("similarity_index"):
+            response["duplicates"] = index.add(resume, filename)
+    return response
+
+def run_enhance(svc, payload):
+    enhanced = enhance_resume_content(payload['resume_data'], payload.get('job_description', ''))
+    return enhance_response(enhanced, payload.get('job_description'))
+
+def enhance_response(enhanced, job_description):
+    new_ats_result = calculate_ats_score(enhanced, job_description)
+    return {
+        "success": True,
+        "enhanced_data": enhanced.to_dict(),
+        "ats_score": new_ats_result
+    }
+
+def sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def enhancement_sse(event, job_description):
+    """One iter_enhancement_events event as a Server-Sent Event"""
+    if event[0] == "item":
+        _, path, index, text = event
+        return sse("item", {"path": list(path), "index": index, "value": text})
+    if event[0] == "section":
+        _, path, value = event
+        return sse("section", {"path": list(path), "value": value})
+    return sse("done", enhance_response(event[1], job_description))
+
+def run_generate(svc, payload):
+    output_files = resume_generator.generate_resume(
+        payload['resume_data'], payload.get('template', 'modern'), svc.config['OUTPUT_FOLDER'],
+        store=svc.artifact_store, formats=payload.get('formats', resume_generator.FORMATS),
+        lazy=payload.get('lazy', False))
+    return {
+        "success": True,
+        "files": output_files
+    }
+
+bp = Blueprint('resume_builder', __name__)
+
 # --- Static Frontend Routes ---
-@app.route('/')
+@bp.route('/')
 def serve_index():
-    return send_from_directory('../frontend', 'index.html')
+    return serve_frontend_files('index.html')
 
-@app.route('/<path:path>')
+@bp.route('/<path:path>')
 def serve_frontend_files(path):
     if "api/" not in path: 
-        return send_from_directory('../frontend', path)
+        response = services().assets.response(request, path)
+        if response is not None:
+            return response
+        # Added after startup: served from disk as before
+        return send_from_directory(current_app.config['FRONTEND_FOLDER'], path)
     return jsonify({"error": "Not Found"}), 404
 
 # --- API Routes ---
 
-@app.route('/health', methods=['GET'])
+@bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "Resume Builder API is running"})
+    # While the server drains, requests (this one included) get 503 before reaching a view
+    svc = services()
+    return jsonify({
+        "status": "healthy",
+        "message": "Resume Builder API is running",
+        "parse_cache": svc.parse_cache.stats(),
+        "jobs": svc.job_queue.stats(),
+        "llm": llm_client.metrics(),
+        "llm_coalescing": llm_coalesce.stats(),
+        "enhance_memo": bullet_memo.stats(),
+        "artifacts": svc.artifact_stats(),
+        "static": svc.assets.stats(),
+        "admission": svc.stats(),
+        "similarity_index": svc.similarity_stats(),
+        "startup": lazy_imports.report()
+    })
 
-@app.route('/api/upload', methods=['POST'])
+@bp.route('/api/upload', methods=['POST'])
+@limited('llm')
 def upload_resume():
     try:
         if 'file' not in request.files:
@@ -63,119 +337,369 @@ def upload_resume():
         if not allowed_file(file.filename):
             return jsonify({"error": "Invalid file type. Use PDF or DOCX"}), 400
         
-        # Save uploaded file
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        job_description = request.form.get('job_description', '')
         
-        # Parse resume
-        parsed_data = parse_resume(filepath)
+        if wants_async():
+            # Queued jobs outlive the request (and may be persisted), so the file goes to disk
+            # under a unique name so concurrent uploads can't collide
+            filepath = batch_ingest.unique_path(current_app.config['UPLOAD_FOLDER'], filename)
+            with span("file_save"):
+                file.save(filepath)
+            return submit_job('upload', {"filepath": filepath, "job_description": job_description})
         
-        # Calculate initial ATS score
-        ats_result = calculate_ats_score(parsed_data)
+        with span("file_read"):
+            content = file.read()
         
-        response = {
-            "success": True,
-            "data": parsed_data,
-            "ats_score": ats_result
-        }
-        
-        # Clean up uploaded file
-        os.remove(filepath)
-        
-        return jsonify(response)
+        # Parse resume and calculate initial ATS score
+        return jsonify(run_upload(services(), {
+            "content": content,
+            "filename": filename,
+            "job_description": job_description
+        }))
     
     except Exception as e:
-        print(f"Error in upload_resume: {str(e)}")
-        traceback.print_exc()
+        log_exception("upload_resume", e)
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/upload/batch', methods=['POST'])
+@limited('llm')
+def upload_resume_batch():
+    """
+    Accepts many resumes as repeated 'files' fields and/or zip archives and
+    streams one NDJSON line per resume as soon as it is parsed.
+    """
+    # Batches are far larger than single uploads
+    config = current_app.config
+    request.max_content_length = config['BATCH_MAX_CONTENT_LENGTH']
+    batch_folder = tempfile.mkdtemp(prefix='batch_', dir=config['UPLOAD_FOLDER'])
+    try:
+        filepaths = []
+        # Shared by every archive in the request, so many small zip bombs can't add up to a big one
+        zip_budget = batch_ingest.ZIP_MAX_BYTES
+        for file in request.files.getlist('files') + request.files.getlist('file'):
+            if file.filename.lower().endswith('.zip'):
+                unpacked = batch_ingest.unpack_zip(file.stream, batch_folder, max_bytes=zip_budget)
+                zip_budget -= sum(os.path.getsize(path) for path in unpacked)
+                filepaths.extend(unpacked)
+            elif allowed_file(file.filename):
+                filename = secure_filename(file.filename)
+                filepath = batch_ingest.unique_path(batch_folder, filename)
+                with span("file_save"):
+                    file.save(filepath)
+                filepaths.append(filepath)
+        
+        job_description = request.form.get('job_description', '')
+        if not filepaths:
+            shutil.rmtree(batch_folder, ignore_errors=True)
+            return jsonify({"error": "No PDF or DOCX files provided"}), 400
+    except batch_ingest.ArchiveRejected as e:
+        shutil.rmtree(batch_folder, ignore_errors=True)
+        return jsonify({"error": str(e)}), 413
+    except Exception as e:
+        shutil.rmtree(batch_folder, ignore_errors=True)
+        log_exception("upload_resume_batch", e)
         return jsonify({"error": str(e)}), 500
+    
+    svc = services()
+    
+    def generate_results():
+        try:
+            for result in batch_ingest.ingest_batch(filepaths, svc.parse_cache, config['BATCH_EXTRACT_WORKERS'],
+                                                    config['BATCH_LLM_CONCURRENCY'], job_description,
+                                                    svc.similarity_index):
+                yield json.dumps(result) + "\n"
+        finally:
+            shutil.rmtree(batch_folder, ignore_errors=True)
+    
+    return Response(generate_results(), mimetype='application/x-ndjson')
 
-@app.route('/api/manual-entry', methods=['POST'])
+@bp.route('/api/manual-entry', methods=['POST'])
 def manual_entry():
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        ats_result = calculate_ats_score(data)
+        # The form posts the resume itself; an optional job_description key is scored against
+        resume = Resume.from_dict(data)
+        ats_result = calculate_ats_score(resume, data.get('job_description'))
         
         response = {
             "success": True,
-            "data": data,
+            "data": resume.to_dict(),
             "ats_score": ats_result
         }
         return jsonify(response)
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error in manual_entry: {str(e)}")
-        traceback.print_exc()
+        log_exception("manual_entry", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/enhance', methods=['POST'])
-def enhance_resume():
+@bp.route('/api/score/batch', methods=['POST'])
+@limited('cpu')
+def score_batch():
+    """Ranks many parsed resumes against one job description (see bulk_score.score_resumes)"""
     try:
+        # Thousands of parsed resumes are far larger than a single upload
+        request.max_content_length = current_app.config['BATCH_MAX_CONTENT_LENGTH']
         data = request.get_json()
-        if not data or 'resume_data' not in data:
-            return jsonify({"error": "No resume data provided"}), 400
-        
-        resume_data = data['resume_data']
-        job_description = data.get('job_description', '')
+        if not data or not isinstance(data.get('resumes'), list):
+            return jsonify({"error": "No resumes provided"}), 400
         
-        enhanced_data = enhance_resume_content(resume_data, job_description)
-        new_ats_result = calculate_ats_score(enhanced_data)
+        resumes = [Resume.from_dict(r, f"resumes[{i}]") for i, r in enumerate(data['resumes'])]
+        results = bulk_score.rank_resumes(resumes, data.get('job_description', ''), data.get('top_k'))
         
         response = {
             "success": True,
-            "enhanced_data": enhanced_data,
-            "ats_score": new_ats_result
+            "count": len(resumes),
+            "results": results
         }
         return jsonify(response)
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error in enhance_resume: {str(e)}")
-        traceback.print_exc()
+        log_exception("score_batch", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/generate', methods=['POST'])
-def generate():
+@bp.route('/api/similar', methods=['POST'])
+@limited('cpu')
+def similar_candidates():
+    """Indexed resumes most like the given one: same email/phone first, then by text similarity"""
     try:
         data = request.get_json()
         if not data or 'resume_data' not in data:
             return jsonify({"error": "No resume data provided"}), 400
         
-        resume_data = data['resume_data']
-        template = data.get('template', 'modern')
+        index = services().similarity_index
+        if index is None:
+            return jsonify({"error": "Similarity index is disabled"}), 404
         
-        output_files = generate_resume(resume_data, template, app.config['OUTPUT_FOLDER'])
+        resume = Resume.from_dict(data['resume_data'])
+        results = index.similar(resume, int(data.get('top_k', 10)), float(data.get('min_similarity', 0.3)))
         
         response = {
             "success": True,
-            "files": output_files
+            "indexed": len(index),
+            "results": results
         }
         return jsonify(response)
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        log_exception("similar_candidates", e)
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/enhance', methods=['POST'])
+@limited('llm')
+def enhance_resume():
+    try:
+        data = request.get_json()
+        if not data or 'resume_data' not in data:
+            return jsonify({"error": "No resume data provided"}), 400
+        
+        payload = {
+            "resume_data": Resume.from_dict(data['resume_data']),
+            "job_description": data.get('job_description', '')
+        }
+        if wants_async():
+            return submit_job('enhance', payload)
+        
+        return jsonify(run_enhance(services(), payload))
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        log_exception("enhance_resume", e)
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/enhance/stream', methods=['POST'])
+@limited('llm')
+def enhance_resume_stream():
+    """
+    Same input as /api/enhance, answered as Server-Sent Events: an 'item'
+    event per rewritten bullet, a 'section' event per finished section and
+    a final 'done' event with the enhanced data and recomputed ATS score.
+    """
+    data = request.get_json(silent=True)
+    if not data or 'resume_data' not in data:
+        return jsonify({"error": "No resume data provided"}), 400
+    
+    try:
+        resume = Resume.from_dict(data['resume_data'])
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
+    job_description = data.get('job_description', '')
+    
+    def generate_events():
+        try:
+            for event in iter_enhancement_events(resume, job_description):
+                yield enhancement_sse(event, job_description)
+        except Exception as e:
+            log_exception("enhance_resume_stream", e)
+            yield sse("error", {"error": str(e)})
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate_events(), mimetype='text/event-stream', headers=headers)
+
+@bp.route('/api/generate', methods=['POST'])
+@limited('cpu')
+def generate():
+    try:
+        data = request.get_json()
+        if not data or 'resume_data' not in data:
+            return jsonify({"error": "No resume data provided"}), 400
+        
+        # Optional: only some formats, and lazy=true to render each file on first download
+        formats = data.get('formats') or list(resume_generator.FORMATS)
+        if isinstance(formats, str):
+            formats = [formats]
+        unknown = [f for f in formats if f not in resume_generator.FORMATS]
+        if unknown:
+            return jsonify({"error": f"Unsupported format(s): {', '.join(map(str, unknown))}"}), 400
+        
+        payload = {
+            "resume_data": Resume.from_dict(data['resume_data']),
+            "template": data.get('template', 'modern'),
+            "formats": formats,
+            "lazy": bool(data.get('lazy', False))
+        }
+        if wants_async():
+            return submit_job('generate', payload)
+        
+        return jsonify(run_generate(services(), payload))
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        log_exception("generate", e)
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/render', methods=['POST'])
+@limited('cpu')
+def render_resume():
+    """Renders one format and streams it back without writing it to disk"""
+    try:
+        data = request.get_json()
+        if not data or 'resume_data' not in data:
+            return jsonify({"error": "No resume data provided"}), 400
+        
+        fmt = data.get('format', 'pdf')
+        if fmt not in resume_generator.FORMATS:
+            return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+        
+        resume = Resume.from_dict(data['resume_data'])
+        document = resume_generator.render_document(resume, data.get('template', 'modern'), fmt, store=services().artifact_store)
+        return send_file(document, mimetype=resume_generator.MIMETYPES[fmt], as_attachment=True, download_name=f"resume.{fmt}")
+    except ResumeValidationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error in generate: {str(e)}")
-        traceback.print_exc()
+        log_exception("render_resume", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/download/<filename>', methods=['GET'])
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = services().job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@bp.route('/api/download/<filename>', methods=['GET'])
+@limited('cpu')
 def download_file(filename):
     try:
-        filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-        if not os.path.exists(filepath):
+        filename = secure_filename(filename)
+        if filename.rsplit('.', 1)[-1].lower() not in resume_generator.FORMATS:
+            return jsonify({"error": "File not found"}), 404
+        store = services().artifact_store
+        if store is None:
+            filepath = os.path.abspath(os.path.join(current_app.config['OUTPUT_FOLDER'], filename))
+            filepath = filepath if os.path.exists(filepath) else None
+        else:
+            # Renders the file now if it was generated lazily
+            filepath = resume_generator.render_artifact(store, filename)
+        if filepath is None:
             return jsonify({"error": "File not found"}), 404
         return send_file(filepath, as_attachment=True)
     except Exception as e:
-        print(f"Error in download_file: {str(e)}")
+        log_exception("download_file", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/templates', methods=['GET'])
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(telemetry.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/api/templates', methods=['GET'])
 def get_templates():
-    templates = [
-        {"id": "modern", "name": "Modern Professional", "description": "Clean, modern design with clear sections"},
-        {"id": "classic", "name": "Classic ATS", "description": "Traditional format optimized for ATS"},
-        {"id": "creative", "name": "Creative Professional", "description": "Eye-catching design while maintaining ATS compatibility"}
-    ]
-    return jsonify({"templates": templates})
+    return jsonify({"templates": resume_templates.list_templates()})
+
+def warm_up():
+    """
+    Loads the lazily imported modules, the compiled templates and the LLM
+    client before the first request. Runs in create_app with WARM_UP=true,
+    or call it from a server hook such as gunicorn's post_fork.
+    """
+    started = time.perf_counter()
+    lazy_imports.warm_up()
+    resume_templates.get_template(resume_templates.DEFAULT_TEMPLATE)
+    try:
+        llm_client.get_client()
+    except Exception as e:
+        log.warning(f"LLM client not ready at warm-up: {e}")
+    lazy_imports.record_startup('warm_up', started)
+
+# --- App factory ---
+def create_app(**overrides):
+    """
+    Builds the app from the environment (see config.py); keyword arguments
+    override single settings. This is the entry point for WSGI servers,
+    e.g. gunicorn 'app:create_app()'. Call app.extensions['resume_builder']
+    .shutdown() when the process stops to drain requests and jobs.
+    """
+    started = time.perf_counter()
+    config = load_config(**overrides)
+    # The frontend is served by serve_frontend_files from the AssetStore, not Flask's static route
+    app = Flask(__name__, static_folder=None)
+    app.config.update(config)
+    CORS(app)
+    telemetry.init_app(app)
+
+    svc = Services(config)
+    app.extensions['resume_builder'] = svc
+    telemetry.register_collector(svc.collect_metrics)
+
+    @app.before_request
+    def _admit():
+        if not svc.gate.enter():
+            return overloaded("Server is shutting down", retry_after=5)
+        g.admitted = True
+
+    @app.after_request
+    def _hold_until_sent(response):
+        # Streams are still in flight after the view returns; count them until closed
+        if g.pop('admitted', False):
+            release_when_sent(response, svc.gate.exit)
+        return response
+
+    @app.teardown_request
+    def _release(error=None):
+        if g.pop('admitted', False):  # the response never got to after_request
+            svc.gate.exit()
+
+    app.register_blueprint(bp)
+    if config['WARM_UP']:
+        warm_up()
+    lazy_imports.record_startup('create_app', started)
+    return app
+
+def __getattr__(name):
+    # 'from app import app' (and gunicorn 'app:app') get a default instance, created on first use
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+lazy_imports.record_startup('app', _import_started)
 
 if __name__ == '__main__':
-    print("Starting Resume Builder API Server...")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    import serve
+    serve.main()
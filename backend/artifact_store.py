@@ -0,0 +1,132 @@
+# artifact_store.py
+
+import os
+import json
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated documents. Files are named by a
+    hash of what was rendered, so identical requests share one file, writes
+    are atomic (temp file + rename) and the folder is kept under a byte
+    budget by evicting the least recently used files.
+    """
+
+    def __init__(self, folder, max_bytes=512 * 1024 * 1024):
+        self.folder = os.path.abspath(folder)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(folder, exist_ok=True)
+
+        # name -> size, least recently used first
+        self._files = OrderedDict()
+        entries = []
+        for entry in os.scandir(folder):
+            if entry.is_file() and ".tmp-" not in entry.name:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+        self._bytes = sum(self._files.values())
+
+    @staticmethod
+    def content_key(*parts):
+        """Stable hash of JSON-serialisable parts (dict key order doesn't matter)"""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def get(self, name):
+        """Path of an existing artifact (marking it recently used), or None"""
+        path = self.path(name)
+        with self._lock:
+            if name not in self._files:
+                # Another worker process sharing the folder may have written it
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    return None
+                self._files[name] = size
+                self._bytes += size
+                return path
+            if not os.path.exists(path):
+                self._bytes -= self._files.pop(name)
+                return None
+            self._files.move_to_end(name)
+        try:
+            os.utime(path)  # keeps LRU order across restarts
+        except OSError:
+            pass
+        return path
+
+    def get_or_create(self, name, render):
+        """
+        Returns the path of artifact `name`, calling render(path) to write it
+        on a miss. Concurrent requests for the same name render it only once.
+        """
+        existing = self.get(name)
+        if existing:
+            self._count("hits")
+            return existing
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(name, threading.Lock())
+        try:
+            with key_lock:
+                existing = self.get(name)
+                if existing:
+                    self._count("hits")
+                    return existing
+                self._count("misses")
+
+                path = self.path(name)
+                tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+                try:
+                    render(tmp_path)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                self._add(name, os.path.getsize(path))
+        finally:
+            # Also on failure, or a name whose render raised stays in _key_locks forever
+            with self._lock:
+                if self._key_locks.get(name) is key_lock:
+                    del self._key_locks[name]
+        return path
+
+    def _add(self, name, size):
+        with self._lock:
+            self._bytes += size - self._files.pop(name, 0)
+            self._files[name] = size
+            # Evict least recently used, never the file just written
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_name, old_size = self._files.popitem(last=False)
+                self._bytes -= old_size
+                self._stats["evictions"] += 1
+                try:
+                    os.remove(self.path(old_name))
+                except OSError:
+                    pass
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["files"] = len(self._files)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        return stats
@@ -0,0 +1,419 @@
+# asgi_app.py
+
+"""
+The API as an ASGI application, so one worker process can hold hundreds
+of LLM-bound requests: `SERVER_MODE=asgi python serve.py`, or
+`uvicorn asgi_app:create_app --factory`.
+
+Uploads, enhancement and the enhancement stream run as coroutines that
+await the model (parse_resume_async, iter_enhancement_events_async);
+their text extraction, cache lookups and scoring go to a pool of
+ASGI_CPU_WORKERS threads, so the event loop never blocks on them. Every
+other request (generate, render, downloads, batch endpoints, jobs,
+?async=true submissions, the frontend) is handed to the Flask app of
+app.py on a pool of SERVER_THREADS threads. Routes, fields and JSON
+shapes are therefore the same as with the threaded server.
+"""
+
+import io
+import sys
+import json
+import asyncio
+import functools
+import contextvars
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.exceptions import HTTPException, InternalServerError, RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from werkzeug.wrappers import Request, Response
+import telemetry
+from app import (allowed_file, create_app as create_wsgi_app, enhance_response, enhancement_sse, resume_parser,
+                 upload_response)
+from ai_enhancer import enhance_resume_content_async, iter_enhancement_events_async
+from backpressure import AsyncConcurrencyLimit, Overloaded
+from resume_model import Resume, ResumeValidationError
+from telemetry import span, log_exception
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its request body arrived, or while its response streamed"""
+
+
+def jsonify(value, status=200):
+    # Encoded like Flask's jsonify, so both servers answer byte for byte the same
+    body = json.dumps(value, sort_keys=True, separators=(",", ":")) + "\n"
+    return Response(body, status=status, mimetype="application/json")
+
+
+def overloaded(message, retry_after=1):
+    response = jsonify({"error": message}, 503)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def wants_async(environ):
+    """True when the client asked for a job id instead of waiting (?async=true)"""
+    value = parse_qs(environ["QUERY_STRING"]).get("async", [""])[0]
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _environ(scope):
+    """A WSGI environ for an ASGI HTTP scope; wsgi.input is set once it is known how the body is read"""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": "",
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        # The body ends where its ASGI messages do, chunked or not
+        "wsgi.input_terminated": True,
+    }
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _headers(items):
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in items]
+
+
+async def _read_body(receive, environ, max_length):
+    """The whole request body, for the coroutine routes (whose uploads are capped at MAX_CONTENT_LENGTH)"""
+    if max_length and int(environ.get("CONTENT_LENGTH") or 0) > max_length:
+        raise RequestEntityTooLarge()
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnected()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if max_length and size > max_length:
+            raise RequestEntityTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+class _BodyReader(io.RawIOBase):
+    """
+    wsgi.input for a request handed to the Flask app: the pool thread
+    running it reads the body as its messages arrive on the event loop, so
+    batch uploads (up to BATCH_MAX_CONTENT_LENGTH) are never buffered whole.
+    """
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b""
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            self._buffer = message.get("body", b"")
+            self._more = message["type"] == "http.request" and message.get("more_body", False)
+        n = min(len(buffer), len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+class AsyncApp:
+    """
+    The ASGI callable built by create_app. Coroutine routes are keyed on
+    (method, path); anything else goes to the Flask app, which shares its
+    Services (parse cache, job queue, similarity index, request gate).
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.config = config = wsgi_app.config
+        self.services = wsgi_app.extensions['resume_builder']
+        # Waiting costs a coroutine, not a thread, so far more LLM-bound requests can be admitted
+        self.llm_limit = AsyncConcurrencyLimit('llm_async', config['ASGI_LLM_ENDPOINT_CONCURRENCY'],
+                                               config['ASGI_LLM_ENDPOINT_QUEUE'], config['ADMISSION_MAX_WAIT'])
+        self.services.limits['llm_async'] = self.llm_limit  # reported in /health and /metrics with the others
+        self.cpu_pool = ThreadPoolExecutor(max_workers=config['ASGI_CPU_WORKERS'], thread_name_prefix="asgi-cpu")
+        self.wsgi_pool = ThreadPoolExecutor(max_workers=config['SERVER_THREADS'], thread_name_prefix="asgi-wsgi")
+        self.routes = {
+            ("POST", "/api/upload"): self.upload_resume,
+            ("POST", "/api/enhance"): self.enhance_resume,
+            ("POST", "/api/enhance/stream"): self.enhance_resume_stream,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return  # no websockets
+        environ = _environ(scope)
+        route = self.routes.get((environ["REQUEST_METHOD"], scope["path"]))
+        # Queued jobs return at once; the thread pool handles them as well as the Flask app would
+        if route is None or wants_async(environ):
+            await self._call_wsgi(environ, receive, send)
+        else:
+            await self._call_route(route, environ, receive, send)
+
+    async def run(self, fn, *args):
+        """fn(*args) on the CPU pool, recording its spans on the current request"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, functools.partial(contextvars.copy_context().run, fn, *args))
+
+    # --- Requests handled by the Flask app ---
+    async def _call_wsgi(self, environ, receive, send):
+        loop = asyncio.get_running_loop()
+        environ["wsgi.input"] = io.BufferedReader(_BodyReader(receive, loop), 64 * 1024)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+
+        body = await loop.run_in_executor(self.wsgi_pool, self.wsgi_app, environ, start_response)
+        try:
+            chunks = iter(body)
+            await send({"type": "http.response.start", "status": started["status"],
+                        "headers": _headers(started["headers"])})
+            # Streams (batch NDJSON) and files are read on the pool, chunk by chunk
+            while True:
+                chunk = await loop.run_in_executor(self.wsgi_pool, next, chunks, None)
+                if chunk is None:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            # Runs the Flask app's close callbacks: admission slot, request gate
+            if hasattr(body, "close"):
+                await loop.run_in_executor(self.wsgi_pool, body.close)
+
+    # --- Coroutine routes ---
+    async def _call_route(self, route, environ, receive, send):
+        svc = self.services
+        if not svc.gate.enter():
+            await self._send(send, overloaded("Server is shutting down", retry_after=5), environ)
+            return
+        token = telemetry.start_request(environ.get("HTTP_X_REQUEST_ID"))
+        try:
+            response = await self._dispatch(route, environ, receive)
+            if response is None:
+                return
+            origin = environ.get("HTTP_ORIGIN")
+            if origin:
+                # As flask-cors answers with its defaults
+                response.headers["Access-Control-Allow-Origin"] = origin
+                response.vary.add("Origin")
+            telemetry.finish_request(response, environ["REQUEST_METHOD"], environ["PATH_INFO"])
+            await self._send(send, response, environ, receive)
+        finally:
+            telemetry.end_request(token)
+            svc.gate.exit()
+
+    async def _dispatch(self, route, environ, receive):
+        """The route's Response once it has an llm_async slot and its body; None if the client left"""
+        try:
+            await self.llm_limit.acquire()
+        except Overloaded as e:
+            return overloaded(str(e), e.retry_after)
+        try:
+            try:
+                body = await _read_body(receive, environ, self.config['MAX_CONTENT_LENGTH'])
+            except ClientDisconnected:
+                self.llm_limit.release()
+                return None
+            environ["wsgi.input"] = io.BytesIO(body)
+            environ["CONTENT_LENGTH"] = str(len(body))
+            request = Request(environ)
+            request.max_content_length = self.config['MAX_CONTENT_LENGTH']
+            response = await route(request)
+        except HTTPException as e:
+            response = e.get_response(environ)
+        except BaseException as e:
+            self.llm_limit.release()
+            if not isinstance(e, Exception):
+                raise
+            log_exception(route.__name__, e)
+            return InternalServerError().get_response(environ)
+        # Streams keep the slot until they are closed
+        if response.is_streamed:
+            response.call_on_close(self.llm_limit.release)
+        else:
+            self.llm_limit.release()
+        return response
+
+    async def _send(self, send, response, environ, receive=None):
+        body = response.response
+        try:
+            await send({"type": "http.response.start", "status": response.status_code,
+                        "headers": _headers(response.headers.items())})
+            if environ["REQUEST_METHOD"] != "HEAD":
+                if hasattr(body, "__aiter__"):
+                    await self._stream(send, body, receive)
+                else:
+                    for chunk in response.iter_encoded():
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        except ClientDisconnected:
+            pass
+        finally:
+            if hasattr(body, "aclose"):
+                await body.aclose()  # closing the enhancement stream cancels the sections still running
+            response.close()
+
+    async def _stream(self, send, body, receive):
+        """
+        Sends an async body while watching for http.disconnect: a stream can
+        go quiet for as long as a model call takes, so a client that left is
+        noticed at once rather than at the next send, which servers may
+        silently drop. Raises ClientDisconnected when it left.
+        """
+        async def pump():
+            async for chunk in body:
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        sending = asyncio.ensure_future(pump())
+        if receive is None:
+            await sending
+            return
+        watching = asyncio.ensure_future(disconnected())
+        try:
+            await asyncio.wait({sending, watching}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watching.cancel()
+            if not sending.done():
+                sending.cancel()
+                # The generator must have stopped before it can be closed
+                await asyncio.wait({sending})
+        if sending.cancelled():
+            raise ClientDisconnected()
+        sending.result()  # the body's own errors
+
+    async def upload_resume(self, request):
+        try:
+            # Parsing the multipart body is CPU work too
+            files = await self.run(getattr, request, "files")
+            if 'file' not in files:
+                return jsonify({"error": "No file provided"}, 400)
+
+            file = files['file']
+
+            if file.filename == '':
+                return jsonify({"error": "No file selected"}, 400)
+
+            if not allowed_file(file.filename):
+                return jsonify({"error": "Invalid file type. Use PDF or DOCX"}, 400)
+
+            filename = secure_filename(file.filename)
+            job_description = request.form.get('job_description', '')
+
+            with span("file_read"):
+                content = file.read()
+
+            svc = self.services
+            parsed_data = await resume_parser.parse_resume_async(content, svc.parse_cache, filename, self.cpu_pool)
+            return jsonify(await self.run(upload_response, svc, parsed_data, filename, job_description))
+
+        except Exception as e:
+            log_exception("upload_resume", e)
+            return jsonify({"error": str(e)}, 500)
+
+    async def enhance_resume(self, request):
+        try:
+            data = request.get_json()
+            if not data or 'resume_data' not in data:
+                return jsonify({"error": "No resume data provided"}, 400)
+
+            resume = Resume.from_dict(data['resume_data'])
+            job_description = data.get('job_description', '')
+            enhanced = await enhance_resume_content_async(resume, job_description)
+            return jsonify(await self.run(enhance_response, enhanced, job_description))
+        except ResumeValidationError as e:
+            return jsonify({"error": str(e)}, 400)
+        except Exception as e:
+            log_exception("enhance_resume", e)
+            return jsonify({"error": str(e)}, 500)
+
+    async def enhance_resume_stream(self, request):
+        """The Server-Sent Events of /api/enhance/stream in app.py"""
+        data = request.get_json(silent=True)
+        if not data or 'resume_data' not in data:
+            return jsonify({"error": "No resume data provided"}, 400)
+
+        try:
+            resume = Resume.from_dict(data['resume_data'])
+        except ResumeValidationError as e:
+            return jsonify({"error": str(e)}, 400)
+        job_description = data.get('job_description', '')
+
+        async def generate_events():
+            events = iter_enhancement_events_async(resume, job_description)
+            try:
+                async for event in events:
+                    if event[0] == "done":
+                        # Rescoring the enhanced resume is CPU work
+                        yield await self.run(enhancement_sse, event, job_description)
+                    else:
+                        yield enhancement_sse(event, job_description)
+            except Exception as e:
+                log_exception("enhance_resume_stream", e)
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            finally:
+                await events.aclose()
+
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return Response(generate_events(), mimetype='text/event-stream', headers=headers)
+
+    # --- Lifecycle ---
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Waits for requests and jobs to drain, so it must not block the loop still serving them
+                await asyncio.get_running_loop().run_in_executor(None, self.services.shutdown)
+                self.cpu_pool.shutdown(wait=False)
+                self.wsgi_pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_app(**overrides):
+    """
+    Builds the ASGI app around a Flask app from app.create_app, with the
+    same settings and keyword overrides. Entry point for ASGI servers, e.g.
+    `uvicorn asgi_app:create_app --factory`; uvicorn's lifespan shutdown
+    drains requests and jobs as SIGTERM does under serve.py.
+    """
+    return AsyncApp(create_wsgi_app(**overrides))
+
+
+def __getattr__(name):
+    # 'uvicorn asgi_app:app' gets a default instance, created on first use
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
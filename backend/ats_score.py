@@ -1,22 +1,31 @@
 # ats_score.py
-def calculate_ats_score(parsed_data):
-    # Default safe extraction
-    contact_info = parsed_data.get("personal_info", {})
-    has_contact = contact_info.get("email") or contact_info.get("phone")
-    
-    skills = parsed_data.get("skills", [])
-    experience = parsed_data.get("experience", [])
-    education = parsed_data.get("education", [])
-    
-    # ... rest of your code remains the same ...
+from keyword_matcher import match_resume
+from resume_model import as_resume
+from telemetry import timed
+
+# Category weights, without and with a job description to match against
+CATEGORY_WEIGHTS = {"contact_info": 0.10, "skills": 0.30, "experience": 0.40, "education": 0.20}
+JD_CATEGORY_WEIGHTS = {"contact_info": 0.10, "skills": 0.20, "experience": 0.25, "education": 0.10,
+                       "keyword_match": 0.35}
+
+def grade_for(total_score):
+    if total_score >= 80:
+        return "A"
+    elif total_score >= 60:
+        return "B"
+    return "C"
+
+@timed("scoring")
+def calculate_ats_score(resume, job_description=None):
+    resume = as_resume(resume)
 
     # --------------------
     # CATEGORY SCORES (0–100)
     # --------------------
-    contact_score = 100 if contact_info else 40
-    skills_score = min(len(skills) * 10, 100)
-    experience_score = min(len(experience) * 20, 100)
-    education_score = 100 if len(education) > 0 else 50
+    contact_score = 100 if resume.personal_info_given else 40
+    skills_score = min(len(resume.skills) * 10, 100)
+    experience_score = min(len(resume.experience) * 20, 100)
+    education_score = 100 if resume.education else 50
 
     # Combine
     category_scores = {
@@ -26,22 +35,18 @@ def calculate_ats_score(parsed_data):
         "education": education_score
     }
 
+    # Match against the job description, if we have one
+    keyword_match = match_resume(resume, job_description)
+
     # Weighted ATS Score
-    total_score = round(
-        contact_score * 0.10 +
-        skills_score * 0.30 +
-        experience_score * 0.40 +
-        education_score * 0.20,
-        2
-    )
+    weights = CATEGORY_WEIGHTS
+    if keyword_match is not None:
+        category_scores["keyword_match"] = keyword_match["score"]
+        weights = JD_CATEGORY_WEIGHTS
+    total_score = round(sum(category_scores[c] * w for c, w in weights.items()), 2)
 
     # Grade
-    if total_score >= 80:
-        grade = "A"
-    elif total_score >= 60:
-        grade = "B"
-    else:
-        grade = "C"
+    grade = grade_for(total_score)
 
     # Basic feedback
     feedback = []
@@ -64,9 +69,20 @@ def calculate_ats_score(parsed_data):
             "message": "Add your latest qualification to improve score."
         })
 
-    return {
+    if keyword_match is not None and keyword_match["score"] < 60:
+        missing = keyword_match["missing"]["skills"] + keyword_match["missing"]["keywords"]
+        feedback.append({
+            "category": "Keywords",
+            "severity": "high",
+            "message": "Add keywords from the job description: " + ", ".join(missing[:8]) + "."
+        })
+
+    result = {
         "total_score": total_score,
         "grade": grade,
         "category_scores": category_scores,
         "feedback": feedback
     }
+    if keyword_match is not None:
+        result["keyword_match"] = keyword_match
+    return result
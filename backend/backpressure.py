@@ -0,0 +1,164 @@
+# backpressure.py
+
+import asyncio
+import threading
+from collections import deque
+
+
+class Overloaded(Exception):
+    """A request turned away instead of queued; answered with 503 and Retry-After"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimit:
+    """
+    Lets at most `limit` requests of one group (e.g. the LLM-bound
+    endpoints) run at a time. Up to `queue_depth` more wait, for at most
+    max_wait seconds, for a slot; beyond that a request is shed at once, so
+    slow model calls can't tie up every server thread and /health, job
+    polling and downloads stay responsive.
+    """
+
+    def __init__(self, name, limit, queue_depth=0, max_wait=10.0):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_depth = max(0, queue_depth)
+        self.max_wait = max_wait
+        self._running = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._shed = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Takes a slot or raises Overloaded"""
+        with self._cond:
+            if self._running >= self.limit:
+                if self._waiting >= self.queue_depth:
+                    self._shed += 1
+                    raise Overloaded(f"Too many {self.name} requests in progress")
+                self._waiting += 1
+                try:
+                    got_slot = self._cond.wait_for(lambda: self._running < self.limit, self.max_wait)
+                finally:
+                    self._waiting -= 1
+                if not got_slot:
+                    self._shed += 1
+                    raise Overloaded(f"Timed out waiting for a {self.name} slot")
+            self._running += 1
+            self._admitted += 1
+
+    def release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "queue_depth": self.queue_depth,
+                "running": self._running,
+                "waiting": self._waiting,
+                "admitted": self._admitted,
+                "shed": self._shed
+            }
+
+
+class AsyncConcurrencyLimit(ConcurrencyLimit):
+    """
+    ConcurrencyLimit for coroutines on one event loop (the ASGI app): a
+    queued request waits without holding a thread, so the limits can be
+    far higher than a server's thread count. release() hands the slot
+    straight to the longest waiting request and, like everything else
+    here, must be called on the loop's thread.
+    """
+
+    def __init__(self, name, limit, queue_depth=0, max_wait=10.0):
+        super().__init__(name, limit, queue_depth, max_wait)
+        self._waiters = deque()
+
+    async def acquire(self):
+        """Takes a slot or raises Overloaded"""
+        if self._running < self.limit:
+            self._running += 1
+        else:
+            if self._waiting >= self.queue_depth:
+                self._shed += 1
+                raise Overloaded(f"Too many {self.name} requests in progress")
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(waiter, self.max_wait)
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    self.release()  # handed over just as the wait timed out or was cancelled
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                self._shed += 1
+                raise Overloaded(f"Timed out waiting for a {self.name} slot") from None
+            finally:
+                self._waiting -= 1
+        self._admitted += 1
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot passes on; _running stays the same
+                return
+        self._running -= 1
+
+    def stats(self):
+        # Only changed on the loop's thread, so a snapshot needs no lock
+        return {
+            "limit": self.limit,
+            "queue_depth": self.queue_depth,
+            "running": self._running,
+            "waiting": self._waiting,
+            "admitted": self._admitted,
+            "shed": self._shed
+        }
+
+
+class RequestGate:
+    """
+    Counts requests in flight so a shutdown can stop admitting new ones and
+    wait for the rest to finish.
+    """
+
+    def __init__(self):
+        self._in_flight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def enter(self):
+        """False once the gate is closed (the server is draining)"""
+        with self._cond:
+            if self._closed:
+                return False
+            self._in_flight += 1
+            return True
+
+    def exit(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def close(self, timeout=None):
+        """Stops admitting requests and waits for those in flight; False if some outlasted timeout"""
+        with self._cond:
+            self._closed = True
+            return self._cond.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def stats(self):
+        with self._cond:
+            return {"in_flight": self._in_flight, "draining": self._closed}
@@ -0,0 +1,242 @@
+# batch_ingest.py
+
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from werkzeug.utils import secure_filename
+from resume_parser import extract_text, clean_text, parse_resume_text, create_fallback_structure
+from parse_cache import hash_file
+from ats_score import calculate_ats_score
+from resume_model import Resume
+
+RESUME_EXTENSIONS = {'pdf', 'docx', 'doc'}
+
+# Zip bomb limits, checked against the archive's directory before anything is extracted
+ZIP_MAX_ENTRIES = int(os.getenv("BATCH_ZIP_MAX_ENTRIES", 2000))
+ZIP_MAX_BYTES = int(os.getenv("BATCH_ZIP_MAX_BYTES", 1024 * 1024 * 1024))  # uncompressed resume files in total
+ZIP_MAX_RATIO = float(os.getenv("BATCH_ZIP_MAX_RATIO", 100))  # PDF and DOCX are compressed already
+
+
+class ArchiveRejected(ValueError):
+    """A zip archive over the entry, size or compression ratio limits"""
+
+
+def is_resume_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in RESUME_EXTENSIONS
+
+
+def check_zip(archive, max_entries=ZIP_MAX_ENTRIES, max_bytes=ZIP_MAX_BYTES, max_ratio=ZIP_MAX_RATIO):
+    """
+    Raises ArchiveRejected unless the archive stays within the limits. The
+    sizes come from its directory; zipfile never reads a member past its
+    recorded file_size, so they also bound what extraction writes.
+    """
+    infos = archive.infolist()
+    if len(infos) > max_entries:
+        raise ArchiveRejected(f"Archive has {len(infos)} entries, the limit is {max_entries}")
+    total = 0
+    for info in infos:
+        if info.is_dir() or not is_resume_file(info.filename):
+            continue
+        if info.file_size > max(info.compress_size, 1) * max_ratio:
+            raise ArchiveRejected(f"{info.filename} is compressed more than {max_ratio:g}:1")
+        total += info.file_size
+        if total > max_bytes:
+            raise ArchiveRejected(f"Archive expands to more than {max_bytes} bytes")
+
+
+def unpack_zip(zip_source, dest_folder, max_entries=ZIP_MAX_ENTRIES, max_bytes=ZIP_MAX_BYTES,
+               max_ratio=ZIP_MAX_RATIO):
+    """
+    Extracts the resume files of a zip archive into dest_folder and returns
+    their paths; raises ArchiveRejected (before writing anything) for an
+    archive over the limits.
+    """
+    paths = []
+    with zipfile.ZipFile(zip_source) as archive:
+        check_zip(archive, max_entries, max_bytes, max_ratio)
+        for info in archive.infolist():
+            if info.is_dir() or not is_resume_file(info.filename):
+                continue
+            # Flatten directories and sanitize names so members can't escape dest_folder
+            name = secure_filename(os.path.basename(info.filename))
+            if not name:
+                continue
+            path = unique_path(dest_folder, name)
+            with archive.open(info) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            paths.append(path)
+    return paths
+
+
+def unique_path(folder, filename):
+    """Avoids collisions between same-named files from different folders or form fields"""
+    path = os.path.join(folder, filename)
+    stem, ext = os.path.splitext(filename)
+    n = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, f"{stem}_{n}{ext}")
+        n += 1
+    return path
+
+
+def _extract(filepath):
+    """Runs in a worker process: file -> cleaned text"""
+    # The batch already runs one process per file, don't nest another pool
+    return clean_text(extract_text(filepath, parallel=False))
+
+
+def _parse(filename, text, cache, file_hash, job_description, started, index):
+    """Runs on the LLM thread pool: cleaned text -> response record"""
+    parsed_data = parse_resume_text(text, cache, file_hash)
+    return _result(filename, parsed_data, job_description, started, index)
+
+
+def _result(filename, parsed_data, job_description, started, index=None):
+    resume = Resume.from_dict(parsed_data)
+    success = parsed_data != create_fallback_structure()
+    result = {
+        "filename": filename,
+        "success": success,
+        "data": resume.to_dict(),
+        "ats_score": calculate_ats_score(resume, job_description),
+    }
+    if index is not None and success:
+        result["duplicates"] = index.add(resume, filename)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def _error(filename, error, started):
+    return {
+        "filename": filename,
+        "success": False,
+        "error": str(error),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def ingest_batch(filepaths, cache=None, extract_workers=None, llm_concurrency=4, job_description=None,
+                 index=None):
+    """
+    Parses many resume files and yields one result dict per file as soon as
+    it finishes, in completion order.
+
+    Text extraction (PyPDF2/python-docx, CPU bound) fans out over a process
+    pool; LLM parsing runs on a thread pool whose size bounds the number of
+    concurrent Gemini calls. Files already in the parse cache are answered
+    without touching either pool. With a job description, every ATS score
+    includes the keyword match against it. With a SimilarityIndex, each
+    parsed resume is added to it and its result lists the duplicates found
+    among the resumes indexed before it.
+
+    Closing the generator early (the client disconnected) cancels the files
+    not started yet and waits only for those already being worked on.
+    """
+    started = time.perf_counter()
+    extract_pool = ProcessPoolExecutor(max_workers=extract_workers)
+    llm_pool = ThreadPoolExecutor(max_workers=llm_concurrency)
+    try:
+        pending = {}
+        for path in filepaths:
+            filename = os.path.basename(path)
+            file_hash = None
+            try:
+                if cache is not None:
+                    file_hash = hash_file(path)
+                    cached = cache.get_by_file(file_hash)
+                    if cached is not None:
+                        yield _result(filename, cached, job_description, started, index)
+                        continue
+                future = extract_pool.submit(_extract, path)
+                pending[future] = ("extract", filename, file_hash)
+            except Exception as e:
+                yield _error(filename, e, started)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, filename, file_hash = pending.pop(future)
+                try:
+                    if stage == "extract":
+                        text = future.result()
+                        parse_future = llm_pool.submit(_parse, filename, text, cache, file_hash,
+                                                       job_description, started, index)
+                        pending[parse_future] = ("parse", filename, file_hash)
+                    else:
+                        yield future.result()
+                except Exception as e:
+                    yield _error(filename, e, started)
+    finally:
+        extract_pool.shutdown(wait=True, cancel_futures=True)
+        llm_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def collect_paths(inputs, work_folder):
+    """Expands CLI inputs (files, folders, zip archives) into resume file paths"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in sorted(files) if is_resume_file(f))
+        elif item.lower().endswith(".zip"):
+            paths.extend(unpack_zip(item, work_folder))
+        elif is_resume_file(item):
+            paths.append(item)
+        else:
+            print(f"⚠️ Skipping unsupported file: {item}", file=sys.stderr)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a batch of resumes and print NDJSON results")
+    parser.add_argument("inputs", nargs="+", help="resume files, folders or zip archives")
+    parser.add_argument("--workers", type=int, default=None, help="text extraction processes (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="max concurrent LLM parse calls")
+    parser.add_argument("--job-description", help="text file with the job description to score against")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the parse cache")
+    parser.add_argument("--cache-path", default=os.getenv('PARSE_CACHE_PATH', 'cache/parse_cache.sqlite3'))
+    parser.add_argument("--index", metavar="FOLDER",
+                        help="similarity index to add the resumes to, flagging near-duplicates")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if not args.no_cache:
+        from parse_cache import ParseCache
+        cache = ParseCache(args.cache_path)
+
+    index = None
+    if args.index:
+        from similarity_index import SimilarityIndex
+        index = SimilarityIndex(args.index)
+
+    job_description = None
+    if args.job_description:
+        with open(args.job_description, encoding="utf-8") as f:
+            job_description = f.read()
+
+    work_folder = tempfile.mkdtemp(prefix="resume_batch_")
+    try:
+        paths = collect_paths(args.inputs, work_folder)
+        ok = duplicates = 0
+        for result in ingest_batch(paths, cache, args.workers, args.llm_concurrency, job_description, index):
+            ok += result["success"]
+            duplicates += bool(result.get("duplicates"))
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+        print(f"✅ Parsed {ok}/{len(paths)} resumes", file=sys.stderr)
+        if index is not None:
+            index.save()
+            print(f"🔁 {duplicates} duplicates of already indexed resumes", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
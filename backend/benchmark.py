@@ -0,0 +1,625 @@
+# benchmark.py
+"""
+Benchmarks the hot paths (extract, parse, score, enhance, generate) on a
+synthetic resume corpus with a stubbed LLM, and optionally the Flask app
+end to end, static frontend serving, and how many LLM-bound requests the
+threaded and the ASGI server hold at once. Results are written as JSON so
+runs can be compared:
+
+    python benchmark.py --output before.json
+    ... change something ...
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_client
+import telemetry
+import resume_parser
+import ai_enhancer
+from resume_parser import extract_text, parse_resume, clean_text
+from ats_score import calculate_ats_score
+import bulk_score
+from bulk_score import rank_resumes
+from ai_enhancer import enhance_resume_content
+from resume_generator import generate_resume, RENDERERS
+from resume_model import Resume
+from static_assets import AssetStore
+
+STAGES = ("extract", "parse", "parse_llm", "score", "score_batch", "score_batch_cached", "enhance", "generate")
+
+JOB_DESCRIPTION = """
+Senior Backend Engineer. We are looking for a Python engineer with strong experience in Django or Flask,
+PostgreSQL, Redis and Docker. Experience with Kubernetes, AWS and CI/CD pipelines is a plus. You will design
+REST APIs, build data pipelines with Kafka and Airflow, and mentor engineers. Familiarity with machine learning,
+distributed systems and observability (Prometheus, Grafana) is preferred. Distributed systems experience required.
+"""
+
+# --- Synthetic corpus ---
+FIRST_NAMES = ("Ana", "Ben", "Chen", "Dara", "Eli", "Fatima", "Gus", "Hana", "Ivan", "Jo")
+LAST_NAMES = ("Lee", "Okafor", "Silva", "Novak", "Haddad", "Kim", "Moreau", "Tanaka", "Singh", "Berg")
+COMPANIES = ("Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Hooli", "Vandelay", "Wayne Tech")
+TITLES = ("Software Engineer", "Senior Software Engineer", "Backend Developer", "Data Engineer",
+          "Platform Engineer", "Engineering Manager", "DevOps Engineer", "Full Stack Developer")
+SKILLS = ("Python", "Java", "Go", "SQL", "PostgreSQL", "Redis", "Docker", "Kubernetes", "AWS", "Terraform",
+          "Django", "Flask", "React", "Kafka", "Airflow", "Spark", "Git", "Linux", "GraphQL", "CI/CD")
+VERBS = ("Built", "Designed", "Led", "Migrated", "Optimised", "Automated", "Launched", "Scaled", "Refactored")
+OBJECTS = ("a REST API serving 2M requests/day", "the billing pipeline", "a Kafka event bus",
+           "CI/CD for 40 services", "the Postgres schema", "an internal ML feature store",
+           "Kubernetes deployments on AWS", "a React dashboard", "nightly Airflow ETL jobs")
+OUTCOMES = ("cutting p95 latency by 40%", "saving $120k a year", "reducing incidents by half",
+            "with zero downtime", "for a team of 8 engineers", "ahead of schedule")
+
+# (jobs, bullets per job, summary sentences); the largest spans several PDF pages
+SIZES = {"small": (2, 3, 1), "medium": (4, 5, 2), "large": (8, 8, 4), "xlarge": (24, 10, 6)}
+
+
+def make_resume(rng, size="medium"):
+    jobs, bullets, sentences = SIZES[size]
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        "personal_info": {
+            "name": name,
+            "email": f"{name.lower().replace(' ', '.')}@example.com",
+            "phone": f"+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            "location": "Austin, TX",
+            "linkedin": f"linkedin.com/in/{name.lower().replace(' ', '')}"
+        },
+        "summary": " ".join(
+            f"{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience in "
+            f"{', '.join(rng.sample(SKILLS, 3))}." for _ in range(sentences)),
+        "skills": rng.sample(SKILLS, rng.randint(6, 14)),
+        "experience": [{
+            "title": rng.choice(TITLES),
+            "company": rng.choice(COMPANIES),
+            "duration": f"{2010 + i} - {2011 + i}",
+            "description": [f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}, {rng.choice(OUTCOMES)}."
+                            for _ in range(bullets)]
+        } for i in range(jobs)],
+        "education": [{"degree": "BSc Computer Science", "institution": "State University", "year": "2010"}],
+        "projects": [],
+        "certifications": []
+    }
+
+
+def make_corpus(count, seed=42):
+    """Resumes of every size, alternating PDF and DOCX, with their rendered bytes"""
+    rng = random.Random(seed)
+    sizes = list(SIZES)
+    corpus = []
+    for i in range(count):
+        size = sizes[i % len(sizes)]
+        fmt = "pdf" if (i // len(sizes)) % 2 == 0 else "docx"
+        data = make_resume(rng, size)
+        buffer = io.BytesIO()
+        RENDERERS[fmt](Resume.from_dict(data), "modern", buffer)
+        corpus.append({"size": size, "format": fmt, "filename": f"resume_{i}.{fmt}",
+                       "content": buffer.getvalue(), "data": data})
+    return corpus
+
+
+# --- Measurement ---
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies, wall_seconds, items_per_op=1):
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "ops": len(values),
+        "wall_s": round(wall_seconds, 4),
+        "ops_per_s": round(len(values) / wall_seconds, 2) if wall_seconds else 0.0,
+        "items_per_s": round(len(values) * items_per_op / wall_seconds, 2) if wall_seconds else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(values) / len(values)) if values else 0.0,
+            "p50": ms(percentile(values, 50)),
+            "p95": ms(percentile(values, 95)),
+            "p99": ms(percentile(values, 99)),
+            "max": ms(values[-1]) if values else 0.0
+        }
+    }
+
+
+def measure(fn, inputs, iterations, items_per_op=1):
+    """Times fn over inputs, then repeats one pass under tracemalloc for peak memory"""
+    fn(inputs[0])  # warm-up: imports, caches, pools
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for item in inputs:
+            t0 = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - t0)
+    result = summarize(latencies, time.perf_counter() - started, items_per_op)
+
+    # Kept out of the timed loop: tracing allocations slows everything down
+    tracemalloc.start()
+    peak = 0
+    for item in inputs:
+        tracemalloc.reset_peak()
+        fn(item)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    result["peak_mem_kb"] = round(peak / 1024, 1)
+    return result
+
+
+def run_stages(corpus, stages, iterations, work_folder):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        texts = {item["filename"]: clean_text(extract_text(item["content"], filename=item["filename"]))
+                 for item in corpus}
+    # Stages downstream of parsing get the Resume the app builds at ingress
+    parsed = [Resume.from_dict(item["data"]) for item in corpus]
+
+    def fresh_memo(_):
+        # Every enhance call starts cold, otherwise only the first one reaches the LLM
+        ai_enhancer.bullet_memo = ai_enhancer.BulletMemo(ai_enhancer.ENHANCE_MEMO_SIZE)
+
+    def fresh_token_cache():
+        # score_batch times first sight of the resumes; score_batch_cached ranks them again
+        bulk_score.token_cache = bulk_score.TokenCache(bulk_score.BULK_TOKEN_CACHE_SIZE)
+
+    stage_fns = {
+        "extract": (lambda item: extract_text(item["content"], filename=item["filename"]), corpus, 1),
+        "parse": (lambda item: parse_resume(item["content"], filename=item["filename"]), corpus, 1),
+        "parse_llm": (lambda item: resume_parser.parse_resume_with_ai(texts[item["filename"]]), corpus, 1),
+        "score": (lambda data: calculate_ats_score(data, JOB_DESCRIPTION), parsed, 1),
+        "score_batch": (lambda batch: (fresh_token_cache(), rank_resumes(batch, JOB_DESCRIPTION)),
+                        [parsed], len(parsed)),
+        "score_batch_cached": (lambda batch: rank_resumes(batch, JOB_DESCRIPTION), [parsed], len(parsed)),
+        "enhance": (lambda data: (fresh_memo(None), enhance_resume_content(data, JOB_DESCRIPTION)), parsed, 1),
+        "generate": (lambda data: generate_resume(data, "modern", work_folder), parsed, 1),
+    }
+    results = {}
+    for stage in stages:
+        fn, inputs, items_per_op = stage_fns[stage]
+        print(f"⏱️  {stage} ...", file=sys.stderr)
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            results[stage] = measure(fn, inputs, iterations, items_per_op)
+    return results
+
+
+def run_http(corpus, total_requests, concurrency):
+    """End-to-end load through the Flask app's test client, one client per worker thread"""
+    # The app creates its folders and caches relative to the working directory
+    work_folder = tempfile.mkdtemp(prefix="resume_bench_http_")
+    os.environ.setdefault("PARSE_CACHE_PATH", os.path.join(work_folder, "parse_cache.sqlite3"))
+    previous_cwd = os.getcwd()
+    os.chdir(work_folder)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            from app import app
+        telemetry.ACCESS_LOG = False  # one JSON line per request would drown the report
+
+        def request_for(i):
+            item = corpus[i % len(corpus)]
+            kind = ("upload", "enhance", "generate", "score_batch")[i % 4]
+            if kind == "upload":
+                return kind, "/api/upload", {
+                    "data": {"file": (io.BytesIO(item["content"]), item["filename"]),
+                             "job_description": JOB_DESCRIPTION},
+                    "content_type": "multipart/form-data"}
+            if kind == "enhance":
+                return kind, "/api/enhance", {"json": {"resume_data": item["data"], "job_description": JOB_DESCRIPTION}}
+            if kind == "generate":
+                return kind, "/api/generate", {"json": {"resume_data": item["data"], "template": "modern"}}
+            return kind, "/api/score/batch", {"json": {"resumes": [c["data"] for c in corpus],
+                                                       "job_description": JOB_DESCRIPTION}}
+
+        latencies = {}
+        statuses = {}
+        lock = threading.Lock()
+        local = threading.local()
+
+        def send(i):
+            if not hasattr(local, "client"):
+                local.client = app.test_client()
+            kind, url, kwargs = request_for(i)
+            t0 = time.perf_counter()
+            response = local.client.post(url, **kwargs)
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.setdefault(kind, []).append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        print(f"⏱️  http: {total_requests} requests, concurrency {concurrency} ...", file=sys.stderr)
+        started = time.perf_counter()
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(send, range(total_requests)))
+        wall = time.perf_counter() - started
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+    all_latencies = [seconds for values in latencies.values() for seconds in values]
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "overall": summarize(all_latencies, wall),
+        "endpoints": {kind: summarize(values, wall) for kind, values in sorted(latencies.items())}
+    }
+
+
+def run_static(visits):
+    """
+    Page visits served the old way (Flask's static route straight from
+    disk) against the AssetStore, on a first visit and on a repeat visit
+    with a warm browser cache. Reports bytes on the wire and worker time.
+    """
+    from flask import Flask, request
+    frontend = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend")
+    pages = sorted(f for f in os.listdir(frontend) if f.endswith(".html"))
+    files = sorted(os.path.relpath(os.path.join(folder, name), frontend).replace(os.sep, "/")
+                   for folder, _, names in os.walk(frontend) for name in names)
+    headers = {"Accept-Encoding": "gzip, deflate, br"}
+
+    disk_app = Flask(__name__, static_folder=frontend, static_url_path="")
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        store = AssetStore(frontend)
+    asset_app = Flask(__name__, static_folder=None)
+    asset_app.add_url_rule("/<path:path>", "asset", lambda path: store.response(request, path))
+
+    def visit(client, paths, etags):
+        sent = 0
+        seconds = 0.0
+        for path in paths:
+            conditional = {"If-None-Match": etags[path]} if path in etags else {}
+            t0 = time.perf_counter()
+            with client.get("/" + path, headers={**headers, **conditional}) as response:
+                body = response.get_data()
+            seconds += time.perf_counter() - t0
+            sent += len(body)
+            if response.headers.get("ETag"):
+                etags[path] = response.headers["ETag"]
+        return sent, seconds, len(paths)
+
+    scenarios = {
+        # The old Flask static route: every file revalidated (Cache-Control: no-cache) on every visit
+        "disk": (disk_app, files, files),
+        # Pages revalidated; fingerprinted assets come from the browser cache on repeat visits
+        "assets": (asset_app, pages + [store.fingerprints[f] for f in files if f in store.fingerprints], pages),
+    }
+    print(f"⏱️  static: {visits} visits ...", file=sys.stderr)
+    results = {}
+    for name, (flask_app, first_paths, repeat_paths) in scenarios.items():
+        client = flask_app.test_client()
+        for label, paths, warm in (("first_visit", first_paths, False), ("repeat_visit", repeat_paths, True)):
+            total_bytes = total_seconds = total_requests = 0
+            for _ in range(visits):
+                etags = {}
+                if warm:
+                    visit(client, first_paths, etags)
+                sent, seconds, count = visit(client, paths, etags)
+                total_bytes += sent
+                total_seconds += seconds
+                total_requests += count
+            results[f"{name}:{label}"] = {
+                "requests_per_visit": total_requests // visits,
+                "bytes_per_visit": total_bytes // visits,
+                "worker_ms_per_visit": round(total_seconds * 1000 / visits, 3),
+            }
+    return results
+
+
+def current_rss():
+    """Resident set size in bytes, from /proc on Linux (elsewhere the peak so far)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _distinct_enhance_body(item, i):
+    """An /api/enhance body no other request shares, so neither the memo nor coalescing skips its model calls"""
+    data = json.loads(json.dumps(item["data"]))
+    data["summary"] = f"{data.get('summary', '')} (#{i})"
+    for group in ("experience", "projects"):
+        for entry in data.get(group, []):
+            entry["description"] = [f"{line} (#{i})" for line in entry.get("description", [])]
+    return json.dumps({"resume_data": data, "job_description": JOB_DESCRIPTION}).encode("utf-8")
+
+
+def _asgi_call(app, path, body):
+    """One POST through an ASGI app in this process; returns the status"""
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"", "http_version": "1.1",
+             "scheme": "http", "server": ("benchmark", 80), "client": ("benchmark", 0),
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()  # the client stays connected
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    async def call():
+        await app(scope, receive, send)
+        return status[0]
+    return call()
+
+
+def in_flight_worker(kind, in_flight, threads, llm_latency, resumes, seed):
+    """
+    Runs in a process of its own (see run_in_flight): sends in_flight
+    distinct /api/enhance requests at once to the Flask app served by
+    `threads` threads (kind "sync") or to the ASGI app (kind "async"), and
+    samples requests in flight, threads and RSS while they run.
+    """
+    work_folder = tempfile.mkdtemp(prefix="resume_bench_inflight_")
+    os.chdir(work_folder)
+    # The stub stands in for a provider that takes the load: only the server may limit concurrency
+    llm_client.set_client(llm_client.LLMClient(llm_client.StubBackend(llm_latency), max_concurrency=in_flight * 16))
+    telemetry.ACCESS_LOG = False
+    overrides = {"LLM_ENDPOINT_CONCURRENCY": in_flight, "LLM_ENDPOINT_QUEUE": in_flight,
+                 "ASGI_LLM_ENDPOINT_CONCURRENCY": in_flight, "ASGI_LLM_ENDPOINT_QUEUE": in_flight,
+                 "ADMISSION_MAX_WAIT": 600.0, "SIMILARITY_INDEX_PATH": ""}
+    corpus = make_corpus(resumes, seed)
+    bodies = [_distinct_enhance_body(corpus[i % len(corpus)], i) for i in range(in_flight + 1)]
+    latencies = []
+    statuses = {}
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        if kind == "async":
+            import asgi_app
+            app = asgi_app.create_app(**overrides)
+            svc = app.services
+            loop = asyncio.new_event_loop()
+
+            async def timed_call(body):
+                t0 = time.perf_counter()
+                status = await _asgi_call(app, "/api/enhance", body)
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] = statuses.get(status, 0) + 1
+
+            async def gather(batch):
+                await asyncio.gather(*(timed_call(body) for body in batch))
+
+            def send_all(batch):
+                loop.run_until_complete(gather(batch))
+        else:
+            from app import create_app
+            app = create_app(**overrides)
+            svc = app.extensions['resume_builder']
+            local = threading.local()
+            pool = ThreadPoolExecutor(max_workers=threads)
+
+            def timed_call(body, submitted):
+                if not hasattr(local, "client"):
+                    local.client = app.test_client()
+                # Closing the response ends the request, as the server does once it is sent
+                with local.client.post("/api/enhance", data=body, content_type="application/json") as response:
+                    status = response.status_code
+                latencies.append(time.perf_counter() - submitted)  # queueing for a thread included
+                statuses[status] = statuses.get(status, 0) + 1
+
+            def send_all(batch):
+                submitted = time.perf_counter()  # all at once, like the async clients
+                list(pool.map(lambda body: timed_call(body, submitted), batch))
+
+        send_all(bodies[:1])  # warm-up: imports, pools, first client
+        latencies.clear()
+        statuses.clear()
+        import gc
+        gc.collect()
+        baseline_rss = current_rss()
+        peaks = {"in_flight": 0, "threads": 0, "rss": baseline_rss}
+        done = threading.Event()
+
+        def sample():
+            while not done.is_set():
+                peaks["in_flight"] = max(peaks["in_flight"], svc.gate.stats()["in_flight"])
+                peaks["threads"] = max(peaks["threads"], threading.active_count())
+                peaks["rss"] = max(peaks["rss"], current_rss())
+                time.sleep(0.005)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        send_all(bodies[1:])
+        wall = time.perf_counter() - started
+        done.set()
+        sampler.join()
+
+    held = peaks["in_flight"]
+    grown = peaks["rss"] - baseline_rss
+    return {
+        "server": kind,
+        "threads": threads if kind == "sync" else 1,
+        "requests": in_flight,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "peak_in_flight": held,
+        "peak_threads": peaks["threads"],
+        "rss_growth_mb": round(grown / 2 ** 20, 1),
+        "kb_per_in_flight": round(grown / 1024 / held, 1) if held else 0.0,
+        **summarize(latencies, wall)
+    }
+
+
+def run_in_flight(in_flight, llm_latency, resumes, seed, threads):
+    """
+    Holds in_flight LLM-bound requests (/api/enhance, llm_latency seconds
+    per model call) against the threaded server with its SERVER_THREADS,
+    with one thread per request, and against the ASGI app's single event
+    loop. Each runs in a fresh process so its memory reading is its own.
+    """
+    runs = (("sync", threads), ("sync", in_flight), ("async", 1))
+    results = {}
+    for kind, run_threads in runs:
+        name = f"{kind}:{run_threads}_thread{'s' if run_threads > 1 else ''}"
+        print(f"⏱️  in-flight: {in_flight} requests, {name} ...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--in-flight-worker", kind, "--in-flight", str(in_flight),
+             "--in-flight-threads", str(run_threads), "--llm-latency", str(llm_latency),
+             "--resumes", str(resumes), "--seed", str(seed)],
+            check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        results[name] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+# --- Reporting ---
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    print(f"{'stage':<20}{'ops':>7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KB':>10}")
+    rows = list(results.get("stages", {}).items())
+    http = results.get("http")
+    if http:
+        rows += [(f"http:{kind}", r) for kind, r in http["endpoints"].items()]
+        rows.append(("http:all", http["overall"]))
+    for name, r in rows:
+        lat = r["latency_ms"]
+        print(f"{name:<20}{r['ops']:>7}{r['ops_per_s']:>10}{lat['p50']:>10}{lat['p95']:>10}{lat['p99']:>10}"
+              f"{r.get('peak_mem_kb', ''):>10}")
+    in_flight = results.get("in_flight")
+    if in_flight:
+        print(f"\n{'in-flight':<20}{'held':>6}{'threads':>9}{'wall s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'RSS MB':>9}{'KB/req':>9}")
+        for name, r in in_flight.items():
+            print(f"{name:<20}{r['peak_in_flight']:>6}{r['peak_threads']:>9}{r['wall_s']:>9}"
+                  f"{r['latency_ms']['p50']:>10}{r['latency_ms']['p95']:>10}{r['rss_growth_mb']:>9}"
+                  f"{r['kb_per_in_flight']:>9}")
+    static = results.get("static")
+    if static:
+        print(f"\n{'static':<22}{'requests':>10}{'bytes':>12}{'worker ms':>12}")
+        for name, r in static.items():
+            print(f"{name:<22}{r['requests_per_visit']:>10}{r['bytes_per_visit']:>12}{r['worker_ms_per_visit']:>12}")
+
+
+def compare(results, baseline, tolerance):
+    """Prints p50/p95 ratios against a baseline run; returns the names that got slower than tolerance"""
+    regressions = []
+    print(f"\nvs baseline {baseline.get('meta', {}).get('git_revision')}:")
+    current = dict(results.get("stages", {}))
+    previous = dict(baseline.get("stages", {}))
+    if results.get("http") and baseline.get("http"):
+        current["http:all"] = results["http"]["overall"]
+        previous["http:all"] = baseline["http"]["overall"]
+    for name, r in current.items():
+        if name not in previous:
+            continue
+        ratios = []
+        for pct in ("p50", "p95"):
+            before = previous[name]["latency_ms"][pct]
+            ratios.append(r["latency_ms"][pct] / before if before else 1.0)
+        slower = max(ratios) > 1 + tolerance
+        if slower:
+            regressions.append(name)
+        print(f"  {'⚠️' if slower else '✅'} {name:<14} p50 x{ratios[0]:.2f}  p95 x{ratios[1]:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume pipeline with a stubbed LLM")
+    parser.add_argument("--resumes", type=int, default=8, help="synthetic resumes in the corpus")
+    parser.add_argument("--iterations", type=int, default=3, help="timed passes over the corpus per stage")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub LLM sleeps per call")
+    parser.add_argument("--http", action="store_true", help="also load the Flask app end to end")
+    parser.add_argument("--http-requests", type=int, default=200)
+    parser.add_argument("--http-concurrency", type=int, default=8)
+    parser.add_argument("--static", action="store_true", help="also compare static frontend serving")
+    parser.add_argument("--static-visits", type=int, default=50)
+    parser.add_argument("--in-flight", type=int, default=0,
+                        help="also hold this many LLM-bound requests at once on the threaded and the ASGI server")
+    parser.add_argument("--in-flight-threads", type=int, default=None,
+                        help="threads of the threaded server in --in-flight (default: SERVER_THREADS)")
+    parser.add_argument("--in-flight-worker", choices=("sync", "async"), help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before --compare fails")
+    args = parser.parse_args(argv)
+
+    if args.in_flight_worker:
+        print(json.dumps(in_flight_worker(args.in_flight_worker, args.in_flight, args.in_flight_threads,
+                                          args.llm_latency, args.resumes, args.seed)))
+        return 0
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    llm_client.set_client(llm_client.LLMClient(llm_client.StubBackend(args.llm_latency)))
+    print(f"📄 Building corpus of {args.resumes} resumes ...", file=sys.stderr)
+    corpus = make_corpus(args.resumes, args.seed)
+
+    results = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "resumes": args.resumes,
+            "iterations": args.iterations,
+            "llm_latency": args.llm_latency,
+            "seed": args.seed,
+            "corpus": {f"{size}/{fmt}": sum(1 for c in corpus if c["size"] == size and c["format"] == fmt)
+                       for size in SIZES for fmt in ("pdf", "docx")}
+        }
+    }
+    work_folder = tempfile.mkdtemp(prefix="resume_bench_")
+    try:
+        results["stages"] = run_stages(corpus, stages, args.iterations, work_folder)
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+    if args.http:
+        results["http"] = run_http(corpus, args.http_requests, args.http_concurrency)
+    if args.static:
+        results["static"] = run_static(args.static_visits)
+    if args.in_flight:
+        from config import load_config
+        threads = args.in_flight_threads or load_config()['SERVER_THREADS']
+        results["in_flight"] = run_in_flight(args.in_flight, args.llm_latency, args.resumes, args.seed, threads)
+    results["llm"] = llm_client.metrics()
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ Slower than baseline: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
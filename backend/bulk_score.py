@@ -0,0 +1,253 @@
+# bulk_score.py
+
+import os
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from keyword_matcher import get_job_index, resume_text, stem, tokenize, BM25_K1, BM25_B, AVG_RESUME_TOKENS
+from ats_score import CATEGORY_WEIGHTS, JD_CATEGORY_WEIGHTS, grade_for
+from resume_model import as_resume
+
+CATEGORIES = ("contact_info", "skills", "experience", "education", "keyword_match")
+BULK_TOKEN_CACHE_SIZE = int(os.getenv("BULK_TOKEN_CACHE_SIZE", 50000))  # resumes whose tokens are kept
+MAX_VOCABULARY = 1_000_000  # distinct tokens before the token cache starts over
+
+
+@lru_cache(maxsize=64)
+def _compile_patterns(job_description):
+    """
+    Turns the keywords of a JobIndex into integer term sequences, one per
+    keyword (resume tokens have their aliases resolved by tokenize() already).
+    Returns (term ids by stem, {length: (sorted codes, keyword ids)}, keyword keys).
+    """
+    index = get_job_index(job_description)
+    keys = list(index.keywords)
+
+    terms = {}
+    sequences = []
+    for k, key in enumerate(keys):
+        ids = [terms.setdefault(stem(t), len(terms)) for t in index.keywords[key][0].split()]
+        sequences.append((ids, k))
+
+    base = max(len(terms), 1)
+    patterns = {}
+    for length in range(1, max(len(ids) for ids, _ in sequences) + 1 if sequences else 1):
+        by_code = {}
+        for ids, k in sequences:
+            if len(ids) == length:
+                by_code.setdefault(_encode(ids, base), k)
+        codes = np.array(sorted(by_code), dtype=np.int64)
+        patterns[length] = (codes, np.array([by_code[c] for c in codes.tolist()], dtype=np.int64))
+    return terms, patterns, keys
+
+
+def _encode(ids, base):
+    code = 0
+    for i in ids:
+        code = code * base + i
+    return code
+
+
+class TokenCache:
+    """
+    LRU of tokenized resume texts, keyed on a hash of the text. Each text is
+    stored as an int32 array of ids into one vocabulary shared by all texts,
+    ending in id 0 as a separator, so ranking the same resumes again (against
+    another job description, or the next page of a search) skips tokenize(),
+    which is most of the cost of a ranking, and maps tokens to keyword terms
+    with a single numpy lookup.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._reset()
+
+    def _reset(self):
+        self._items = OrderedDict()
+        self._vocabulary = {"": 0}  # token -> id; 0 is the separator
+        self._by_stem = {}  # stem -> [token ids]
+
+    def _token_ids(self, text):
+        tokens = tokenize(text)
+        vocabulary = self._vocabulary
+        for token in set(tokens).difference(vocabulary):
+            vocabulary[token] = len(vocabulary)
+            self._by_stem.setdefault(stem(token), []).append(vocabulary[token])
+        ids = np.zeros(len(tokens) + 1, dtype=np.int32)
+        ids[:-1] = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+        return ids
+
+    def encode(self, texts, terms):
+        """
+        (term ids of every text's tokens, concatenated with -1 between texts
+        and for tokens that aren't terms; token count per text). terms maps
+        stems to term ids, as _compile_patterns builds them.
+        """
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        with self._lock:
+            if len(self._vocabulary) > MAX_VOCABULARY:
+                self._reset()
+            arrays = []
+            for key, text in zip(keys, texts):
+                ids = self._items.get(key)
+                if ids is None:
+                    self.misses += 1
+                    ids = self._items[key] = self._token_ids(text)
+                else:
+                    self.hits += 1
+                    self._items.move_to_end(key)
+                arrays.append(ids)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+            lookup = np.full(len(self._vocabulary), -1, dtype=np.int64)
+            for term_stem, term in terms.items():
+                lookup[self._by_stem.get(term_stem, [])] = term
+        lengths = np.fromiter(map(len, arrays), dtype=np.int64, count=len(arrays))
+        flat = lookup[np.concatenate(arrays)] if arrays else np.zeros(0, dtype=np.int64)
+        return flat, lengths - 1
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "vocabulary": len(self._vocabulary),
+                    "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(BULK_TOKEN_CACHE_SIZE)
+
+
+def _term_matrix(resumes, job_description):
+    """
+    N x K keyword counts and token counts. Resume texts are split exactly as
+    JobIndex.score splits them (resume_text, then tokenize), through the
+    token cache; every window of 1-3 term ids is then encoded as one integer
+    and looked up in the sorted keyword codes by numpy.
+    """
+    terms, patterns, keys = _compile_patterns(job_description)
+    ids, n_tokens = token_cache.encode([resume_text(r) for r in resumes], terms)
+    counts = np.zeros((len(resumes), len(keys)))
+    n_tokens = n_tokens.astype(np.float64)
+    if not keys or not resumes:
+        return keys, counts, n_tokens
+
+    doc_of = np.repeat(np.arange(len(resumes)), n_tokens.astype(np.int64) + 1)
+    base = max(len(terms), 1)
+    hits_doc, hits_kw = [], []
+    for length, (codes, kw_ids) in patterns.items():
+        if not len(codes) or len(ids) < length:
+            continue
+        windows = len(ids) - length + 1
+        valid = np.ones(windows, dtype=bool)
+        code = np.zeros(windows, dtype=np.int64)
+        for j in range(length):
+            part = ids[j:j + windows]
+            valid &= part >= 0
+            code = code * base + part
+        positions = np.flatnonzero(valid)
+        window_codes = code[positions]
+        slot = np.searchsorted(codes, window_codes).clip(max=len(codes) - 1)
+        found = codes[slot] == window_codes
+        hits_doc.append(doc_of[positions[found]])
+        hits_kw.append(kw_ids[slot[found]])
+
+    if hits_doc:
+        flat_hits = np.concatenate(hits_doc) * len(keys) + np.concatenate(hits_kw)
+        counts += np.bincount(flat_hits, minlength=counts.size).reshape(counts.shape)
+    return keys, counts, n_tokens
+
+
+def _structure_scores(resumes):
+    """Contact/skills/experience/education scores, same rules as calculate_ats_score"""
+    n = len(resumes)
+    has_contact = np.fromiter((r.personal_info_given for r in resumes), dtype=bool, count=n)
+    n_skills = np.fromiter((len(r.skills) for r in resumes), dtype=np.float64, count=n)
+    n_experience = np.fromiter((len(r.experience) for r in resumes), dtype=np.float64, count=n)
+    n_education = np.fromiter((len(r.education) for r in resumes), dtype=np.float64, count=n)
+    return np.column_stack((
+        np.where(has_contact, 100.0, 40.0),
+        np.minimum(n_skills * 10, 100),
+        np.minimum(n_experience * 20, 100),
+        np.where(n_education > 0, 100.0, 50.0),
+    ))
+
+
+def score_resumes(resumes, job_description=""):
+    """
+    Scores N parsed resumes against one job description. Tokenizing each
+    resume text is Python work, done once per distinct text thanks to the
+    token cache; keyword matching and scoring are numpy over the whole batch.
+    Returns (category_scores N x 5, total_scores N, matched N x K bool,
+    keyword texts K). Plain dicts are normalized to Resume first.
+    """
+    resumes = [as_resume(r) for r in resumes]
+    n = len(resumes)
+    scores = np.zeros((n, len(CATEGORIES)))
+    scores[:, :4] = _structure_scores(resumes)
+
+    keywords = []
+    matched = np.zeros((n, 0), dtype=bool)
+    if job_description and job_description.strip():
+        job_description = job_description.strip()
+        index = get_job_index(job_description)
+        keys, tf, n_tokens = _term_matrix(resumes, job_description)
+        keywords = [index.keywords[k][0] for k in keys]
+        weights = np.array([index.keywords[k][2] for k in keys])
+
+        length_norm = 1 - BM25_B + BM25_B * n_tokens / AVG_RESUME_TOKENS
+        saturated = np.minimum(1.0, tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm[:, None]))
+        # Summed keyword by keyword and rounded with Python's round(), the same
+        # floating point steps as JobIndex.score, so both paths agree to the cent
+        gained = np.zeros(n)
+        for k, weight in enumerate(weights.tolist()):
+            gained += saturated[:, k] * weight
+        scores[:, 4] = _round2(np.minimum(gained / index.total_weight, 1.0) * 100)
+        matched = tf > 0
+        category_weights = JD_CATEGORY_WEIGHTS
+    else:
+        category_weights = CATEGORY_WEIGHTS
+
+    totals = np.zeros(n)
+    for c, category in enumerate(CATEGORIES):
+        if category in category_weights:
+            totals += scores[:, c] * category_weights[category]
+    return scores, _round2(totals), matched, keywords
+
+
+def _round2(values):
+    # np.round scales by 100 and rounds, which can land on the other side of a .005 from round()
+    return np.array([round(v, 2) for v in values.tolist()])
+
+
+def rank_resumes(resumes, job_description="", top_k=None):
+    """
+    Ranks resumes by ATS score against one job description. Each result
+    carries the resume's position in the input list so callers can map back.
+    """
+    scores, totals, matched, keywords = score_resumes(resumes, job_description)
+    # Stable sort: ties keep input order
+    order = np.argsort(-totals, kind="stable")
+    if top_k:
+        order = order[:top_k]
+
+    use_keywords = bool(job_description and job_description.strip())
+    categories = CATEGORIES if use_keywords else CATEGORIES[:4]
+    score_rows = scores[order].tolist()
+    total_rows = totals[order].tolist()
+    results = []
+    for rank, (i, row, total) in enumerate(zip(order.tolist(), score_rows, total_rows), start=1):
+        result = {
+            "rank": rank,
+            "index": i,
+            "total_score": total,
+            "grade": grade_for(total),
+            "category_scores": dict(zip(categories, row))
+        }
+        if use_keywords:
+            result["matched_keywords"] = [keywords[k] for k in np.flatnonzero(matched[i])]
+        results.append(result)
+    return results
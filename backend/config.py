@@ -0,0 +1,68 @@
+# config.py
+
+import os
+
+# Every setting the app reads: name -> (type, default). Values come from the
+# environment (including .env, loaded by llm_client) when create_app runs.
+SETTINGS = {
+    # Storage
+    "UPLOAD_FOLDER": (str, "uploads"),
+    "OUTPUT_FOLDER": (str, "static/generated"),
+    "MAX_CONTENT_LENGTH": (int, 16 * 1024 * 1024),  # bytes per upload
+    "PARSE_CACHE_PATH": (str, "cache/parse_cache.sqlite3"),
+    "PARSE_CACHE_TTL": (int, 7 * 24 * 3600),  # seconds, 0 disables expiry
+    "PARSE_CACHE_MAX_ENTRIES": (int, 5000),
+    "ARTIFACT_CACHE_MAX_BYTES": (int, 512 * 1024 * 1024),  # 0 turns the artifact store off
+    "FRONTEND_FOLDER": (str, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend")),
+    "STATIC_PRECOMPRESS": (bool, True),  # gzip/brotli the frontend once at startup
+    # Batch ingestion and scoring
+    "BATCH_MAX_CONTENT_LENGTH": (int, 512 * 1024 * 1024),
+    "BATCH_EXTRACT_WORKERS": (int, os.cpu_count() or 1),
+    "BATCH_LLM_CONCURRENCY": (int, 4),
+    # Near-duplicate detection over parsed resumes
+    "SIMILARITY_INDEX_PATH": (str, "cache/similarity_index"),  # empty disables the index
+    "SIMILARITY_DUPLICATE_THRESHOLD": (float, 0.8),  # estimated text similarity that counts as a duplicate
+    "SIMILARITY_SAVE_EVERY": (int, 1000),  # additions between saves to disk
+    # Background jobs (?async=true)
+    "JOB_WORKERS": (int, 4),
+    "JOB_DB_PATH": (str, None),  # set to persist queued jobs across restarts
+    "JOB_RETENTION": (int, 3600),  # seconds finished jobs stay retrievable
+    "JOB_QUEUE_MAX": (int, 200),  # queued jobs before new submissions get 503
+    "JOB_LEASE_SECONDS": (float, 60.0),  # a persisted job whose process stops renewing this long is taken over
+    # Backpressure: requests running at once per endpoint group, and how many more may wait
+    "LLM_ENDPOINT_CONCURRENCY": (int, 4),
+    "LLM_ENDPOINT_QUEUE": (int, 8),
+    "CPU_ENDPOINT_CONCURRENCY": (int, os.cpu_count() or 1),
+    "CPU_ENDPOINT_QUEUE": (int, 16),
+    "ADMISSION_MAX_WAIT": (float, 10.0),  # seconds a queued request waits before 503
+    # Server
+    "HOST": (str, "0.0.0.0"),
+    "PORT": (int, 5000),
+    "SERVER_WORKERS": (int, 1),  # processes, under gunicorn; more than one needs JOB_DB_PATH
+    "SERVER_THREADS": (int, 16),  # request threads per process
+    "SHUTDOWN_TIMEOUT": (float, 30.0),  # seconds to drain requests and jobs on SIGTERM
+    "WARM_UP": (bool, False),  # load heavy modules at startup
+    "DEBUG": (bool, False),  # Flask dev server with the reloader; never in production
+    # Async mode (asgi_app.py): LLM-bound requests wait on one event loop instead of holding threads
+    "SERVER_MODE": (str, "wsgi"),  # "asgi" makes serve.py run asgi_app with uvicorn
+    "ASGI_LLM_ENDPOINT_CONCURRENCY": (int, 256),
+    "ASGI_LLM_ENDPOINT_QUEUE": (int, 256),
+    "ASGI_CPU_WORKERS": (int, os.cpu_count() or 1),  # threads for extraction, scoring and rendering
+}
+
+
+def _parse(kind, raw):
+    if kind is bool:
+        return raw.strip().lower() in ("1", "true", "yes")
+    return kind(raw)
+
+
+def load_config(environ=None, **overrides):
+    """Settings from the environment, falling back to the defaults above; overrides win"""
+    environ = os.environ if environ is None else environ
+    config = {}
+    for name, (kind, default) in SETTINGS.items():
+        raw = environ.get(name)
+        config[name] = default if raw is None or raw == "" else _parse(kind, raw)
+    config.update(overrides)
+    return config
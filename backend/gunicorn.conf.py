@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+#
+#   gunicorn -c gunicorn.conf.py 'app:create_app()'
+#
+# Server settings come from the process environment (.env is only read by the
+# app inside each worker), with the same names and defaults as config.py.
+
+from config import load_config
+
+_config = load_config()
+
+bind = f"{_config['HOST']}:{_config['PORT']}"
+workers = _config['SERVER_WORKERS']
+if workers > 1 and not _config['JOB_DB_PATH']:
+    # Each worker would keep its own in-memory jobs, and a poll reaching another worker gets 404
+    raise SystemExit("SERVER_WORKERS > 1 needs JOB_DB_PATH, a job database shared by the workers")
+worker_class = "gthread"
+threads = _config['SERVER_THREADS']
+# LLM calls can take a while; the app sheds excess load itself with 503s
+timeout = 180
+graceful_timeout = _config['SHUTDOWN_TIMEOUT']
+
+
+def worker_exit(server, worker):
+    # gunicorn has stopped routing requests here; let background jobs finish
+    app = getattr(worker, "wsgi", None)
+    services = getattr(app, "extensions", {}).get("resume_builder")
+    if services is not None:
+        services.shutdown()
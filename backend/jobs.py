@@ -0,0 +1,288 @@
+# jobs.py
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from telemetry import log
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Runs slow work (LLM calls, document rendering) on a bounded worker pool so
+    request threads return immediately with a job id.
+
+    Handlers are plain functions registered per job kind and called with the
+    JSON payload given at submit time; their return value becomes the job
+    result. With a db_path, jobs are persisted to SQLite and anything still
+    queued or running when the process stopped is re-run on startup.
+
+    Several processes (gunicorn workers) can share one database. Each job row
+    carries a lease held by the process running it and renewed every
+    lease_seconds / 3; a process only takes over rows whose lease has
+    expired, so jobs a live sibling is still running are never run twice.
+    """
+
+    def __init__(self, max_workers=4, db_path=None, retention_seconds=3600, lease_seconds=60):
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        # Identifies this process's leases in a shared database
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # notified whenever a job finishes
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._conn = None
+        self._resuming = False
+        self._stop_leases = threading.Event()
+
+        if db_path:
+            folder = os.path.dirname(db_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            # Workers sharing the file wait for each other's writes rather than failing
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    owner TEXT,
+                    lease_expires REAL
+                )
+            """)
+            # Databases written before leases existed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_expires", "REAL")):
+                if column not in columns:
+                    try:
+                        self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+                    except sqlite3.OperationalError:
+                        pass  # a sibling worker added it first
+            self._conn.commit()
+            threading.Thread(target=self._keep_leases, name="job-lease", daemon=True).start()
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def resume_pending(self):
+        """
+        Re-queues persisted jobs that never finished and whose lease has
+        expired (call after registering handlers). From then on the lease
+        thread also takes over jobs left behind by a process that died.
+        """
+        if self._conn is None:
+            return 0
+        self._resuming = True
+        return self._claim_expired()
+
+    def _claim_expired(self):
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                return 0
+            # One UPDATE, so two processes can't both take the same row
+            self._conn.execute(
+                "UPDATE jobs SET owner = ?, lease_expires = ? WHERE status IN (?, ?) "
+                "AND (owner IS NULL OR lease_expires IS NULL OR lease_expires < ?)",
+                (self._owner, now + self.lease_seconds, QUEUED, RUNNING, now)
+            )
+            self._conn.commit()
+            rows = [row for row in self._conn.execute(
+                "SELECT id, kind, payload, created FROM jobs WHERE owner = ? AND status IN (?, ?) ORDER BY created",
+                (self._owner, QUEUED, RUNNING)
+            ).fetchall() if row[0] not in self._jobs]
+            for job_id, kind, payload, created in rows:
+                job = self._new_job(job_id, kind, json.loads(payload), created)
+                self._jobs[job_id] = job
+                self._save(job)
+        for job_id, *_ in rows:
+            self._pool.submit(self._run, job_id)
+        if rows:
+            log.info("Resumed unfinished jobs", extra={"fields": {"jobs": len(rows)}})
+        return len(rows)
+
+    def _keep_leases(self):
+        """Renews this process's leases, and takes over expired ones once resume_pending has run"""
+        while not self._stop_leases.wait(self.lease_seconds / 3):
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status IN (?, ?)",
+                        (time.time() + self.lease_seconds, self._owner, QUEUED, RUNNING)
+                    )
+                    self._conn.commit()
+                if self._resuming:
+                    self._claim_expired()
+            except Exception as e:
+                log.warning(f"Job lease renewal failed: {e}")
+
+    def _new_job(self, job_id, kind, payload, created):
+        return {
+            "id": job_id,
+            "kind": kind,
+            "payload": payload,
+            "status": QUEUED,
+            "result": None,
+            "error": None,
+            "created": created,
+            "started": None,
+            "finished": None
+        }
+
+    def submit(self, kind, payload):
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self._new_job(uuid.uuid4().hex, kind, payload, time.time())
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job queue is shut down")
+            self._prune()
+            self._jobs[job["id"]] = job
+            self._save(job)
+        self._pool.submit(self._run, job["id"])
+        return job["id"]
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs[job_id]
+            if self._closed and self._conn is not None:
+                return  # shutting down: left queued for whoever takes it over
+            job["status"] = RUNNING
+            job["started"] = time.time()
+            self._save(job)
+        try:
+            result = self._handlers[job["kind"]](job["payload"])
+            status, error = SUCCEEDED, None
+        except Exception as e:
+            log.error(f"Job {job_id} ({job['kind']}) failed: {e}", exc_info=e,
+                      extra={"fields": {"job_id": job_id, "kind": job["kind"]}})
+            result, status, error = None, FAILED, str(e)
+        with self._lock:
+            job["result"] = result
+            job["status"] = status
+            job["error"] = error
+            job["finished"] = time.time()
+            self._save(job)
+            self._changed.notify_all()
+
+    def _save(self, job):
+        if self._conn is None:
+            return
+        # A row another process has taken over (our lease lapsed) is left to it
+        self._conn.execute(
+            "INSERT INTO jobs (id, kind, payload, status, result, error, created, started, finished, owner, "
+            "lease_expires) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, result = excluded.result, "
+            "error = excluded.error, started = excluded.started, finished = excluded.finished, "
+            "lease_expires = excluded.lease_expires WHERE jobs.owner = excluded.owner",
+            (job["id"], job["kind"], json.dumps(job["payload"]), job["status"],
+             json.dumps(job["result"]) if job["result"] is not None else None,
+             job["error"], job["created"], job["started"], job["finished"],
+             self._owner, time.time() + self.lease_seconds)
+        )
+        self._conn.commit()
+
+    def _load(self, job_id):
+        row = self._conn.execute(
+            "SELECT id, kind, status, result, error, created, started, finished FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "kind": row[1], "payload": None, "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None, "error": row[4],
+            "created": row[5], "started": row[6], "finished": row[7]
+        }
+
+    def _prune(self):
+        """Drops finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished"] and job["finished"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (cutoff,))
+
+    def get(self, job_id):
+        """Returns the public view of a job (status, timing, result) or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None and self._conn is not None:
+                job = self._load(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+
+        now = time.time()
+        started = job["started"] or (None if job["status"] == QUEUED else now)
+        finished = job["finished"] or now
+        return {
+            "id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "created_at": job["created"],
+            "started_at": job["started"],
+            "finished_at": job["finished"],
+            "queue_ms": round(((started or now) - job["created"]) * 1000, 1),
+            "run_ms": round((finished - started) * 1000, 1) if started else None,
+            "result": job["result"],
+            "error": job["error"]
+        }
+
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return counts
+
+    def pending(self):
+        """Jobs waiting for a worker, the depth the app sheds new submissions at"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["status"] == QUEUED)
+
+    def shutdown(self, wait=True, timeout=None):
+        """
+        Stops taking jobs and, with wait, blocks up to timeout seconds until
+        the ones in flight have finished. Returns False if some were still
+        running. Persisted jobs that haven't started are left queued, with
+        their lease given up, for a sibling process or resume_pending on the
+        next start; without a database they are run first, since they would
+        otherwise be lost.
+        """
+        persisted = self._conn is not None
+        self._stop_leases.set()
+        with self._lock:
+            self._closed = True
+            if persisted:
+                self._conn.execute("UPDATE jobs SET owner = NULL, lease_expires = NULL WHERE owner = ? AND status = ?",
+                                   (self._owner, QUEUED))
+                self._conn.commit()
+        self._pool.shutdown(wait=False, cancel_futures=persisted)
+        if not wait:
+            return True
+        busy = (RUNNING,) if persisted else (QUEUED, RUNNING)
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: not any(job["status"] in busy for job in self._jobs.values()), timeout)
@@ -0,0 +1,219 @@
+# keyword_matcher.py
+
+import re
+import math
+import hashlib
+from collections import Counter
+from functools import lru_cache
+from resume_model import Record
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*[+#]*")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could do does
+each etc for from had has have having he her his how i if in into is it its just may more most
+must no not of on or other our out over own per she should so some such than that the their them
+then there these they this those through to too under up us very was we were what when where
+which while who will with within without would you your
+""".split())
+
+# Common in every posting, so they say nothing about fit
+GENERIC_WORDS = frozenset("""
+ability able candidate company day environment excellent experience familiarity good great help ideal
+including job join knowledge looking new opportunity plus position preferred related required
+requirement requirements responsibilities responsible role skill skills strong team teams work
+working year years understanding using use well based across like make build
+""".split())
+
+# Alias -> canonical spelling. Applied to token sequences before n-grams are built.
+SKILL_ALIASES = {
+    "js": "javascript", "ts": "typescript", "py": "python", "golang": "go",
+    "k8s": "kubernetes", "postgres": "postgresql", "psql": "postgresql", "mongo": "mongodb",
+    "ml": "machine learning", "dl": "deep learning", "ai": "artificial intelligence",
+    "nlp": "natural language processing", "cv": "computer vision",
+    "gcp": "google cloud", "amazon web services": "aws", "azure cloud": "azure",
+    "node": "node.js", "nodejs": "node.js", "react.js": "react", "reactjs": "react",
+    "vue.js": "vue", "vuejs": "vue", "ci cd": "cicd", "ci/cd": "cicd",
+    "rest": "rest api", "restful": "rest api", "apis": "api", "oop": "object oriented",
+    "tf": "tensorflow", "sklearn": "scikit-learn", "scikit learn": "scikit-learn",
+    "c sharp": "c#", "dotnet": ".net", "hr": "human resources", "pm": "project management",
+}
+
+# Terms that are hard skills, weighted higher and reported in their own category
+SKILL_TERMS = frozenset("""
+python java javascript typescript go rust c c++ c# .net ruby php scala kotlin swift r sql nosql
+html css react angular vue node.js django flask fastapi spring rails express graphql api
+microservices docker kubernetes terraform ansible jenkins cicd git linux bash aws azure
+gcp lambda s3 ec2 postgresql mysql mongodb redis kafka spark hadoop airflow snowflake
+tableau excel pandas numpy tensorflow pytorch scikit-learn statistics agile scrum jira figma
+salesforce sap seo
+""".split()) | frozenset([
+    "rest api", "google cloud", "machine learning", "deep learning", "artificial intelligence",
+    "natural language processing", "computer vision", "data analysis", "object oriented",
+    "project management", "human resources",
+])
+# Index n-grams are token sequences, so 'scikit-learn' is matched as 'scikit learn'. '.net' would
+# become plain 'net' ('net revenue'), so it is left out rather than matched loosely.
+SKILL_TERMS = frozenset(" ".join(TOKEN_RE.findall(term)) for term in SKILL_TERMS if term != ".net")
+
+_ALIAS_SEQUENCES = {}
+for _alias, _canonical in SKILL_ALIASES.items():
+    _ALIAS_SEQUENCES[tuple(TOKEN_RE.findall(_alias))] = TOKEN_RE.findall(_canonical)
+_MAX_ALIAS_LEN = max(len(seq) for seq in _ALIAS_SEQUENCES)
+_ALIAS_STARTS = frozenset(seq[0] for seq in _ALIAS_SEQUENCES)
+
+MAX_NGRAM = 3
+MAX_KEYWORDS = 40
+# BM25 term-frequency saturation and length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.5
+AVG_RESUME_TOKENS = 400
+
+
+def stem(token):
+    """Light suffix stripping so 'developing'/'developed'/'develops' meet"""
+    if len(token) <= 4 or not token.isalpha():
+        return token
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if token.endswith(suffix) and not token.endswith("ss") and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def tokenize(text):
+    """Lowercase tokens with skill aliases resolved to their canonical spelling"""
+    raw = TOKEN_RE.findall(text.lower().replace("/", " "))
+    # Only tokens that can start an alias need a look; the runs between them are copied whole
+    starts = [i for i, token in enumerate(raw) if token in _ALIAS_STARTS]
+    if not starts:
+        return raw
+    tokens = []
+    i = 0
+    for start in starts:
+        if start < i:
+            continue  # inside an alias already replaced
+        tokens.extend(raw[i:start])
+        for size in range(min(_MAX_ALIAS_LEN, len(raw) - start), 0, -1):
+            canonical = _ALIAS_SEQUENCES.get(tuple(raw[start:start + size]))
+            if canonical:
+                tokens.extend(canonical)
+                i = start + size
+                break
+        else:
+            tokens.append(raw[start])
+            i = start + 1
+    tokens.extend(raw[i:])
+    return tokens
+
+
+def ngrams(tokens, max_n=MAX_NGRAM):
+    """Stemmed n-gram keys; n-grams never start or end on a stopword"""
+    stems = [stem(t) for t in tokens]
+    for n in range(1, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            window = tokens[i:i + n]
+            if window[0] in STOPWORDS or window[-1] in STOPWORDS:
+                continue
+            yield " ".join(stems[i:i + n]), " ".join(window)
+
+
+class JobIndex:
+    """
+    Compiled keyword index for one job description. Building it does all the
+    text work once; scoring a resume is then a lookup per resume n-gram.
+    """
+
+    __slots__ = ("keywords", "total_weight", "fingerprint")
+
+    def __init__(self, job_description):
+        self.fingerprint = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+        counts = Counter()
+        surface = {}
+        for key, text in ngrams(tokenize(job_description)):
+            counts[key] += 1
+            surface.setdefault(key, text)
+
+        candidates = []
+        for key, tf in counts.items():
+            text = surface[key]
+            words = text.split()
+            is_skill = text in SKILL_TERMS
+            if not is_skill:
+                if any(w in STOPWORDS or w in GENERIC_WORDS for w in words) or len(text) < 2:
+                    continue
+                # Free-text phrases only count when the posting repeats them
+                if len(words) > 1 and tf < 2:
+                    continue
+                if not any(c.isalpha() for c in text):
+                    continue
+            weight = (1.0 + math.log(tf)) * (2.0 if is_skill else 1.0) * (1.0 + 0.5 * (len(words) - 1))
+            candidates.append((weight, key, text, "skills" if is_skill else "keywords"))
+
+        # Words of a repeated phrase ('distributed systems') don't also count on their own
+        phrase_words = {w for _, key, text, category in candidates if " " in key for w in key.split()}
+        candidates = [c for c in candidates if " " in c[1] or c[3] == "skills" or c[1] not in phrase_words]
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        # key -> (display text, category, weight)
+        self.keywords = {key: (text, category, weight) for weight, key, text, category in candidates[:MAX_KEYWORDS]}
+        self.total_weight = sum(weight for _, _, weight in self.keywords.values()) or 1.0
+
+    def score(self, resume_text):
+        """
+        BM25-style match of resume text against the index. Returns a 0-100
+        score plus matched/missing keywords per category.
+        """
+        tokens = tokenize(resume_text)
+        counts = Counter(key for key, _ in ngrams(tokens) if key in self.keywords)
+        length_norm = 1 - BM25_B + BM25_B * len(tokens) / AVG_RESUME_TOKENS
+
+        gained = 0.0
+        matched = {"skills": [], "keywords": []}
+        missing = {"skills": [], "keywords": []}
+        for key, (text, category, weight) in self.keywords.items():
+            tf = counts.get(key, 0)
+            if tf:
+                # Capped at weight: a keyword repeated ten times isn't worth ten matches,
+                # but repetition makes up for the length penalty of long resumes
+                gained += weight * min(1.0, tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm))
+                matched[category].append(text)
+            else:
+                missing[category].append(text)
+
+        return {
+            "score": round(min(gained / self.total_weight, 1.0) * 100, 2),
+            "matched": matched,
+            "missing": missing
+        }
+
+
+@lru_cache(maxsize=256)
+def get_job_index(job_description):
+    """Cached JobIndex, so ranking many resumes against one posting builds it once"""
+    return JobIndex(job_description)
+
+
+def _as_text(value):
+    if isinstance(value, str):  # checked first: most values are
+        return value
+    if isinstance(value, Record):
+        # Record fields are strings or lists of strings
+        return " ".join(v if isinstance(v, str) else " ".join(v)
+                        for v in map(value.__getattribute__, value.__slots__) if v)
+    if isinstance(value, dict):
+        return " ".join(map(_as_text, value.values()))
+    if isinstance(value, (list, tuple)):
+        return " ".join(map(_as_text, value))
+    return str(value) if value else ""
+
+
+def resume_text(resume):
+    """Flattens the searchable parts of a Resume into one string"""
+    parts = [getattr(resume, section) for section in
+             ("summary", "skills", "experience", "projects", "certifications", "education")]
+    return "\n".join(_as_text(p) for p in parts if p)
+
+
+def match_resume(resume, job_description):
+    if not job_description or not job_description.strip():
+        return None
+    return get_job_index(job_description.strip()).score(resume_text(resume))
@@ -0,0 +1,75 @@
+# lazy_imports.py
+
+import time
+import importlib
+import threading
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_process_started = time.perf_counter()
+_startup = {}
+_lazy_modules = []
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so
+    PDF, DOCX, reportlab and numpy are only loaded by the worker that needs
+    them, not before the server can answer /health.
+    """
+
+    def __init__(self, name):
+        self.__dict__.update(_name=name, _module=None, _import_ms=None, _lock=threading.Lock())
+        _lazy_modules.append(self)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    self.__dict__["_module"] = importlib.import_module(self._name)
+                    self.__dict__["_import_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'loaded' if self._module else 'not loaded'})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def warm_up(*modules):
+    """Imports lazy modules now, e.g. in a worker right after it is forked"""
+    for module in modules or _lazy_modules:
+        module._load()
+
+
+def record_startup(name, started):
+    """Notes how long an entry point took to import (call at the end of the module)"""
+    _startup[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def report():
+    return {
+        "startup_ms": dict(_startup),
+        "uptime_s": round(time.perf_counter() - _process_started, 1),
+        "max_rss_mb": max_rss_mb(),
+        "lazy_modules": {m._name: {"loaded": m._module is not None, "import_ms": m._import_ms}
+                         for m in _lazy_modules}
+    }
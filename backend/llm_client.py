@@ -0,0 +1,379 @@
+# llm_client.py
+
+import os
+import json
+import time
+import random
+import asyncio
+import weakref
+import threading
+from collections import deque
+from dotenv import load_dotenv
+from telemetry import log, span
+
+load_dotenv()
+
+# --- Configuration ---
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini" or "stub" (offline, deterministic)
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash-latest")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))  # seconds per attempt
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 0.5))  # seconds, doubled per retry
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", 0))  # 0 = unlimited
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", 0))  # seconds the stub sleeps per call
+
+
+class LLMError(Exception):
+    """Raised when a call still fails after all retries"""
+
+
+class TokenBucket:
+    """Allows `rate_per_minute` calls per minute with bursts up to `capacity`"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate * 10)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token and returns 0, or returns the seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class GeminiBackend:
+    """One long-lived GenerativeModel shared by every call"""
+
+    name = "gemini"
+
+    def __init__(self, model_name):
+        import google.generativeai as genai
+        from google.api_core import exceptions as api_exceptions
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        self.model = genai.GenerativeModel(model_name)
+        self.retryable = (
+            api_exceptions.ResourceExhausted,
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.DeadlineExceeded,
+            api_exceptions.InternalServerError,
+            TimeoutError,
+            ConnectionError,
+        )
+
+    def generate(self, prompt, timeout):
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        return self._result(response)
+
+    async def generate_async(self, prompt, timeout):
+        response = await self.model.generate_content_async(prompt, request_options={"timeout": timeout})
+        return self._result(response)
+
+    @staticmethod
+    def _result(response):
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        return response.text, prompt_tokens, output_tokens
+
+    def stream(self, prompt, timeout):
+        """Yields text chunks as they arrive; the last item is (prompt_tokens, output_tokens)"""
+        response = self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        usage = None
+        for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.text:
+                yield chunk.text
+        yield (getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0)
+
+
+class StubBackend:
+    """
+    Offline backend for tests and load tests. Echoes the first JSON value
+    found in the prompt: for the parse prompt that is the schema template,
+    for the enhance prompt the input resume, so callers always receive valid
+    JSON of the expected shape.
+    """
+
+    name = "stub"
+    retryable = ()
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._decoder = json.JSONDecoder()
+
+    def generate(self, prompt, timeout):
+        if self.latency:
+            time.sleep(self.latency)
+        text = self._respond(prompt)
+        return text, estimate_tokens(prompt), estimate_tokens(text)
+
+    async def generate_async(self, prompt, timeout):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        text = self._respond(prompt)
+        return text, estimate_tokens(prompt), estimate_tokens(text)
+
+    def _respond(self, prompt):
+        text = "{}"
+        for i, ch in enumerate(prompt):
+            if ch in "{[":
+                try:
+                    value, _ = self._decoder.raw_decode(prompt, i)
+                except json.JSONDecodeError:
+                    continue
+                text = json.dumps(value)
+                break
+        return text
+
+    def stream(self, prompt, timeout):
+        text = self._respond(prompt)
+        # Spread the latency over small chunks like a real streaming response
+        chunks = [text[i:i + 40] for i in range(0, len(text), 40)] or [""]
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+        yield (estimate_tokens(prompt), estimate_tokens(text))
+
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) when the backend doesn't report one"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class LLMClient:
+    """
+    Shared entry point for every model call: bounded concurrency, optional
+    rate limiting, per-attempt timeouts and jittered exponential backoff on
+    transient errors, with latency and token metrics. generate_async() does
+    the same for coroutines, with its own max_concurrency per event loop.
+    """
+
+    def __init__(self, backend, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+                 max_concurrency=LLM_MAX_CONCURRENCY, rate_per_minute=LLM_RATE_PER_MINUTE):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        # asyncio primitives belong to the loop that first waits on them, so one per loop
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._bucket = TokenBucket(rate_per_minute) if rate_per_minute else None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._metrics = {"calls": 0, "errors": 0, "retries": 0, "in_flight": 0,
+                         "prompt_tokens": 0, "output_tokens": 0}
+
+    def generate(self, prompt):
+        """Returns the model's text for prompt, raising LLMError when all attempts fail"""
+        with span("llm_call"):
+            return self._generate(prompt)
+
+    def _generate(self, prompt):
+        attempt = 0
+        while True:
+            if self._bucket:
+                self._bucket.acquire()
+            try:
+                with self._semaphore:
+                    self._count("in_flight", 1)
+                    started = time.perf_counter()
+                    try:
+                        text, prompt_tokens, output_tokens = self.backend.generate(prompt, self.timeout)
+                    finally:
+                        self._count("in_flight", -1)
+                self._record(time.perf_counter() - started, prompt_tokens, output_tokens)
+                return text
+            except self.backend.retryable as e:
+                if attempt >= self.max_retries:
+                    self._count("errors", 1)
+                    raise LLMError(f"LLM call failed after {attempt + 1} attempts: {e}") from e
+                delay = LLM_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+                log.warning(f"LLM call failed ({e}), retrying in {delay:.1f}s",
+                            extra={"fields": {"attempt": attempt + 1, "retry_in_s": round(delay, 2)}})
+                self._count("retries", 1)
+                attempt += 1
+                time.sleep(delay)
+            except Exception:
+                self._count("errors", 1)
+                raise
+
+    async def generate_async(self, prompt):
+        """generate() for coroutines: waiting for a slot, backing off and the call itself hold no thread"""
+        with span("llm_call"):
+            return await self._generate_async(prompt)
+
+    def _loop_semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _generate_async(self, prompt):
+        semaphore = self._loop_semaphore()
+        attempt = 0
+        while True:
+            if self._bucket:
+                await self._bucket.acquire_async()
+            try:
+                async with semaphore:
+                    self._count("in_flight", 1)
+                    started = time.perf_counter()
+                    try:
+                        text, prompt_tokens, output_tokens = await self.backend.generate_async(prompt, self.timeout)
+                    finally:
+                        self._count("in_flight", -1)
+                self._record(time.perf_counter() - started, prompt_tokens, output_tokens)
+                return text
+            except self.backend.retryable as e:
+                if attempt >= self.max_retries:
+                    self._count("errors", 1)
+                    raise LLMError(f"LLM call failed after {attempt + 1} attempts: {e}") from e
+                delay = LLM_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+                log.warning(f"LLM call failed ({e}), retrying in {delay:.1f}s",
+                            extra={"fields": {"attempt": attempt + 1, "retry_in_s": round(delay, 2)}})
+                self._count("retries", 1)
+                attempt += 1
+                await asyncio.sleep(delay)
+            except Exception:
+                self._count("errors", 1)
+                raise
+
+    def generate_stream(self, prompt):
+        """
+        Yields the model's text in chunks as it is generated. Transient errors
+        are retried like generate() as long as nothing has been yielded yet.
+        """
+        with span("llm_call"):
+            yield from self._generate_stream(prompt)
+
+    def _generate_stream(self, prompt):
+        attempt = 0
+        while True:
+            if self._bucket:
+                self._bucket.acquire()
+            yielded = False
+            try:
+                with self._semaphore:
+                    self._count("in_flight", 1)
+                    started = time.perf_counter()
+                    try:
+                        for chunk in self.backend.stream(prompt, self.timeout):
+                            if isinstance(chunk, tuple):
+                                prompt_tokens, output_tokens = chunk
+                                continue
+                            yielded = True
+                            yield chunk
+                    finally:
+                        self._count("in_flight", -1)
+                self._record(time.perf_counter() - started, prompt_tokens, output_tokens)
+                return
+            except self.backend.retryable as e:
+                if yielded or attempt >= self.max_retries:
+                    self._count("errors", 1)
+                    raise LLMError(f"LLM stream failed after {attempt + 1} attempts: {e}") from e
+                delay = LLM_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+                log.warning(f"LLM stream failed ({e}), retrying in {delay:.1f}s",
+                            extra={"fields": {"attempt": attempt + 1, "retry_in_s": round(delay, 2)}})
+                self._count("retries", 1)
+                attempt += 1
+                time.sleep(delay)
+            except Exception:
+                self._count("errors", 1)
+                raise
+
+    def _count(self, key, amount):
+        with self._lock:
+            self._metrics[key] += amount
+
+    def _record(self, seconds, prompt_tokens, output_tokens):
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["prompt_tokens"] += prompt_tokens
+            self._metrics["output_tokens"] += output_tokens
+            self._latencies.append(seconds)
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            latencies = sorted(self._latencies)
+        metrics["backend"] = self.backend.name
+        if latencies:
+            metrics["latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2] * 1000, 1),
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1)
+            }
+        return metrics
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client, created on first use from the LLM_* settings"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if LLM_BACKEND == "stub":
+                    backend = StubBackend(LLM_STUB_LATENCY)
+                else:
+                    backend = GeminiBackend(LLM_MODEL)
+                _client = LLMClient(backend)
+    return _client
+
+
+def set_client(client):
+    """Swaps the process-wide client, e.g. for a stub in tests and benchmarks"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def generate(prompt):
+    return get_client().generate(prompt)
+
+
+async def generate_async(prompt):
+    return await get_client().generate_async(prompt)
+
+
+def generate_stream(prompt):
+    return get_client().generate_stream(prompt)
+
+
+def metrics():
+    """Client metrics, without creating the client (and importing its backend) just to report"""
+    if _client is None:
+        return {"backend": LLM_BACKEND, "calls": 0}
+    return _client.metrics()
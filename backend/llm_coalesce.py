@@ -0,0 +1,215 @@
+# llm_coalesce.py
+
+import os
+import copy
+import asyncio
+import threading
+
+SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+
+_registry = {}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Merges identical concurrent work: while a call for a key is running,
+    further do() calls with the same key wait for it and get its result
+    (or its exception) instead of starting their own. Nothing is kept
+    once the call finishes; repeats later on are the caches' job.
+    """
+
+    def __init__(self, name, share=copy.deepcopy):
+        self.name = name
+        self.share = share  # gives each caller its own copy of a shared result
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._merged = 0
+        _registry[name] = self
+
+    def do(self, key, fn):
+        """(fn's result, shared), shared being True when another caller's call was joined"""
+        if not SINGLE_FLIGHT:
+            return fn(), False
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                call.followers += 1
+                self._merged += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self.share(call.result), True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # Followers copy the result after this point, so the leader must not hand out the original either
+        return (self.share(call.result) if call.followers else call.result), False
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self._leaders, "merged": self._merged, "in_flight": len(self._calls)}
+
+
+class _AsyncCall:
+    __slots__ = ("task", "followers", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.followers = 0
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop: followers await the
+    leader's task instead of blocking a thread. A caller that is cancelled
+    (its client went away) stops waiting, but the call keeps running for
+    the others who joined it; once the last of them is cancelled the call
+    itself is cancelled, so an abandoned request makes no more model calls.
+    """
+
+    def __init__(self, name, share=copy.deepcopy):
+        self.name = name
+        self.share = share
+        self._calls = {}
+        self._leaders = 0
+        self._merged = 0
+        self._cancelled = 0
+        _registry[name] = self
+
+    async def do(self, key, fn):
+        """(await fn()'s result, shared), shared being True when another caller's call was joined"""
+        if not SINGLE_FLIGHT:
+            return await fn(), False
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            self._leaders += 1
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            call.followers += 1
+            self._merged += 1
+
+        call.waiters += 1
+        try:
+            # Shielded, so one caller's cancellation doesn't cancel the call for the others
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # Forgotten first, so a caller arriving now starts a fresh call rather than joining this one
+                self._forget(key, call)
+                call.task.cancel()
+                self._cancelled += 1
+            raise
+        call.waiters -= 1
+        if not leader:
+            return self.share(result), True
+        return (self.share(result) if call.followers else result), False
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        return {"calls": self._leaders, "merged": self._merged, "cancelled": self._cancelled,
+                "in_flight": len(self._calls)}
+
+
+class _Batch:
+    __slots__ = ("items", "done", "results", "error")
+
+    def __init__(self):
+        self.items = []
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Groups items submitted from different threads within `window` seconds
+    into one run_batch(items) call, which returns one result per item.
+    The first submitter of a batch waits out the window (or until
+    max_size items have joined) and makes the call on everyone's behalf,
+    so no background thread is needed.
+    """
+
+    def __init__(self, name, run_batch, window, max_size):
+        self.name = name
+        self.run_batch = run_batch
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._open = None
+        self._cond = threading.Condition()
+        self._batches = 0
+        self._items = 0
+        _registry[name] = self
+
+    def submit(self, item):
+        """run_batch's result for item, once its batch has run"""
+        with self._cond:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_size:
+                self._open = None  # full: the next submitter starts a new batch
+                self._cond.notify_all()
+
+        if not leader:
+            batch.done.wait()
+        else:
+            with self._cond:
+                self._cond.wait_for(lambda: len(batch.items) >= self.max_size, self.window)
+                if self._open is batch:
+                    self._open = None
+                self._batches += 1
+                self._items += len(batch.items)
+            try:
+                batch.results = self.run_batch(list(batch.items))
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    def stats(self):
+        with self._cond:
+            return {"batches": self._batches, "items": self._items,
+                    "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0}
+
+
+def stats():
+    """Counters of every SingleFlight and MicroBatcher created so far, by name"""
+    return {name: coalescer.stats() for name, coalescer in list(_registry.items())}
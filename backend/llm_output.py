@@ -0,0 +1,260 @@
+# llm_output.py
+
+import json
+
+MAX_REPAIR_ATTEMPTS = 64  # truncation points tried before giving up on a response
+
+
+class LLMOutputError(ValueError):
+    """Raised when no usable JSON can be recovered from a model response"""
+
+
+# The shape the parser asks for. str is a string field, [x] a list of x, {..} an object.
+RESUME_SCHEMA = {
+    "personal_info": {"name": str, "email": str, "phone": str, "location": str, "linkedin": str, "github": str},
+    "summary": str,
+    "skills": [str],
+    "experience": [{"title": str, "company": str, "duration": str, "description": [str]}],
+    "education": [{"degree": str, "institution": str, "year": str, "gpa": str}],
+    "projects": [{"title": str, "description": [str]}],
+    "certifications": [{"name": str, "issuer": str, "date": str}],
+}
+
+
+def locate_json(text, open_chars="{["):
+    """
+    (start, end) of the first JSON value opening with one of open_chars,
+    skipping Markdown fences and any prose around it. end is None when the
+    value is never closed (a truncated response).
+    """
+    start = -1
+    for i, ch in enumerate(text):
+        if ch in open_chars:
+            start = i
+            break
+    if start < 0:
+        raise LLMOutputError("No JSON found in response")
+
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+    return start, None
+
+
+def repair_json(fragment):
+    """
+    Fixes the faults models commonly produce: trailing commas, stray closing
+    brackets, and output cut off mid-value. A truncated value is closed where
+    that gives valid JSON, otherwise the dangling element is dropped back to
+    the last complete one. Returns the decoded value.
+    """
+    out = []
+    closers = []
+    cut_points = []  # (length of out to keep, closers open at that point): after each '[' / '{', before each ','
+    in_string = escape = False
+    for ch in fragment:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+            cut_points.append((len(out) + 1, tuple(closers)))
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if not closers or closers[-1] != ch:
+                continue  # stray bracket
+            closers.pop()
+        elif ch == ",":
+            cut_points.append((len(out), tuple(closers)))
+        out.append(ch)
+
+    # Close everything still open, as written
+    tail = list(out)
+    if in_string:
+        tail.append('"')
+    _drop_trailing_comma(tail)
+    candidates = ["".join(tail) + "".join(reversed(closers))]
+    # Otherwise cut back to the last complete element of the innermost open container
+    for length, open_closers in reversed(cut_points[-MAX_REPAIR_ATTEMPTS:]):
+        candidates.append("".join(out[:length]) + "".join(reversed(open_closers)))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    raise LLMOutputError("Response JSON could not be repaired")
+
+
+def _drop_trailing_comma(out):
+    i = len(out) - 1
+    while i >= 0 and out[i] in " \t\r\n":
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def loads(text, open_chars="{["):
+    """
+    Decodes the JSON value in a model response. Returns (value, fault):
+    fault is None for clean JSON, "repaired" when it needed fixing and
+    "truncated" when the response was cut off before the value closed.
+    """
+    start, end = locate_json(text, open_chars)
+    if end is None:
+        return repair_json(text[start:]), "truncated"
+    candidate = text[start:end]
+    try:
+        return json.loads(candidate), None
+    except json.JSONDecodeError:
+        return repair_json(candidate), "repaired"
+
+
+def iter_json_array(chunks):
+    """
+    Incrementally decodes a top-level JSON array from streamed text chunks,
+    yielding each element as soon as it is complete. Markdown fences and
+    text before the opening bracket are skipped.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = None
+    for chunk in chunks:
+        buffer += chunk
+        if pos is None:
+            start = buffer.find("[")
+            if start < 0:
+                continue
+            pos = start + 1
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer) or buffer[pos] == "]":
+                break
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element still incomplete, wait for more text
+            # A number at the end of the buffer may still be growing
+            if end >= len(buffer):
+                break
+            pos = end
+            yield value
+    if pos is None:
+        raise json.JSONDecodeError("No JSON array in response", buffer, 0)
+    if buffer.find("]", pos) < 0:
+        raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+
+
+# --- Schema validation ---
+def schema_example(schema):
+    """The schema as the placeholder JSON the prompts show the model"""
+    if schema is str:
+        return "string"
+    if isinstance(schema, list):
+        return [schema_example(schema[0])]
+    return {key: schema_example(value) for key, value in schema.items()}
+
+
+def empty_value(schema):
+    if schema is str:
+        return ""
+    if isinstance(schema, list):
+        return []
+    return {key: empty_value(value) for key, value in schema.items()}
+
+
+def coerce(value, schema):
+    """
+    value made to fit schema where the intent is clear (None -> empty, a
+    number -> string, a single item -> list, "a, b" -> ["a", "b"] for string
+    lists). Raises ValueError when it can't be.
+    """
+    if schema is str:
+        if value is None:
+            return ""
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return str(value).strip()
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return " ".join(v.strip() for v in value)
+        if isinstance(value, dict) and isinstance(value.get("name"), str):
+            return value["name"].strip()  # {"name": "Python", "level": ...} in a list of skills
+        raise ValueError(f"expected a string, got {type(value).__name__}")
+
+    if isinstance(schema, list):
+        item_schema = schema[0]
+        if value is None:
+            return []
+        if isinstance(value, str) and item_schema is str:
+            separator = "\n" if "\n" in value else ","
+            return [part.strip() for part in value.split(separator) if part.strip()]
+        if not isinstance(value, list):
+            value = [value]
+        items = []
+        for item in value:
+            try:
+                items.append(coerce(item, item_schema))
+            except ValueError:
+                continue  # one malformed entry doesn't sink the section
+        if value and not items:
+            raise ValueError("no entry matched the schema")
+        return items
+
+    if not isinstance(value, dict):
+        raise ValueError(f"expected an object, got {type(value).__name__}")
+    result = dict(value)
+    for key, field_schema in schema.items():
+        result[key] = coerce(value.get(key), field_schema)
+    return result
+
+
+def validate_resume(data, truncated=False):
+    """
+    Returns (resume, failed) where resume has every section in the schema's
+    shape and failed lists the sections that were missing or unusable
+    (those are left empty), so only they need to be asked for again. With
+    truncated=True the last section in data, where the response was cut
+    off, counts as failed too.
+    """
+    if not isinstance(data, dict):
+        return empty_value(RESUME_SCHEMA), list(RESUME_SCHEMA)
+    if truncated and data:
+        data = dict(data)
+        data.pop(list(data)[-1])
+    resume = {}
+    failed = []
+    for section, schema in RESUME_SCHEMA.items():
+        if section not in data:
+            failed.append(section)
+            resume[section] = empty_value(schema)
+            continue
+        try:
+            resume[section] = coerce(data[section], schema)
+        except ValueError:
+            failed.append(section)
+            resume[section] = empty_value(schema)
+    return resume, failed
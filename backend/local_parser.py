@@ -0,0 +1,267 @@
+# local_parser.py
+
+import re
+
+# --- Compiled patterns ---
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?<![\w/])(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)|\d{2,4})[\s.-]?\d{3,4}[\s.-]?\d{3,4}(?![\w/])")
+LINKEDIN_RE = re.compile(r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/(?:in|pub)/[\w%-]+/?", re.I)
+GITHUB_RE = re.compile(r"(?:https?://)?(?:www\.)?github\.com/[\w-]+/?", re.I)
+LOCATION_RE = re.compile(r"\b([A-Z][a-zA-Z.]+(?: [A-Z][a-zA-Z.]+)*, (?:[A-Z]{2}|[A-Z][a-z]+(?: [A-Z][a-z]+)*))\b")
+
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+DATE_RANGE_RE = re.compile(
+    rf"({_DATE})\s*(?:-|–|—|to)\s*({_DATE}|Present|Current|Now|Today)", re.I
+)
+YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+GPA_RE = re.compile(r"\b(?:GPA|CGPA)\s*[:\-]?\s*(\d+(?:\.\d+)?(?:\s*/\s*\d+(?:\.\d+)?)?)", re.I)
+BULLET_RE = re.compile(r"^\s*(?:[•●▪◦■\-\*–·]|\d+[.)])\s+")
+DEGREE_RE = re.compile(
+    r"\b(?:Bachelor|Master|Doctor|Ph\.?D|B\.?\s?(?:S|A|E|Sc|Tech)\b|M\.?\s?(?:S|A|E|Sc|Tech|BA)\b|"
+    r"Associate|Diploma|High School)", re.I
+)
+INSTITUTION_RE = re.compile(r"\b(?:University|College|Institute|School|Academy|Polytechnic)\b", re.I)
+HEADER_SPLIT_RE = re.compile(r"\s+(?:\||–|—|-|@|at)\s+|\s*\|\s*|,\s+")
+SKILL_SPLIT_RE = re.compile(r"\s*(?:,|;|\||•|·|▪)\s*")
+LABEL_RE = re.compile(r"^[A-Za-z &/]{2,30}:\s*")
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about"],
+    "skills": ["skills", "technical skills", "core competencies", "competencies", "technologies",
+               "tools", "key skills", "skills & tools", "skills and tools"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"],
+    "education": ["education", "academic background", "education and training", "qualifications"],
+    "projects": ["projects", "personal projects", "key projects", "academic projects"],
+    "certifications": ["certifications", "certificates", "licenses & certifications",
+                       "licenses and certifications", "certifications & awards"]
+}
+_HEADER_LOOKUP = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+
+def _empty_structure():
+    # Same schema as resume_parser.create_fallback_structure
+    return {
+        "personal_info": {"name": "", "email": "", "phone": "", "location": "", "linkedin": "", "github": ""},
+        "summary": "",
+        "skills": [],
+        "experience": [],
+        "education": [],
+        "projects": [],
+        "certifications": []
+    }
+
+
+def section_for(line):
+    """Returns the section key if the line is a section header"""
+    if len(line) > 40:
+        return None
+    key = re.sub(r"[^a-z& ]", "", line.lower()).strip()
+    return _HEADER_LOOKUP.get(key)
+
+
+def split_sections(lines):
+    """Splits lines into {'header': [...], section: [...]} by recognised headings"""
+    sections = {"header": []}
+    current = "header"
+    for line in lines:
+        section = section_for(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return sections
+
+
+def _strip_bullet(line):
+    return BULLET_RE.sub("", line).strip()
+
+
+def _split_header(text):
+    parts = [p.strip(" ,|-–—") for p in HEADER_SPLIT_RE.split(text)]
+    return [p for p in parts if p]
+
+
+def parse_personal_info(header_lines, full_text):
+    info = _empty_structure()["personal_info"]
+    for field, pattern in (("email", EMAIL_RE), ("linkedin", LINKEDIN_RE), ("github", GITHUB_RE)):
+        match = pattern.search(full_text)
+        if match:
+            info[field] = match.group(0).rstrip("/")
+    for line in header_lines:
+        # Skip URLs so digits in them aren't taken for a phone number
+        match = PHONE_RE.search(LINKEDIN_RE.sub("", GITHUB_RE.sub("", line)))
+        if match and sum(c.isdigit() for c in match.group(0)) >= 7:
+            info["phone"] = match.group(0).strip()
+            break
+    for line in header_lines[:6]:
+        cleaned = EMAIL_RE.sub("", PHONE_RE.sub("", line))
+        match = LOCATION_RE.search(cleaned)
+        if match and not info["location"]:
+            info["location"] = match.group(1)
+        words = line.split()
+        if (not info["name"] and 2 <= len(words) <= 4 and not any(c.isdigit() for c in line)
+                and "@" not in line and all(w[0].isupper() for w in words if w[0].isalpha())):
+            info["name"] = line.strip()
+    return info
+
+
+def parse_skills(lines):
+    skills = []
+    for line in lines:
+        line = LABEL_RE.sub("", _strip_bullet(line))
+        for skill in SKILL_SPLIT_RE.split(line):
+            skill = skill.strip(" .")
+            if skill and len(skill) <= 40 and skill not in skills:
+                skills.append(skill)
+    return skills
+
+
+def parse_experience(lines):
+    """Groups lines into jobs: a date range starts a new job, bullets attach to the latest one"""
+    entries = []
+    pending_header = []
+    for line in lines:
+        if BULLET_RE.match(line):
+            if entries:
+                entries[-1]["description"].append(_strip_bullet(line))
+            continue
+        match = DATE_RANGE_RE.search(line)
+        if match:
+            header = (line[:match.start()] + " " + line[match.end():]).strip(" |,-–—()")
+            parts = [p for p in pending_header + _split_header(header) if p]
+            entries.append({
+                "title": parts[0] if parts else "",
+                "company": parts[1] if len(parts) > 1 else "",
+                "duration": f"{match.group(1)} - {match.group(2)}",
+                "description": []
+            })
+            pending_header = []
+        elif entries and entries[-1]["description"] and line[:1].islower():
+            # Wrapped continuation of the previous bullet
+            entries[-1]["description"][-1] += " " + line.strip()
+        elif entries and not entries[-1]["description"] and not entries[-1]["company"]:
+            entries[-1]["company"] = line.strip()
+        else:
+            pending_header.extend(_split_header(line))
+            # Header lines that never meet a date are unstructured prose
+            pending_header = pending_header[-2:]
+    return entries
+
+
+def _blocks(lines):
+    """Groups lines into entries separated by a new non-bullet line after a year was seen"""
+    blocks, current, seen_year = [], [], False
+    for line in lines:
+        starts_new = not BULLET_RE.match(line) and (DEGREE_RE.search(line) or INSTITUTION_RE.search(line))
+        if current and starts_new and seen_year:
+            blocks.append(current)
+            current, seen_year = [], False
+        current.append(line)
+        seen_year = seen_year or bool(YEAR_RE.search(line))
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def parse_education(lines):
+    entries = []
+    for block in _blocks(lines):
+        text = " | ".join(block)
+        degree = next((l for l in block if DEGREE_RE.search(l)), "")
+        institution = next((l for l in block if INSTITUTION_RE.search(l) and l != degree), "")
+        if degree and not institution and INSTITUTION_RE.search(degree):
+            parts = _split_header(DATE_RANGE_RE.sub("", degree))
+            degree = next((p for p in parts if DEGREE_RE.search(p)), degree)
+            institution = next((p for p in parts if INSTITUTION_RE.search(p)), "")
+        years = [m.group(0) for m in YEAR_RE.finditer(text)]
+        gpa = GPA_RE.search(text)
+        entries.append({
+            "degree": _clean_field(degree),
+            "institution": _clean_field(institution),
+            "year": years[-1] if years else "",
+            "gpa": gpa.group(1) if gpa else ""
+        })
+    return [e for e in entries if e["degree"] or e["institution"]]
+
+
+def _clean_field(text):
+    text = GPA_RE.sub("", DATE_RANGE_RE.sub("", text))
+    text = YEAR_RE.sub("", text)
+    return _strip_bullet(text).strip(" |,-–—()")
+
+
+def parse_projects(lines):
+    projects = []
+    for line in lines:
+        if BULLET_RE.match(line) and projects:
+            projects[-1]["description"].append(_strip_bullet(line))
+        elif projects and projects[-1]["description"] and line[:1].islower():
+            projects[-1]["description"][-1] += " " + line.strip()
+        else:
+            projects.append({"title": _strip_bullet(line), "description": []})
+    return projects
+
+
+def parse_certifications(lines):
+    certifications = []
+    for line in lines:
+        line = _strip_bullet(line)
+        years = [m.group(0) for m in YEAR_RE.finditer(line)]
+        parts = _split_header(YEAR_RE.sub("", line).strip(" ()"))
+        if not parts:
+            continue
+        certifications.append({
+            "name": parts[0],
+            "issuer": parts[1] if len(parts) > 1 else "",
+            "date": years[-1] if years else ""
+        })
+    return certifications
+
+
+def _confidence(data, sections, line_count):
+    """0..1 estimate of how completely the rules understood the document"""
+    info = data["personal_info"]
+    score = 0.0
+    score += 0.15 if info["name"] else 0.0
+    score += 0.15 if info["email"] or info["phone"] else 0.0
+    score += 0.10 if data["skills"] else 0.0
+
+    if data["experience"]:
+        complete = sum(1 for e in data["experience"] if e["title"] and e["company"] and e["duration"])
+        with_bullets = sum(1 for e in data["experience"] if e["description"])
+        score += 0.30 * complete / len(data["experience"])
+        score += 0.05 * with_bullets / len(data["experience"])
+    elif "experience" not in sections:
+        # Students and new graduates: a missing section is not a parse failure
+        score += 0.15
+
+    if data["education"]:
+        score += 0.15 * sum(1 for e in data["education"] if e["degree"]) / len(data["education"])
+
+    # Documents where most text sits before any recognised heading are unstructured
+    header_share = len(sections.get("header", [])) / max(line_count, 1)
+    score += 0.10 if header_share <= 0.3 else 0.0
+    return round(min(score, 1.0), 3)
+
+
+def parse_resume_locally(text):
+    """
+    Rule-based parse of cleaned resume text into the same JSON schema the LLM
+    parser returns. Returns (data, confidence); callers should only trust the
+    result above a threshold and fall back to the LLM otherwise.
+    """
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    sections = split_sections(lines)
+    data = _empty_structure()
+    data["personal_info"] = parse_personal_info(sections["header"], text)
+    data["summary"] = " ".join(sections.get("summary", []))
+    data["skills"] = parse_skills(sections.get("skills", []))
+    data["experience"] = parse_experience(sections.get("experience", []))
+    data["education"] = parse_education(sections.get("education", []))
+    data["projects"] = parse_projects(sections.get("projects", []))
+    data["certifications"] = parse_certifications(sections.get("certifications", []))
+    return data, _confidence(data, sections, len(lines))
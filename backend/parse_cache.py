@@ -0,0 +1,165 @@
+# parse_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Bump when the parse prompt, the resume schema or the local parser changes,
+# so parses cached by an older version are not served after an upgrade
+PARSER_VERSION = "4"
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_text(text):
+    """Hash of the cleaned text, ignoring whitespace layout differences"""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent two-tier cache of parsed resumes.
+
+    Tier 1 maps the SHA-256 of the uploaded bytes to a text hash, tier 2 maps
+    the hash of the cleaned text to the parsed JSON. A re-upload of the same
+    file skips extraction and the LLM; the same content in a different file
+    (re-exported PDF, DOCX copy) still skips the LLM. Parses are keyed on
+    (text hash, parser version); the file tier only records which text a
+    file holds, so it stays valid across versions.
+    """
+
+    def __init__(self, db_path, ttl_seconds=7 * 24 * 3600, max_entries=5000, version=PARSER_VERSION):
+        self.db_path = db_path
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"file_hits": 0, "text_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(parses)")}
+        if columns and "version" not in columns:
+            # Written before parses were versioned: nothing in it can be trusted to match the current parser
+            self._conn.execute("DROP TABLE parses")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                file_hash TEXT PRIMARY KEY,
+                text_hash TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS parses (
+                text_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (text_hash, version)
+            );
+            CREATE INDEX IF NOT EXISTS parses_accessed ON parses(accessed);
+        """)
+        self._conn.commit()
+
+    def _expired(self, created):
+        return self.ttl_seconds and created < time.time() - self.ttl_seconds
+
+    def _load(self, text_hash):
+        row = self._conn.execute(
+            "SELECT data, created FROM parses WHERE text_hash = ? AND version = ?", (text_hash, self.version)
+        ).fetchone()
+        if row is None:
+            return None
+        if self._expired(row[1]):
+            self._conn.execute("DELETE FROM parses WHERE text_hash = ? AND version = ?", (text_hash, self.version))
+            self._conn.execute("DELETE FROM files WHERE text_hash NOT IN (SELECT text_hash FROM parses)")
+            self._conn.commit()
+            self._stats["evictions"] += 1
+            return None
+        self._conn.execute("UPDATE parses SET accessed = ? WHERE text_hash = ? AND version = ?",
+                           (time.time(), text_hash, self.version))
+        self._conn.commit()
+        return json.loads(row[0])
+
+    def get_by_file(self, file_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text_hash FROM files WHERE file_hash = ?", (file_hash,)
+            ).fetchone()
+            data = self._load(row[0]) if row else None
+            if data is not None:
+                self._stats["file_hits"] += 1
+            return data
+
+    def get_by_text(self, text_hash, file_hash=None):
+        with self._lock:
+            data = self._load(text_hash)
+            if data is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["text_hits"] += 1
+            if file_hash:
+                self._link(file_hash, text_hash)
+                self._conn.commit()
+            return data
+
+    def _link(self, file_hash, text_hash):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (file_hash, text_hash, created) VALUES (?, ?, ?)",
+            (file_hash, text_hash, time.time())
+        )
+
+    def put(self, file_hash, text_hash, data):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parses (text_hash, version, data, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (text_hash, self.version, json.dumps(data), now, now)
+            )
+            if file_hash:
+                self._link(file_hash, text_hash)
+            self._stats["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.ttl_seconds:
+            cur = self._conn.execute(
+                "DELETE FROM parses WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._stats["evictions"] += cur.rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM parses").fetchone()[0]
+        if count > self.max_entries:
+            # Entries of older parser versions are never read again, so they go first
+            cur = self._conn.execute(
+                "DELETE FROM parses WHERE rowid IN "
+                "(SELECT rowid FROM parses ORDER BY version = ?, accessed ASC LIMIT ?)",
+                (self.version, count - self.max_entries)
+            )
+            self._stats["evictions"] += cur.rowcount
+        self._conn.execute("DELETE FROM files WHERE text_hash NOT IN (SELECT text_hash FROM parses)")
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM parses").fetchone()[0]
+            stats = dict(self._stats)
+        lookups = stats["file_hits"] + stats["text_hits"] + stats["misses"]
+        stats["entries"] = entries
+        stats["hit_rate"] = round((stats["file_hits"] + stats["text_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
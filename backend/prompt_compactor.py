@@ -0,0 +1,155 @@
+# prompt_compactor.py
+
+import os
+import re
+import json
+from collections import Counter
+from llm_client import CHARS_PER_TOKEN, estimate_tokens
+from local_parser import section_for
+from telemetry import PROMPT_TOKENS, log
+
+# Token budgets for the variable part of a prompt (0 = unlimited)
+PROMPT_TEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_TEXT_TOKEN_BUDGET", 4000))  # resume text sent to the parser
+PROMPT_JD_TOKEN_BUDGET = int(os.getenv("PROMPT_JD_TOKEN_BUDGET", 1000))  # job description sent with each section
+FURNITURE_EDGE_LINES = 3  # lines at the top and bottom of a PDF page checked for headers/footers
+MIN_CUT_CHARS = 40  # shorter remains of a line cut at the budget are dropped
+
+# When the text is over budget, sections are kept in this order; the rest are cut first
+SECTION_PRIORITY = ("header", "experience", "skills", "summary", "education", "projects", "certifications")
+
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?[-–—(]?\s*\d{1,3}\s*[-–—)]?(?:\s*(?:/|of)\s*\d{1,3})?$", re.I)
+SPACE_RE = re.compile(r"[ \t\f\v\u00a0\u2000-\u200b]+")
+DIGITS_RE = re.compile(r"\d+")
+WORD_RE = re.compile(r"\w")
+
+
+def _furniture_key(line):
+    # "Jane Doe - Page 2 of 3" and "Jane Doe - Page 3 of 3" are the same header
+    return DIGITS_RE.sub("#", line.lower())
+
+
+def _clean_lines(page):
+    lines = []
+    for line in page.splitlines():
+        line = SPACE_RE.sub(" ", line).strip()
+        if line and WORD_RE.search(line) and not PAGE_NUMBER_RE.match(line):
+            lines.append(line)
+    return lines
+
+
+def compact_text(text):
+    """
+    Extracted resume text without what costs tokens and tells the model
+    nothing: runs of whitespace, blank lines, lines with no letters or
+    digits (rules, stray bullet glyphs), page numbers, and the page headers
+    and footers of PDFs (pages are separated by form feeds). A line is a
+    header (footer) when it is among the first (last) FURNITURE_EDGE_LINES
+    of at least half the pages, ignoring the numbers in it; only its first
+    occurrence is kept.
+    """
+    pages = [_clean_lines(page) for page in text.split("\f")]
+    furniture = set()
+    if len(pages) > 1:
+        # Tops and bottoms are counted apart, so a line that merely ends one page and starts the next isn't caught
+        tops, bottoms = Counter(), Counter()
+        for lines in pages:
+            tops.update({_furniture_key(line) for line in lines[:FURNITURE_EDGE_LINES]})
+            bottoms.update({_furniture_key(line) for line in lines[-FURNITURE_EDGE_LINES:]})
+        min_pages = max(2, len(pages) / 2)
+        furniture = {key for counts in (tops, bottoms) for key, count in counts.items() if count >= min_pages}
+
+    kept = []
+    seen = set()
+    for lines in pages:
+        for line in lines:
+            if furniture:
+                key = _furniture_key(line)
+                if key in furniture:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def _blocks(lines):
+    """[(section, [lines])] in document order; a heading line starts a new block"""
+    blocks = [("header", [])]
+    for line in lines:
+        section = section_for(line)
+        if section:
+            blocks.append((section, [line]))
+        else:
+            blocks[-1][1].append(line)
+    return blocks
+
+
+def fit_budget(text, max_tokens, priority=SECTION_PRIORITY):
+    """
+    Cuts text to about max_tokens. Sections are funded in priority order,
+    so the contact header and experience survive and projects or
+    certifications are shortened (from the end) or dropped first; what is
+    kept stays in document order. Text before the first recognised heading
+    is the header, and lines under unrecognised headings belong to the
+    section above them.
+    """
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    blocks = _blocks(text.split("\n"))
+    rank = {section: i for i, section in enumerate(priority)}
+    allowance = max_tokens * CHARS_PER_TOKEN
+    budgets = [0] * len(blocks)
+    for i in sorted(range(len(blocks)), key=lambda i: rank.get(blocks[i][0], len(priority))):
+        size = sum(len(line) + 1 for line in blocks[i][1])
+        budgets[i] = min(size, allowance)
+        allowance -= budgets[i]
+
+    kept = []
+    for (_, lines), budget in zip(blocks, budgets):
+        for line in lines:
+            if len(line) + 1 > budget:
+                # A long paragraph is cut at a word rather than dropped whole
+                cut = line[:budget - 1].rsplit(" ", 1)[0]
+                if len(cut) >= MIN_CUT_CHARS:
+                    kept.append(cut)
+                break
+            kept.append(line)
+            budget -= len(line) + 1
+    return "\n".join(kept)
+
+
+def compact_resume_text(text, max_tokens=None):
+    """Resume text for a parser prompt: compacted, then cut to PROMPT_TEXT_TOKEN_BUDGET"""
+    max_tokens = PROMPT_TEXT_TOKEN_BUDGET if max_tokens is None else max_tokens
+    return fit_budget(compact_text(text), max_tokens)
+
+
+def compact_job_description(text, max_tokens=None):
+    """Job description for enhancement prompts: compacted, keeping its first PROMPT_JD_TOKEN_BUDGET tokens"""
+    max_tokens = PROMPT_JD_TOKEN_BUDGET if max_tokens is None else max_tokens
+    return fit_budget(compact_text(text or ""), max_tokens, priority=())
+
+
+def compact_json(value):
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def squeeze(prompt):
+    """Drops the indentation and blank lines a prompt template picks up from the source code"""
+    return "\n".join(line.strip() for line in prompt.splitlines() if line.strip())
+
+
+def report(call, raw, compacted, prompt=None):
+    """
+    Records the input tokens of one model call (or one input shared by
+    several): raw and compacted are the variable inputs (resume text, items,
+    job description) before and after compaction, prompt is what is sent.
+    """
+    before, after = estimate_tokens(raw), estimate_tokens(compacted)
+    PROMPT_TOKENS.inc(call, "before", amount=before)
+    PROMPT_TOKENS.inc(call, "after", amount=after)
+    fields = {"call": call, "input_tokens_before": before, "input_tokens_after": after}
+    if prompt is not None:
+        fields["prompt_tokens"] = estimate_tokens(prompt)
+    log.info("prompt compacted", extra={"fields": fields})
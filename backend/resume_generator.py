@@ -1,168 +1,251 @@
 # resume_generator.py
 
+import io
 import os
+import json
+import uuid
+import threading
+import contextvars
 from datetime import datetime
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from concurrent.futures import ThreadPoolExecutor
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib import colors
+from resume_templates import get_template, PAGE_MARGINS
+from resume_model import Resume, as_resume
+from telemetry import timed
+
+# Bump whenever rendering output changes, so cached artifacts are not reused
+RENDERER_VERSION = "3"
+FORMATS = ("pdf", "docx")
+MIMETYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 2))  # formats rendered concurrently per request
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool():
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+    return _render_pool
+
+
+def generate_resume(resume_data, template="modern", output_folder="static/generated", store=None,
+                    formats=FORMATS, lazy=False):
+    """
+    Renders the requested formats (PDF and DOCX by default), concurrently
+    when there is more than one. With an ArtifactStore, files are named by a
+    hash of the resume, template and renderer version, and an
+    identical earlier request is answered without rendering. lazy=True only
+    records what to render; the file is rendered on first download (see
+    render_artifact).
+    """
+    formats = [fmt for fmt in FORMATS if fmt in formats]
+    resume = as_resume(resume_data)
+
+    if store is not None:
+        data = resume.to_dict()
+        base_filename = f"resume_{store.content_key(data, template, RENDERER_VERSION)}"
+        if lazy:
+            store.get_or_create(f"{base_filename}.json", lambda path: _write_spec(path, data, template))
+            return {fmt: f"{base_filename}.{fmt}" for fmt in formats}
+
+        def render(fmt):
+            return store.get_or_create(f"{base_filename}.{fmt}", lambda path: RENDERERS[fmt](resume, template, path))
+    else:
+        # Unique per call, so concurrent requests in the same second can't overwrite each other
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_filename = f"resume_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+        def render(fmt):
+            filepath = os.path.join(output_folder, f"{base_filename}.{fmt}")
+            RENDERERS[fmt](resume, template, filepath)
+            return filepath
+
+    if len(formats) > 1 and RENDER_WORKERS > 1:
+        # Each worker runs in a copy of the request context so its render spans are attributed
+        pool = _get_render_pool()
+        futures = [pool.submit(contextvars.copy_context().run, render, fmt) for fmt in formats]
+        paths = [future.result() for future in futures]
+    else:
+        paths = [render(fmt) for fmt in formats]
+    return {fmt: os.path.basename(path) for fmt, path in zip(formats, paths)}
+
+
+def render_artifact(store, filename):
+    """
+    Path of a generated file, rendering it first if it was requested lazily.
+    None when the file is unknown (never generated, or evicted with its spec).
+    """
+    existing = store.get(filename)
+    if existing:
+        return existing
+    base_filename, ext = os.path.splitext(filename)
+    fmt = ext.lstrip(".")
+    if fmt not in RENDERERS:
+        return None
+    spec_path = store.get(f"{base_filename}.json")
+    if spec_path is None:
+        return None
+    with open(spec_path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    resume = Resume.from_dict(spec["data"])
+    return store.get_or_create(filename, lambda path: RENDERERS[fmt](resume, spec["template"], path))
+
+
+def render_document(resume_data, template="modern", fmt="pdf", store=None):
+    """
+    One format of the resume, for streaming straight to the client: the
+    path of an identical file already in the artifact store, otherwise a
+    BytesIO rendered in memory (nothing is written to disk).
+    """
+    resume = as_resume(resume_data)
+    if store is not None:
+        existing = store.get(f"resume_{store.content_key(resume.to_dict(), template, RENDERER_VERSION)}.{fmt}")
+        if existing:
+            return existing
+    buffer = io.BytesIO()
+    RENDERERS[fmt](resume, template, buffer)
+    buffer.seek(0)
+    return buffer
 
-def generate_resume(resume_data, template="modern", output_folder="static/generated"):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_filename = f"resume_{timestamp}"
-    
-    # --- CRITICAL FIX: Data Normalization ---
-    # This ensures we always have valid data dictionaries, even if empty
-    data = {
-        "personal_info": resume_data.get("personal_info", {}),
-        "summary": resume_data.get("summary", ""),
-        "skills": resume_data.get("skills", []),
-        "experience": resume_data.get("experience", []),
-        "education": resume_data.get("education", []),
-        "projects": resume_data.get("projects", []),
-        "certifications": resume_data.get("certifications", [])
-    }
-    
-    pdf_path = generate_pdf(data, template, output_folder, base_filename)
-    docx_path = generate_docx(data, template, output_folder, base_filename)
-    
-    return {
-        "pdf": os.path.basename(pdf_path),
-        "docx": os.path.basename(docx_path)
-    }
 
-def generate_pdf(data, template, output_folder, base_filename):
+def _write_spec(path, data, template):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"data": data, "template": template, "renderer_version": RENDERER_VERSION}, f)
+
+
+def generate_pdf(resume_data, template, output_folder, base_filename):
     filepath = os.path.join(output_folder, f"{base_filename}.pdf")
-    doc = SimpleDocTemplate(filepath, pagesize=letter,
-                            topMargin=0.5*inch, bottomMargin=0.5*inch,
-                            leftMargin=0.75*inch, rightMargin=0.75*inch)
+    render_pdf(as_resume(resume_data), template, filepath)
+    return filepath
+
+@timed("pdf_render")
+def render_pdf(resume, template, target):
+    """Renders a Resume as PDF into target (a path or writable binary file object)"""
+    tpl = get_template(template)
+    styles = tpl.pdf_styles
+    doc = SimpleDocTemplate(target, pagesize=letter,
+                            topMargin=PAGE_MARGINS["top"], bottomMargin=PAGE_MARGINS["bottom"],
+                            leftMargin=PAGE_MARGINS["left"], rightMargin=PAGE_MARGINS["right"])
     
     story = []
-    styles = getSampleStyleSheet()
+    normal_style = styles["normal"]
     
-    # Define Styles
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, alignment=1, spaceAfter=10)
-    h2_style = ParagraphStyle('H2', parent=styles['Heading2'], fontSize=14, spaceBefore=12, spaceAfter=6, 
-                              borderWidth=1, borderColor=colors.HexColor('#2c3e50'), borderPadding=5, borderRadius=2)
-    normal_style = styles['Normal']
-    
-    # 1. Personal Info
-    p_info = data["personal_info"]
-    name = p_info.get("name", "Your Name")
-    story.append(Paragraph(name, title_style))
+    # Personal Info
+    p_info = resume.personal_info
+    name = p_info.name or "Your Name"
+    story.append(Paragraph(name, styles["title"]))
     
     contact_line = [
-        p_info.get("email"), 
-        p_info.get("phone"), 
-        p_info.get("location"),
-        p_info.get("linkedin")
+        p_info.email, 
+        p_info.phone, 
+        p_info.location,
+        p_info.linkedin
     ]
     # Filter out None or empty strings
     contact_text = " | ".join([c for c in contact_line if c])
-    story.append(Paragraph(contact_text, ParagraphStyle('Contact', parent=normal_style, alignment=1)))
+    story.append(Paragraph(contact_text, styles["contact"]))
     story.append(Spacer(1, 0.2*inch))
 
-    # 2. Summary
-    if data["summary"]:
-        story.append(Paragraph("PROFESSIONAL SUMMARY", h2_style))
-        story.append(Paragraph(data["summary"], normal_style))
-
-    # 3. Skills
-    if data["skills"]:
-        story.append(Paragraph("SKILLS", h2_style))
-        # Handle both list of strings and complex objects
-        skill_text = ", ".join(data["skills"]) if isinstance(data["skills"][0], str) else ", ".join([s.get("name", "") for s in data["skills"]])
-        story.append(Paragraph(skill_text, normal_style))
-
-    # 4. Experience
-    if data["experience"]:
-        story.append(Paragraph("EXPERIENCE", h2_style))
-        for exp in data["experience"]:
-            # Safety checks for missing keys
-            title = exp.get("title", "Job Title")
-            company = exp.get("company", "Company")
-            duration = exp.get("duration", "")
-            
-            header = f"<b>{title}</b> at {company}"
-            if duration:
-                header += f" ({duration})"
+    # Sections in the template's order
+    for section in tpl.sections:
+        content = getattr(resume, section)
+        if not content:
+            continue
+        story.append(Paragraph(tpl.section_titles[section], styles["h2"]))
+        
+        if section == "summary":
+            story.append(Paragraph(content, normal_style))
+        elif section == "skills":
+            story.append(Paragraph(", ".join(content), normal_style))
+        elif section == "experience":
+            for exp in content:
+                title = exp.title or "Job Title"
+                company = exp.company or "Company"
+                
+                header = f"<b>{title}</b> at {company}"
+                if exp.duration:
+                    header += f" ({exp.duration})"
+                story.append(Paragraph(header, normal_style))
                 
-            story.append(Paragraph(header, normal_style))
-            
-            # Handle description list
-            descriptions = exp.get("description", [])
-            if isinstance(descriptions, str): descriptions = [descriptions]
-            
-            for desc in descriptions:
-                story.append(Paragraph(f"• {desc}", ParagraphStyle('Bullet', parent=normal_style, leftIndent=15)))
-            story.append(Spacer(1, 0.1*inch))
-
-    # 5. Education
-    if data["education"]:
-        story.append(Paragraph("EDUCATION", h2_style))
-        for edu in data["education"]:
-            degree = edu.get("degree", "Degree")
-            school = edu.get("institution", "University")
-            year = edu.get("year", "")
-            text = f"<b>{degree}</b> - {school} {f'({year})' if year else ''}"
-            story.append(Paragraph(text, normal_style))
+                for desc in exp.description:
+                    story.append(Paragraph(f"• {desc}", styles["bullet"]))
+                story.append(Spacer(1, 0.1*inch))
+        elif section == "education":
+            for edu in content:
+                degree = edu.degree or "Degree"
+                school = edu.institution or "University"
+                year = edu.year
+                text = f"<b>{degree}</b> - {school} {f'({year})' if year else ''}"
+                story.append(Paragraph(text, normal_style))
 
     doc.build(story)
-    return filepath
 
-def generate_docx(data, template, output_folder, base_filename):
+def generate_docx(resume_data, template, output_folder, base_filename):
     filepath = os.path.join(output_folder, f"{base_filename}.docx")
-    doc = Document()
+    render_docx(as_resume(resume_data), template, filepath)
+    return filepath
+
+@timed("docx_render")
+def render_docx(resume, template, target):
+    """Renders a Resume as DOCX into target (a path or writable binary file object)"""
+    tpl = get_template(template)
+    doc = tpl.new_docx()
     
     # Personal Info
-    p_info = data["personal_info"]
-    name = p_info.get("name", "Your Name")
+    p_info = resume.personal_info
+    name = p_info.name or "Your Name"
     heading = doc.add_paragraph(name)
-    heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    heading.alignment = tpl.docx_name_alignment
     run = heading.runs[0]
     run.bold = True
-    run.font.size = Pt(24)
+    run.font.size = tpl.docx_name_size
     
-    contact_line = [p_info.get("email"), p_info.get("phone"), p_info.get("linkedin")]
+    contact_line = [p_info.email, p_info.phone, p_info.linkedin]
     contact_text = " | ".join([c for c in contact_line if c])
     contact_para = doc.add_paragraph(contact_text)
-    contact_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    contact_para.alignment = tpl.docx_name_alignment
 
-    # Helper to add sections
-    def add_section(title, content_list, is_list=False):
-        if not content_list: return
-        h = doc.add_heading(title, level=1)
+    # Sections in the template's order
+    for section in tpl.sections:
+        content = getattr(resume, section)
+        if not content:
+            continue
+        _styled_paragraph(doc, tpl.section_titles[section], tpl.docx_heading_style_id)
         
-        if title == "SKILLS":
-            doc.add_paragraph(", ".join(content_list))
-        elif title == "PROFESSIONAL SUMMARY":
-            doc.add_paragraph(content_list)
-        else:
-            for item in content_list:
-                if title == "EXPERIENCE":
-                    p = doc.add_paragraph()
-                    p.add_run(f"{item.get('title', '')} at {item.get('company', '')}").bold = True
-                    if item.get('duration'):
-                        p.add_run(f" ({item['duration']})").italic = True
-                    
-                    descs = item.get('description', [])
-                    if isinstance(descs, str): descs = [descs]
-                    for d in descs:
-                        doc.add_paragraph(d, style='List Bullet')
-                
-                elif title == "EDUCATION":
-                    p = doc.add_paragraph()
-                    p.add_run(f"{item.get('degree', '')}").bold = True
-                    p.add_run(f" - {item.get('institution', '')}")
-
-    add_section("PROFESSIONAL SUMMARY", data["summary"])
-    add_section("SKILLS", data["skills"])
-    add_section("EXPERIENCE", data["experience"])
-    add_section("EDUCATION", data["education"])
-
-    doc.save(filepath)
-    return filepath
\ No newline at end of file
+        if section == "summary":
+            doc.add_paragraph(content)
+        elif section == "skills":
+            doc.add_paragraph(", ".join(content))
+        elif section == "experience":
+            for item in content:
+                p = doc.add_paragraph()
+                p.add_run(f"{item.title} at {item.company}").bold = True
+                if item.duration:
+                    p.add_run(f" ({item.duration})").italic = True
+                for d in item.description:
+                    _styled_paragraph(doc, d, tpl.docx_bullet_style_id)
+        elif section == "education":
+            for item in content:
+                p = doc.add_paragraph()
+                p.add_run(item.degree).bold = True
+                p.add_run(f" - {item.institution}")
+
+    doc.save(target)
+
+def _styled_paragraph(doc, text, style_id):
+    # Sets the style id directly; assigning a style name makes python-docx scan every style
+    paragraph = doc.add_paragraph(text)
+    paragraph._p.get_or_add_pPr().style = style_id
+    return paragraph
+
+
+RENDERERS = {"pdf": render_pdf, "docx": render_docx}
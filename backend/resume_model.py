@@ -0,0 +1,224 @@
+# resume_model.py
+
+import json
+
+
+class ResumeValidationError(ValueError):
+    """Resume data that can't be normalized; the message names the offending field"""
+
+
+def _text(value, path):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)  # years, GPAs
+    raise ResumeValidationError(f"{path}: expected a string, got {type(value).__name__}")
+
+
+def _text_list(value, path):
+    """A list of strings; a lone string becomes a one-item list"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if not isinstance(value, list):
+        raise ResumeValidationError(f"{path}: expected a list of strings, got {type(value).__name__}")
+    if all(type(item) is str for item in value):
+        return list(value)  # the usual case, without a path per item
+    return [_text(item, f"{path}[{i}]") for i, item in enumerate(value)]
+
+
+def _skills(value, path):
+    """Skills as plain names: "a, b" is split, {"name": ...} objects are reduced to their name"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    if not isinstance(value, list):
+        raise ResumeValidationError(f"{path}: expected a list of skills, got {type(value).__name__}")
+    skills = []
+    for i, item in enumerate(value):
+        if isinstance(item, dict):
+            item = _text(item.get("name"), f"{path}[{i}].name")
+        else:
+            item = _text(item, f"{path}[{i}]")
+        if item:
+            skills.append(item)
+    return skills
+
+
+class Record:
+    """
+    A fixed set of fields, all strings except those named in LISTS (lists
+    of strings). Subclasses only declare __slots__ and LISTS.
+    """
+    __slots__ = ()
+    LISTS = ()
+
+    def __init__(self, **fields):
+        unknown = set(fields) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"{type(self).__name__} has no field(s) {', '.join(sorted(unknown))}")
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name, [] if name in self.LISTS else ""))
+
+    @classmethod
+    def from_dict(cls, data, path=None):
+        """Normalizes one JSON object; unknown keys are dropped, bad values raise ResumeValidationError"""
+        path = path or cls.__name__
+        if not isinstance(data, dict):
+            raise ResumeValidationError(f"{path}: expected an object, got {type(data).__name__}")
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            value = data.get(name)
+            if name in cls.LISTS:
+                value = _text_list(value, f"{path}.{name}")
+            elif type(value) is not str:
+                value = _text(value, f"{path}.{name}")
+            setattr(record, name, value)
+        return record
+
+    def to_dict(self):
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            data[name] = list(value) if name in self.LISTS else value
+        return data
+
+    def copy(self):
+        record = type(self).__new__(type(self))
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(record, name, list(value) if name in self.LISTS else value)
+        return record
+
+    def __bool__(self):
+        return any(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class PersonalInfo(Record):
+    __slots__ = ("name", "email", "phone", "location", "linkedin", "github")
+
+
+class Experience(Record):
+    __slots__ = ("title", "company", "duration", "description")
+    LISTS = ("description",)
+
+
+class Education(Record):
+    __slots__ = ("degree", "institution", "year", "gpa")
+
+
+class Project(Record):
+    __slots__ = ("title", "description")
+    LISTS = ("description",)
+
+
+class Certification(Record):
+    __slots__ = ("name", "issuer", "date")
+
+
+class Resume:
+    """
+    A parsed resume. Build it once where data enters the app with
+    Resume.from_dict, pass it to scoring, enhancement and rendering, and
+    turn it back into JSON with to_dict. personal_info_given records
+    whether the input had a non-empty personal_info object, which is what
+    the contact score counts, even when every field in it is blank.
+    """
+    SECTIONS = ("personal_info", "summary", "skills", "experience", "education", "projects", "certifications")
+    __slots__ = SECTIONS + ("personal_info_given",)
+    # Sections holding a list of entries, and the record type of each entry
+    ENTRY_TYPES = {"experience": Experience, "education": Education, "projects": Project,
+                   "certifications": Certification}
+
+    def __init__(self, personal_info=None, summary="", skills=None, experience=None, education=None,
+                 projects=None, certifications=None):
+        self.personal_info = personal_info if personal_info is not None else PersonalInfo()
+        self.personal_info_given = personal_info is not None
+        self.summary = summary
+        self.skills = skills if skills is not None else []
+        self.experience = experience if experience is not None else []
+        self.education = education if education is not None else []
+        self.projects = projects if projects is not None else []
+        self.certifications = certifications if certifications is not None else []
+
+    @classmethod
+    def from_dict(cls, data, path="resume"):
+        """
+        The single validation pass: missing sections become empty, numbers
+        become strings, a lone description string becomes a one-item list,
+        skill objects become names. Anything else of the wrong type raises
+        ResumeValidationError naming the field.
+        """
+        if not isinstance(data, dict):
+            raise ResumeValidationError(f"{path}: expected an object, got {type(data).__name__}")
+        resume = cls.__new__(cls)
+        personal_info = data.get("personal_info")
+        resume.personal_info = (PersonalInfo() if personal_info is None
+                                else PersonalInfo.from_dict(personal_info, f"{path}.personal_info"))
+        resume.personal_info_given = bool(personal_info)
+        resume.summary = _text(data.get("summary"), f"{path}.summary")
+        resume.skills = _skills(data.get("skills"), f"{path}.skills")
+        for section, record_type in cls.ENTRY_TYPES.items():
+            entries = data.get(section)
+            if entries is None:
+                entries = []
+            elif not isinstance(entries, list):
+                raise ResumeValidationError(f"{path}.{section}: expected a list, got {type(entries).__name__}")
+            setattr(resume, section, [record_type.from_dict(entry, f"{path}.{section}[{i}]")
+                                      for i, entry in enumerate(entries)])
+        return resume
+
+    def to_dict(self):
+        data = {
+            "personal_info": self.personal_info.to_dict(),
+            "summary": self.summary,
+            "skills": list(self.skills),
+        }
+        for section in self.ENTRY_TYPES:
+            data[section] = [entry.to_dict() for entry in getattr(self, section)]
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+    def copy(self):
+        """A copy that can be edited without touching this resume"""
+        resume = Resume.__new__(Resume)
+        resume.personal_info = self.personal_info.copy()
+        resume.personal_info_given = self.personal_info_given
+        resume.summary = self.summary
+        resume.skills = list(self.skills)
+        for section in self.ENTRY_TYPES:
+            setattr(resume, section, [entry.copy() for entry in getattr(self, section)])
+        return resume
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.SECTIONS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"Resume(name={self.personal_info.name!r}, skills={len(self.skills)}, "
+                f"experience={len(self.experience)}, education={len(self.education)})")
+
+
+def as_resume(data):
+    """data as a Resume, normalizing it only if it is still a plain dict"""
+    return data if isinstance(data, Resume) else Resume.from_dict(data)
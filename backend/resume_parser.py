@@ -1,114 +1,377 @@
+import io
 import docx
 import PyPDF2
 import os
-import json
-import google.generativeai as genai
-from dotenv import load_dotenv
+import time
+import asyncio
+import contextvars
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from parse_cache import hash_bytes, hash_file, hash_text
+from local_parser import parse_resume_locally
+import llm_output
+import prompt_compactor
+from llm_coalesce import AsyncSingleFlight, MicroBatcher, SingleFlight
+# Imported before the settings below are read: llm_client loads .env for the whole app
+import llm_client
+from telemetry import log, log_exception, span, timed
 
-load_dotenv()
+# PDF extraction budget: stop once we have enough text for the parser prompt (0 = unlimited)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 0))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", 50000))
+# Documents with at least this many pages are extracted in parallel worker processes (0 = never)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 32))
+PDF_PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PAGES_PER_CHUNK = 4
+PAGE_BREAK = "\n\f\n"  # between PDF pages, so prompt compaction can spot page headers/footers
+# Rule-based parses at or above this confidence skip the LLM (set above 1 to always use the LLM)
+LOCAL_PARSE_MIN_CONFIDENCE = float(os.getenv("LOCAL_PARSE_MIN_CONFIDENCE", 0.85))
+# Sections missing or malformed in the model's answer are asked for again, alone (0 = never)
+SECTION_REASK_LIMIT = int(os.getenv("SECTION_REASK_LIMIT", 3))
+# Micro-batching: small resumes arriving within the window share one model call (0 = off)
+PARSE_BATCH_WINDOW_MS = float(os.getenv("PARSE_BATCH_WINDOW_MS", 0))
+PARSE_BATCH_MAX_SIZE = int(os.getenv("PARSE_BATCH_MAX_SIZE", 4))
+PARSE_BATCH_MAX_TOKENS = int(os.getenv("PARSE_BATCH_MAX_TOKENS", 1500))  # larger resumes are parsed alone
+# The shape parse prompts ask for, as compact placeholder JSON. Changing it or
+# the prompts below needs a bump of parse_cache.PARSER_VERSION.
+PARSE_SCHEMA = prompt_compactor.compact_json(llm_output.schema_example(llm_output.RESUME_SCHEMA))
+_pdf_pool = None
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+def _get_pdf_pool():
+    """Long-lived pool so large documents don't pay process startup per upload"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_PARALLEL_WORKERS)
+    return _pdf_pool
 
-def extract_text_from_pdf(filepath):
-    text = ""
-    with open(filepath, "rb") as f:
+def _open_source(source):
+    """A binary file object for a path, or for the bytes of an in-memory upload"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return open(source, "rb")
+
+# Worker process: (document, reader) of the PDF its last chunk came from
+_worker_pdf = None
+
+def _worker_reader(document):
+    """
+    Worker process: a PdfReader for document, ("path", path, mtime) or
+    ("shm", block name, size), read and parsed once per worker and reused
+    for the document's later chunks.
+    """
+    global _worker_pdf
+    if _worker_pdf is None or _worker_pdf[0] != document:
+        if document[0] == "shm":
+            # Pool workers share the parent's resource tracker, so attaching doesn't change who unlinks the block
+            block = shared_memory.SharedMemory(name=document[1])
+            try:
+                data = bytes(block.buf[:document[2]])
+            finally:
+                block.close()
+        else:
+            with open(document[1], "rb") as f:
+                data = f.read()
+        _worker_pdf = (document, PyPDF2.PdfReader(io.BytesIO(data)))
+    return _worker_pdf[1]
+
+def _extract_pdf_pages(document, start, stop):
+    """Worker process: returns [(page_text, seconds), ...] for pages start..stop-1"""
+    reader = _worker_reader(document)
+    pages = []
+    for i in range(start, stop):
+        t0 = time.perf_counter()
+        text = reader.pages[i].extract_text() or ""
+        pages.append((text, time.perf_counter() - t0))
+    return pages
+
+def iter_pdf_pages(source, max_pages=None, parallel=True, page_times=None):
+    """
+    Yields the text of each page in order; source is a path or the PDF bytes. Large documents are extracted in
+    chunks on a process pool, keeping only a few chunks in flight so that a
+    consumer that stops early doesn't pay for the rest of the document.
+    Per-page extraction seconds are appended to page_times if given.
+    """
+    with _open_source(source) as f:
         reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
+        page_count = len(reader.pages)
+        if max_pages:
+            page_count = min(page_count, max_pages)
+        
+        sequential = (not parallel or PDF_PARALLEL_WORKERS < 2 or not PDF_PARALLEL_MIN_PAGES
+                      or page_count < PDF_PARALLEL_MIN_PAGES)
+        if sequential:
+            for i in range(page_count):
+                t0 = time.perf_counter()
+                text = reader.pages[i].extract_text() or ""
+                if page_times is not None:
+                    page_times.append(time.perf_counter() - t0)
+                yield text
+            return
+    
+    chunks = [(start, min(start + PDF_PAGES_PER_CHUNK, page_count))
+              for start in range(0, page_count, PDF_PAGES_PER_CHUNK)]
+    # Workers get a handle rather than the document: a path, or uploaded bytes in shared memory
+    block = None
+    if isinstance(source, (bytes, bytearray)):
+        block = shared_memory.SharedMemory(create=True, size=len(source))
+        block.buf[:len(source)] = source
+        document = ("shm", block.name, len(source))
+    else:
+        document = ("path", os.path.abspath(source), os.stat(source).st_mtime_ns)
+    pool = _get_pdf_pool()
+    in_flight = deque()
+    next_chunk = 0
+    try:
+        while next_chunk < len(chunks) or in_flight:
+            while next_chunk < len(chunks) and len(in_flight) < PDF_PARALLEL_WORKERS * 2:
+                in_flight.append(pool.submit(_extract_pdf_pages, document, *chunks[next_chunk]))
+                next_chunk += 1
+            for text, seconds in in_flight.popleft().result():
+                if page_times is not None:
+                    page_times.append(seconds)
+                yield text
+    finally:
+        for future in in_flight:
+            future.cancel()
+        if block is not None:
+            block.close()
+            block.unlink()
+
+def extract_text_from_pdf(source, max_pages=None, max_chars=None, parallel=True, stats=None):
+    """
+    Extracts PDF text up to a page/character budget (defaults from
+    PDF_MAX_PAGES / PDF_MAX_CHARS). Pass a dict as stats to get per-page
+    timing diagnostics back.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    
+    t0 = time.perf_counter()
+    page_times = []
+    pages = []
+    char_count = 0
+    truncated = False
+    for text in iter_pdf_pages(source, max_pages, parallel, page_times):
+        pages.append(text)
+        char_count += len(text) + len(PAGE_BREAK)
+        if max_chars and char_count >= max_chars:
+            truncated = True
+            break
+    
+    text = PAGE_BREAK.join(pages)
+    if max_chars:
+        text = text[:max_chars]
+    
+    if stats is not None:
+        stats.update({
+            "pages_extracted": len(pages),
+            "truncated": truncated,
+            "chars": len(text),
+            "total_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "page_ms": [round(sec * 1000, 2) for sec in page_times[:len(pages)]]
+        })
     return text
 
-def extract_text_from_docx(filepath):
-    doc = docx.Document(filepath)
+def extract_text_from_docx(source):
+    with _open_source(source) as f:
+        doc = docx.Document(f)
     return "\n".join([p.text for p in doc.paragraphs])
 
 def clean_text(text):
     return text.replace("\t", " ").replace("\r", "").strip()
 
-def parse_resume_with_ai(text):
-    """
-    Uses Gemini to structure the raw text into the exact JSON format 
-    expected by the frontend.
-    """
-    # FIXED: Use the correct model name
-    model = genai.GenerativeModel('gemini-1.5-flash-latest') 
-    
-    prompt = f"""
+def _parse_prompt(text):
+    """(compacted text, parser prompt) for parse_resume_with_ai and its async twin"""
+    raw_text = text
+    text = prompt_compactor.compact_resume_text(text)
+    prompt = prompt_compactor.squeeze(f"""
     You are a resume parser. Extract data from the text below and return ONLY valid JSON.
     Do not include Markdown formatting like ```json.
-    
     The JSON structure must be exactly this:
-    {{
-        "personal_info": {{
-            "name": "string",
-            "email": "string",
-            "phone": "string",
-            "location": "string",
-            "linkedin": "string",
-            "github": "string"
-        }},
-        "summary": "string",
-        "skills": ["string", "string"],
-        "experience": [
-            {{
-                "title": "string",
-                "company": "string",
-                "duration": "string",
-                "description": ["bullet point 1", "bullet point 2"]
-            }}
-        ],
-        "education": [
-            {{
-                "degree": "string",
-                "institution": "string",
-                "year": "string",
-                "gpa": "string"
-            }}
-        ],
-        "projects": [
-            {{
-                "title": "string",
-                "description": ["bullet point 1"]
-            }}
-        ],
-        "certifications": [
-             {{
-                "name": "string",
-                "issuer": "string",
-                "date": "string"
-            }}
-        ]
-    }}
-
+    {PARSE_SCHEMA}
     Resume Text:
     {text}
+    """)
+    prompt_compactor.report("parse", raw_text, text, prompt)
+    return text, prompt
+
+def _decode_parse(response_text):
+    """(parsed_data, failed_sections) from the model's answer; raises LLMOutputError"""
+    with span("json_decode"):
+        decoded, fault = llm_output.loads(response_text, "{")
+        parsed_data, failed = llm_output.validate_resume(decoded, truncated=fault == "truncated")
+    if fault:
+        log.warning(f"Model returned {fault} JSON", extra={"fields": {"fault": fault}})
+    return parsed_data, failed
+
+def parse_resume_with_ai(text):
     """
-    
+    Uses Gemini to structure the raw text into the exact JSON format 
+    expected by the frontend. The text is compacted first (see
+    prompt_compactor) and the schema sent without whitespace.
+    """
+    text, prompt = _parse_prompt(text)
+    response_text = ""
     try:
-        response = model.generate_content(prompt)
-        json_str = response.text.strip()
+        response_text = llm_client.generate(prompt)
+        parsed_data, failed = _decode_parse(response_text)
         
-        # Clean up markdown formatting if present
-        if json_str.startswith("```json"):
-            json_str = json_str[7:-3]
-        elif json_str.startswith("```"):
-            json_str = json_str[3:-3]
+        # A truncated or malformed answer usually loses a section or two, not everything
+        if failed and len(failed) <= SECTION_REASK_LIMIT:
+            parsed_data.update(_reask_sections(text, failed))
+        log.info("Parsed resume with the model")
+        return parsed_data
+        
+    except llm_output.LLMOutputError as e:
+        log.warning(f"Model answer is not valid JSON: {e}", extra={"fields": {"response": response_text[:200]}})
+        return create_fallback_structure()
         
-        json_str = json_str.strip()
+    except Exception as e:
+        log_exception("parse_resume_with_ai", e)
+        return create_fallback_structure()
+
+async def parse_resume_with_ai_async(text):
+    """parse_resume_with_ai with async model calls, for the ASGI app; re-asks run concurrently"""
+    text, prompt = _parse_prompt(text)
+    response_text = ""
+    try:
+        response_text = await llm_client.generate_async(prompt)
+        parsed_data, failed = _decode_parse(response_text)
         
-        parsed_data = json.loads(json_str)
-        print("✅ Successfully parsed resume with AI")
+        if failed and len(failed) <= SECTION_REASK_LIMIT:
+            log.info("Re-asking the model for sections", extra={"fields": {"sections": failed}})
+            values = await asyncio.gather(*(_reask_section_async(text, section) for section in failed))
+            parsed_data.update({section: value for section, value in zip(failed, values) if value is not None})
+        log.info("Parsed resume with the model")
         return parsed_data
         
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON Decode Error: {e}")
-        print(f"Response was: {response.text[:200]}...")
+    except llm_output.LLMOutputError as e:
+        log.warning(f"Model answer is not valid JSON: {e}", extra={"fields": {"response": response_text[:200]}})
         return create_fallback_structure()
         
     except Exception as e:
-        print(f"❌ AI Parsing Critical Error: {e}")
+        log_exception("parse_resume_with_ai", e)
         return create_fallback_structure()
 
+def parse_resumes_with_ai(texts):
+    """
+    Parses several small resumes with one model call. Returns one
+    (parsed_data, failed_sections) per text, in order, as
+    llm_output.validate_resume does; None for a resume the answer lost,
+    which the caller should parse on its own.
+    """
+    raw_texts = "\n".join(texts)
+    texts = [prompt_compactor.compact_resume_text(text) for text in texts]
+    body = "\n".join(f"=== Resume {i + 1} ===\n{text}" for i, text in enumerate(texts))
+    prompt = prompt_compactor.squeeze(f"""
+    You are a resume parser. Below are {len(texts)} resumes, each starting with a "=== Resume N ===" line.
+    Return ONLY a JSON array of exactly {len(texts)} objects, one per resume and in the same order,
+    without Markdown formatting. Each object must have exactly this structure:
+    {PARSE_SCHEMA}
+    {body}
+    """)
+    prompt_compactor.report("parse_batch", raw_texts, body, prompt)
+    
+    try:
+        response_text = llm_client.generate(prompt)
+        with span("json_decode"):
+            decoded, fault = llm_output.loads(response_text, "[")
+        if not isinstance(decoded, list):
+            raise llm_output.LLMOutputError(f"Expected a JSON array, got {type(decoded).__name__}")
+    except llm_output.LLMOutputError as e:
+        log.warning(f"Model answer is not valid JSON: {e}", extra={"fields": {"batch": len(texts)}})
+        return [None] * len(texts)
+    except Exception as e:
+        log_exception("parse_resumes_with_ai", e)
+        return [(create_fallback_structure(), []) for _ in texts]
+    
+    results = []
+    for i in range(len(texts)):
+        value = decoded[i] if i < len(decoded) else None
+        if not isinstance(value, dict):
+            results.append(None)
+            continue
+        # Only the last object of a truncated answer can be incomplete
+        results.append(llm_output.validate_resume(value, truncated=fault == "truncated" and i == len(decoded) - 1))
+    log.info("Parsed resumes in one model call",
+             extra={"fields": {"parsed": sum(r is not None for r in results), "batch": len(texts)}})
+    return results
+
+def _parse_batch(texts):
+    if len(texts) == 1:
+        return [None]  # nothing joined; the caller parses it with the single-resume prompt
+    return parse_resumes_with_ai(texts)
+
+_parse_batcher = MicroBatcher("parse_batch", _parse_batch, PARSE_BATCH_WINDOW_MS / 1000, PARSE_BATCH_MAX_SIZE)
+# Identical texts being parsed at the same moment (double submits, the same file from several users)
+_parse_flight = SingleFlight("parse")
+_parse_flight_async = AsyncSingleFlight("parse_async")
+
+def _parse_with_llm(text):
+    """parse_resume_with_ai, micro-batched with other small resumes when PARSE_BATCH_WINDOW_MS is set"""
+    if PARSE_BATCH_WINDOW_MS and PARSE_BATCH_MAX_SIZE > 1 and llm_client.estimate_tokens(text) <= PARSE_BATCH_MAX_TOKENS:
+        with span("llm_batch"):
+            result = _parse_batcher.submit(text)
+        if result is not None:
+            parsed_data, failed = result
+            # Re-asked from this request's thread, not the one that made the batched call
+            if failed and len(failed) <= SECTION_REASK_LIMIT:
+                parsed_data.update(_reask_sections(prompt_compactor.compact_resume_text(text), failed))
+            return parsed_data
+    return parse_resume_with_ai(text)
+
+def _reask_prompt(text, section):
+    schema = llm_output.RESUME_SCHEMA[section]
+    return prompt_compactor.squeeze(f"""
+    You are a resume parser. From the resume text below, extract ONLY the "{section}" section
+    and return ONLY valid JSON of exactly this shape, without Markdown formatting:
+    {prompt_compactor.compact_json({section: llm_output.schema_example(schema)})}
+    Resume Text:
+    {text}
+    """)
+
+def _decode_section(response_text, section):
+    decoded, _ = llm_output.loads(response_text, "{")
+    value = decoded.get(section) if isinstance(decoded, dict) else None
+    if value is None:
+        return None
+    return llm_output.coerce(value, llm_output.RESUME_SCHEMA[section])
+
+def _reask_section(text, section):
+    """Asks for one section of the (already compacted) text on its own; None if that fails too"""
+    try:
+        return _decode_section(llm_client.generate(_reask_prompt(text, section)), section)
+    except (llm_output.LLMOutputError, ValueError) as e:
+        log.warning(f"Re-asking for '{section}' failed: {e}", extra={"fields": {"section": section}})
+        return None
+    except Exception as e:
+        log_exception(f"reask_section({section})", e)
+        return None
+
+async def _reask_section_async(text, section):
+    try:
+        return _decode_section(await llm_client.generate_async(_reask_prompt(text, section)), section)
+    except (llm_output.LLMOutputError, ValueError) as e:
+        log.warning(f"Re-asking for '{section}' failed: {e}", extra={"fields": {"section": section}})
+        return None
+    except Exception as e:
+        log_exception(f"reask_section({section})", e)
+        return None
+
+def _reask_sections(text, sections):
+    """{section: value} for the sections recovered by asking for each one separately"""
+    log.info("Re-asking the model for sections", extra={"fields": {"sections": list(sections)}})
+    with ThreadPoolExecutor(max_workers=len(sections)) as pool:
+        futures = {section: pool.submit(contextvars.copy_context().run, _reask_section, text, section)
+                   for section in sections}
+    recovered = {}
+    for section, future in futures.items():
+        value = future.result()
+        if value is not None:
+            recovered[section] = value
+    return recovered
+
 def create_fallback_structure():
     """Returns a valid empty structure if parsing fails"""
     return {
@@ -128,23 +391,124 @@ def create_fallback_structure():
         "certifications": []
     }
     
-def parse_resume(filepath):
-    try:
-        if filepath.lower().endswith(".pdf"):
-            text = extract_text_from_pdf(filepath)
-        else:
-            text = extract_text_from_docx(filepath)
-        
-        text = clean_text(text)
-        
-        if not text or len(text) < 50:
-            print("⚠️ Warning: Extracted text is too short")
-            return create_fallback_structure()
-        
+@timed("text_extraction")
+def extract_text(source, parallel=True, filename=None):
+    """Text of a PDF or DOCX given as a path, or as bytes plus the original filename"""
+    if isinstance(source, (bytes, bytearray)):
+        if not filename:
+            raise ValueError("extract_text needs the filename of in-memory bytes to tell PDF from DOCX")
+    else:
+        filename = filename or source
+    if filename.lower().endswith(".pdf"):
+        stats = {}
+        text = extract_text_from_pdf(source, parallel=parallel, stats=stats)
+        slowest = max(stats["page_ms"], default=0)
+        log.info("Extracted PDF text", extra={"fields": {
+            "pages": stats["pages_extracted"], "total_ms": stats["total_ms"], "slowest_page_ms": slowest,
+            "truncated": stats["truncated"]}})
+        return text
+    return extract_text_from_docx(source)
+
+def _parse_without_llm(text, cache, file_hash):
+    """
+    The steps of parse_resume_text that don't need the model:
+    (text_hash, parsed_data, from_cache), parsed_data being None when the
+    text has to go to the LLM.
+    """
+    if not text or len(text) < 50:
+        log.warning("Extracted text is too short")
+        return None, create_fallback_structure(), False
+    
+    text_hash = None
+    if cache is not None:
+        text_hash = hash_text(text)
+        cached = cache.get_by_text(text_hash, file_hash)
+        if cached is not None:
+            return text_hash, cached, True
+    
+    # Cleanly sectioned resumes are handled by the rules in milliseconds
+    local_data, confidence = parse_resume_locally(text)
+    if confidence >= LOCAL_PARSE_MIN_CONFIDENCE:
+        log.info("Parsed resume locally", extra={"fields": {"confidence": confidence}})
+        return text_hash, local_data, False
+    return text_hash or hash_text(text), None, False
+
+def _store(cache, file_hash, text_hash, parsed_data):
+    # Never cache the empty fallback, the next upload should retry the LLM
+    if cache is not None and parsed_data != create_fallback_structure():
+        cache.put(file_hash, text_hash, parsed_data)
+
+def parse_resume_text(text, cache=None, file_hash=None):
+    """
+    Parses already cleaned text into the resume structure. With a ParseCache
+    the same text is only ever sent to the LLM once.
+    """
+    text_hash, parsed_data, from_cache = _parse_without_llm(text, cache, file_hash)
+    if from_cache:
+        return parsed_data
+    if parsed_data is None:
         # We use AI here to guarantee the structure matches what the frontend expects
-        parsed_data = parse_resume_with_ai(text)
+        parsed_data, _ = _parse_flight.do(text_hash, lambda: _parse_with_llm(text))
+    _store(cache, file_hash, text_hash, parsed_data)
+    return parsed_data
+
+async def parse_resume_text_async(text, cache=None, file_hash=None, executor=None):
+    """
+    parse_resume_text for the ASGI app: the rule-based parse and cache
+    lookups run on executor, the LLM call on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    text_hash, parsed_data, from_cache = await loop.run_in_executor(
+        executor, contextvars.copy_context().run, _parse_without_llm, text, cache, file_hash)
+    if from_cache:
         return parsed_data
+    if parsed_data is None:
+        parsed_data, _ = await _parse_flight_async.do(text_hash, lambda: parse_resume_with_ai_async(text))
+    await loop.run_in_executor(executor, _store, cache, file_hash, text_hash, parsed_data)
+    return parsed_data
+
+def _read_source(source, cache, filename):
+    """(file_hash, cached parse or None, cleaned text or None) for parse_resume and its async twin"""
+    in_memory = isinstance(source, (bytes, bytearray))
+    file_hash = None
+    if cache is not None:
+        file_hash = hash_bytes(source) if in_memory else hash_file(source)
+        cached = cache.get_by_file(file_hash)
+        if cached is not None:
+            return file_hash, cached, None
+    return file_hash, None, clean_text(extract_text(source, filename=filename))
+
+def parse_resume(source, cache=None, filename=None):
+    """
+    Extracts and parses a resume, given as a file path or as the uploaded
+    bytes plus their filename (parsed in memory, nothing written to disk).
+    When a ParseCache is given, a repeat of the same file bytes skips
+    extraction and the LLM, and the same text in a different file still
+    skips the LLM.
+    """
+    try:
+        file_hash, cached, text = _read_source(source, cache, filename)
+        if cached is not None:
+            return cached
+        return parse_resume_text(text, cache, file_hash)
         
     except Exception as e:
-        print(f"❌ Error in parse_resume: {e}")
-        return create_fallback_structure()
\ No newline at end of file
+        log_exception("parse_resume", e)
+        return create_fallback_structure()
+
+async def parse_resume_async(source, cache=None, filename=None, executor=None):
+    """
+    parse_resume for the ASGI app: hashing and text extraction (CPU bound)
+    run on executor, so the event loop only ever waits on the model.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        file_hash, cached, text = await loop.run_in_executor(
+            executor, contextvars.copy_context().run, _read_source, source, cache, filename)
+        if cached is not None:
+            return cached
+        return await parse_resume_text_async(text, cache, file_hash, executor)
+        
+    except Exception as e:
+        log_exception("parse_resume", e)
+        return create_fallback_structure()
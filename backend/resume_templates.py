@@ -0,0 +1,136 @@
+# resume_templates.py
+
+import io
+from docx import Document
+from docx.shared import Pt, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+
+DEFAULT_TEMPLATE = "modern"
+
+# Declarative layouts. Everything a renderer needs that doesn't depend on the resume
+# itself lives here and is compiled once at import.
+TEMPLATE_SPECS = {
+    "modern": {
+        "name": "Modern Professional",
+        "description": "Clean, modern design with clear sections",
+        "font": "Helvetica", "bold_font": "Helvetica-Bold", "docx_font": "Calibri",
+        "body_size": 10, "name_size": 24, "heading_size": 14,
+        "accent": "#2c3e50", "heading_border": True, "align_name": "center",
+        "heading_case": "upper",
+        "sections": ("summary", "skills", "experience", "education"),
+    },
+    "classic": {
+        "name": "Classic ATS",
+        "description": "Traditional format optimized for ATS",
+        "font": "Times-Roman", "bold_font": "Times-Bold", "docx_font": "Times New Roman",
+        "body_size": 11, "name_size": 20, "heading_size": 12,
+        "accent": "#000000", "heading_border": False, "align_name": "center",
+        "heading_case": "upper",
+        "sections": ("summary", "experience", "education", "skills"),
+    },
+    "creative": {
+        "name": "Creative Professional",
+        "description": "Eye-catching design while maintaining ATS compatibility",
+        "font": "Helvetica", "bold_font": "Helvetica-Bold", "docx_font": "Calibri",
+        "body_size": 10, "name_size": 26, "heading_size": 13,
+        "accent": "#8e44ad", "heading_border": False, "align_name": "left",
+        "heading_case": "title",
+        "sections": ("summary", "skills", "experience", "education"),
+    },
+}
+
+SECTION_TITLES = {
+    "summary": "Professional Summary",
+    "skills": "Skills",
+    "experience": "Experience",
+    "education": "Education",
+}
+
+PAGE_MARGINS = {"top": 0.5 * inch, "bottom": 0.5 * inch, "left": 0.75 * inch, "right": 0.75 * inch}
+
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+
+class CompiledTemplate:
+    """
+    A template ready to render: reportlab styles built once, and a DOCX base
+    document with the fonts and heading styles already applied, which each
+    render opens as a fresh copy.
+    """
+
+    __slots__ = ("id", "name", "description", "sections", "section_titles", "pdf_styles",
+                 "docx_base", "docx_name_size", "docx_name_alignment", "docx_heading_style_id",
+                 "docx_bullet_style_id")
+
+    def __init__(self, template_id, spec):
+        self.id = template_id
+        self.name = spec["name"]
+        self.description = spec["description"]
+        self.sections = tuple(spec["sections"])
+        titles = {key: title.upper() if spec["heading_case"] == "upper" else title
+                  for key, title in SECTION_TITLES.items()}
+        self.section_titles = titles
+        self.pdf_styles = _compile_pdf_styles(spec)
+        self._compile_docx(spec)
+
+    def _compile_docx(self, spec):
+        doc = Document()
+        normal = doc.styles["Normal"]
+        normal.font.name = spec["docx_font"]
+        normal.font.size = Pt(spec["body_size"] + 1)
+        heading = doc.styles["Heading 1"]
+        heading.font.name = spec["docx_font"]
+        heading.font.color.rgb = RGBColor.from_string(spec["accent"].lstrip("#").upper())
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        self.docx_base = buffer.getvalue()
+        self.docx_name_size = Pt(spec["name_size"])
+        self.docx_name_alignment = (WD_ALIGN_PARAGRAPH.CENTER if spec["align_name"] == "center"
+                                    else WD_ALIGN_PARAGRAPH.LEFT)
+        # Resolved once: python-docx looks a style name up with a scan of every style
+        self.docx_heading_style_id = heading.style_id
+        self.docx_bullet_style_id = doc.styles["List Bullet"].style_id
+
+    def new_docx(self):
+        """A fresh Document with this template's styles"""
+        return Document(io.BytesIO(self.docx_base))
+
+    def info(self):
+        return {"id": self.id, "name": self.name, "description": self.description}
+
+
+def _compile_pdf_styles(spec):
+    accent = colors.HexColor(spec["accent"])
+    name_alignment = TA_CENTER if spec["align_name"] == "center" else TA_LEFT
+    normal = ParagraphStyle("Normal", parent=_SAMPLE_STYLES["Normal"], fontName=spec["font"],
+                            fontSize=spec["body_size"], leading=spec["body_size"] * 1.2)
+    heading = {"fontName": spec["bold_font"], "fontSize": spec["heading_size"], "textColor": accent,
+               "spaceBefore": 12, "spaceAfter": 6}
+    if spec["heading_border"]:
+        heading.update(borderWidth=1, borderColor=accent, borderPadding=5, borderRadius=2)
+    return {
+        "title": ParagraphStyle("Title", parent=_SAMPLE_STYLES["Heading1"], fontName=spec["bold_font"],
+                                fontSize=spec["name_size"], leading=spec["name_size"] * 1.2,
+                                alignment=name_alignment, spaceAfter=10),
+        "h2": ParagraphStyle("H2", parent=_SAMPLE_STYLES["Heading2"], **heading),
+        "normal": normal,
+        "contact": ParagraphStyle("Contact", parent=normal, alignment=name_alignment),
+        "bullet": ParagraphStyle("Bullet", parent=normal, leftIndent=15),
+    }
+
+
+# --- Registry, compiled at import ---
+TEMPLATES = {template_id: CompiledTemplate(template_id, spec) for template_id, spec in TEMPLATE_SPECS.items()}
+
+
+def get_template(template_id):
+    """Compiled template by id; unknown ids fall back to the default layout"""
+    return TEMPLATES.get(template_id) or TEMPLATES[DEFAULT_TEMPLATE]
+
+
+def list_templates():
+    return [template.info() for template in TEMPLATES.values()]
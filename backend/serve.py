@@ -0,0 +1,85 @@
+# serve.py
+
+"""
+Production entry point: `python serve.py`. Serves the app with waitress
+when it is installed, otherwise with Werkzeug's threaded server (no
+debugger, no reloader); DEBUG=true runs the Flask dev server instead. On
+SIGTERM or Ctrl-C new requests get 503 while those in flight and the job
+queue drain (SHUTDOWN_TIMEOUT), then the process exits; a second signal
+exits at once. For several worker processes run gunicorn with
+gunicorn.conf.py. SERVER_MODE=asgi serves asgi_app with uvicorn instead,
+whose lifespan shutdown drains the same way.
+"""
+
+import signal
+import _thread
+import threading
+from app import create_app
+from config import load_config
+from telemetry import log
+
+try:
+    import waitress
+except ImportError:  # optional, Werkzeug's server is used instead
+    waitress = None
+
+
+def make_server(app, config):
+    """(blocking run function, server name)"""
+    host, port = config['HOST'], config['PORT']
+    if waitress is not None:
+        server = waitress.create_server(app, host=host, port=port, threads=config['SERVER_THREADS'])
+        return server.run, "waitress"
+    from werkzeug.serving import make_server as make_werkzeug_server
+    server = make_werkzeug_server(host, port, app, threaded=True)
+    return server.serve_forever, "werkzeug"
+
+
+def serve_asgi(config):
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("❌ SERVER_MODE=asgi needs uvicorn: pip install uvicorn")
+    log.info(f"Serving on http://{config['HOST']}:{config['PORT']} with uvicorn (ASGI)")
+    uvicorn.run("asgi_app:create_app", factory=True, host=config['HOST'], port=config['PORT'], lifespan="on",
+                timeout_graceful_shutdown=int(config['SHUTDOWN_TIMEOUT']))
+
+
+def main():
+    settings = load_config()
+    if settings['SERVER_MODE'] == 'asgi':
+        serve_asgi(settings)
+        return
+    app = create_app()
+    config = app.config
+    if config['DEBUG']:
+        app.run(debug=True, host=config['HOST'], port=config['PORT'])
+        return
+
+    services = app.extensions['resume_builder']
+    run, server_name = make_server(app, config)
+    stopping = threading.Event()
+
+    def drain_and_stop():
+        services.shutdown()
+        _thread.interrupt_main()  # re-enters on_signal, which now stops the server
+
+    def on_signal(signum, frame):
+        if stopping.is_set():
+            raise KeyboardInterrupt
+        stopping.set()
+        log.info(f"Received {signal.Signals(signum).name}, shutting down")
+        # Drain off the main thread: waitress needs it to keep writing responses
+        threading.Thread(target=drain_and_stop, name="drain", daemon=True).start()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    log.info(f"Serving on http://{config['HOST']}:{config['PORT']} with {server_name}")
+    try:
+        run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
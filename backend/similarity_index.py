@@ -0,0 +1,406 @@
+# similarity_index.py
+
+import os
+import re
+import json
+import uuid
+import zlib
+import hashlib
+import threading
+from contextlib import contextmanager
+import numpy as np
+from numpy.lib.format import open_memmap
+from keyword_matcher import resume_text
+from resume_model import as_resume
+from telemetry import log
+
+try:
+    import fcntl
+except ImportError:  # Windows, where there is no gunicorn: one process per index folder
+    fcntl = None
+
+NUM_PERM = 128  # MinHash permutations; estimate error is about 1/sqrt(NUM_PERM)
+BANDS = 32  # LSH bands of ROWS rows: pairs above ~0.42 Jaccard very likely share a bucket
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DUPLICATE_THRESHOLD = 0.8  # estimated Jaccard at which two resumes count as the same candidate
+SAVE_CHUNK = 65536  # rows copied at a time when rewriting the arrays
+INDEX_FORMAT = 2
+_ARRAYS = ("signatures", "band_keys", "band_docs", "contact_keys", "contact_docs", "content_keys", "label_offsets")
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32, so a * x + b never overflows uint64
+_EMPTY = np.uint32(0xFFFFFFFF)  # signature value of a text without shingles
+# Fixed seed: signatures must be comparable across processes and with saved indexes
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, int(_PRIME), NUM_PERM).astype(np.uint64)[:, None]
+_B = _rng.randint(0, int(_PRIME), NUM_PERM).astype(np.uint64)[:, None]
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingle_hashes(text):
+    """crc32 of every run of SHINGLE_WORDS words (stable across runs, unlike hash())"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        words = words and [" ".join(words)]
+        return np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64)
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint32) of the text's word shingles"""
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return np.full(NUM_PERM, _EMPTY, dtype=np.uint32)
+    return ((_A * hashes + _B) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_keys(signatures):
+    """(n, NUM_PERM) signatures -> (n, BANDS) uint64 bucket keys, one per band"""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+    for r in range(ROWS):
+        keys = keys * np.uint64(0x100000001B3) ^ rows[:, :, r]  # FNV-style mix, wrapping
+    return keys
+
+
+def _hash64(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def contact_keys(resume):
+    """[(kind, uint64 key)] for the normalized email and phone number, where present"""
+    info = resume.personal_info
+    keys = []
+    email = info.email.strip().lower()
+    if "@" in email:
+        keys.append(("email", _hash64("email:" + email)))
+    digits = re.sub(r"\D", "", info.phone)
+    if len(digits) >= 7:
+        keys.append(("phone", _hash64("phone:" + digits[-10:])))  # drops country codes
+    return keys
+
+
+def content_key(resume):
+    """uint64 hash of the whole parsed resume, so adding the same one twice is noticed"""
+    return _hash64(resume.to_json())
+
+
+class SimilarityIndex:
+    """
+    Near-duplicate and similar-candidate search over parsed resumes: MinHash
+    signatures of the resume text, bucketed with LSH so a query only looks
+    at the candidates sharing a band, plus exact matches on email and phone.
+    A resume already indexed (same content hash) isn't added again.
+
+    The saved index is a set of .npy arrays (signatures, per band the bucket
+    keys sorted with their doc ids, and the labels as UTF-8 bytes with an
+    offset per resume) opened memory-mapped, so loading is instant and
+    lookups are binary searches that touch a few pages. Resumes added since
+    the last save live in memory until save() merges them in, which happens
+    every autosave_every additions.
+
+    Several processes (server workers, batch_ingest) can share a folder:
+    save() holds an exclusive lock on it, merges into whatever generation is
+    newest on disk, and every process picks up a newer generation on its
+    next lookup, so no worker's additions overwrite another's.
+    """
+
+    def __init__(self, folder=None, threshold=DUPLICATE_THRESHOLD, autosave_every=1000):
+        self.folder = os.path.abspath(folder) if folder else None
+        self.threshold = threshold
+        self.autosave_every = autosave_every
+        self._lock = threading.RLock()
+        self._generation = None
+        self._meta_stamp = None
+        # Saved part, memory-mapped
+        self._signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._band_keys = np.zeros((BANDS, 0), dtype=np.uint64)
+        self._band_docs = np.zeros((BANDS, 0), dtype=np.int64)
+        self._contact_keys = np.zeros(0, dtype=np.uint64)
+        self._contact_docs = np.zeros(0, dtype=np.int64)
+        self._content_keys = np.zeros(0, dtype=np.uint64)  # sorted
+        self._label_offsets = np.zeros(1, dtype=np.int64)
+        self._label_bytes = np.zeros(0, dtype=np.uint8)
+        # Added since the last save. Their doc ids follow the saved ones, so they
+        # are kept by position here and stay valid when a newer generation loads.
+        self._new_labels = []
+        self._new_signatures = []
+        self._new_content_keys = []
+        self._new_content = set()
+        self._new_buckets = {}  # (band, key) -> [positions]
+        self._new_contacts = {}  # key -> [positions]
+        self._new_contact_rows = []  # (key, position), merged into the arrays on save
+        if self.folder:
+            os.makedirs(self.folder, exist_ok=True)
+            self._refresh()
+
+    def __len__(self):
+        return len(self._signatures) + len(self._new_signatures)
+
+    # --- Queries ---
+    def similar(self, resume, top_k=10, min_similarity=0.3):
+        """
+        The most similar indexed resumes as [{"label", "similarity", "match"}],
+        best first. match is "email" or "phone" for a contact match, else "text".
+        """
+        resume = as_resume(resume)
+        sig = signature(resume_text(resume))
+        with self._lock:
+            self._refresh()
+            return self._matches(sig, contact_keys(resume), min_similarity)[:top_k]
+
+    def add(self, resume, label, threshold=None):
+        """
+        Indexes a resume under label and returns the duplicates it has among
+        those indexed before it (same email or phone, or text similarity of
+        at least threshold, by default the index's), as similar() does. A
+        resume that is already indexed, e.g. the same file uploaded again,
+        keeps its one entry.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        resume = as_resume(resume)
+        sig = signature(resume_text(resume))
+        contacts = contact_keys(resume)
+        content = content_key(resume)
+        with self._lock:
+            self._refresh()
+            duplicates = self._matches(sig, contacts, threshold)
+            if self._is_indexed(content):
+                return duplicates
+            position = len(self._new_signatures)
+            self._new_labels.append(label)
+            self._new_signatures.append(sig)
+            self._new_content_keys.append(content)
+            self._new_content.add(content)
+            if sig[0] != _EMPTY:  # empty texts would all share one giant bucket
+                for band, key in enumerate(band_keys(sig[None, :])[0].tolist()):
+                    self._new_buckets.setdefault((band, key), []).append(position)
+            for _, key in contacts:
+                self._new_contacts.setdefault(key, []).append(position)
+                self._new_contact_rows.append((key, position))
+            if self.folder and self.autosave_every and len(self._new_signatures) >= self.autosave_every:
+                self.save()
+        return duplicates
+
+    def _is_indexed(self, content):
+        return content in self._new_content or self._is_saved(content)
+
+    def _is_saved(self, content):
+        i = np.searchsorted(self._content_keys, np.uint64(content))
+        return i < len(self._content_keys) and int(self._content_keys[i]) == content
+
+    def _matches(self, sig, contacts, min_similarity):
+        kinds = {}
+        for kind, key in contacts:
+            for doc_id in self._contact_matches(key):
+                kinds.setdefault(doc_id, kind)
+        candidates = set(kinds)
+        if sig[0] != _EMPTY:
+            candidates.update(self._bucket_matches(band_keys(sig[None, :])[0]))
+        if not candidates:
+            return []
+
+        doc_ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self._signatures_of(doc_ids) == sig).mean(axis=1)
+        matches = []
+        for doc_id, score in zip(doc_ids.tolist(), similarity.tolist()):
+            kind = kinds.get(doc_id)
+            if kind or score >= min_similarity:
+                matches.append({"label": self._label(doc_id), "similarity": round(score, 3),
+                                "match": kind or "text"})
+        matches.sort(key=lambda m: (m["match"] == "text", -m["similarity"]))
+        return matches
+
+    def _bucket_matches(self, keys):
+        saved = len(self._signatures)
+        found = set()
+        for band, key in enumerate(keys.tolist()):
+            row = self._band_keys[band]
+            lo = np.searchsorted(row, np.uint64(key), "left")
+            hi = np.searchsorted(row, np.uint64(key), "right")
+            if hi > lo:
+                found.update(self._band_docs[band, lo:hi].tolist())
+            found.update(saved + i for i in self._new_buckets.get((band, key), ()))
+        return found
+
+    def _contact_matches(self, key):
+        saved = len(self._signatures)
+        lo = np.searchsorted(self._contact_keys, np.uint64(key), "left")
+        hi = np.searchsorted(self._contact_keys, np.uint64(key), "right")
+        return self._contact_docs[lo:hi].tolist() + [saved + i for i in self._new_contacts.get(key, ())]
+
+    def _signatures_of(self, doc_ids):
+        saved = len(self._signatures)
+        found = np.empty((len(doc_ids), NUM_PERM), dtype=np.uint32)
+        old = doc_ids < saved
+        found[old] = self._signatures[doc_ids[old]]
+        if not old.all():
+            found[~old] = np.stack([self._new_signatures[i - saved] for i in doc_ids[~old].tolist()])
+        return found
+
+    def _label(self, doc_id):
+        saved = len(self._signatures)
+        if doc_id >= saved:
+            return self._new_labels[doc_id - saved]
+        start, end = self._label_offsets[doc_id:doc_id + 2].tolist()
+        return self._label_bytes[start:end].tobytes().decode("utf-8")
+
+    # --- Persistence ---
+    def _path(self, name, generation):
+        return os.path.join(self.folder, f"{name}.{generation}.npy")
+
+    @contextmanager
+    def _folder_lock(self, exclusive):
+        """flock on the folder's lock file: one save at a time, and no load while a save removes files"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.folder, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # released when the file is closed
+
+    def _refresh(self):
+        """Loads the generation on disk if another process (or this one) saved a newer one"""
+        if not self.folder:
+            return
+        try:
+            stat = os.stat(os.path.join(self.folder, "meta.json"))
+        except OSError:
+            return
+        # meta.json is replaced on every save, so a new inode means a new generation
+        if (stat.st_ino, stat.st_mtime_ns) != self._meta_stamp:
+            with self._folder_lock(exclusive=False):
+                self._load()
+
+    def _load(self):
+        """Maps the current generation; the caller holds the folder lock"""
+        meta_path = os.path.join(self.folder, "meta.json")
+        try:
+            stat = os.stat(meta_path)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except OSError:
+            return
+        self._meta_stamp = (stat.st_ino, stat.st_mtime_ns)
+        if meta.get("format") != INDEX_FORMAT or meta.get("num_perm") != NUM_PERM or meta.get("bands") != BANDS:
+            log.warning(f"Similarity index at {self.folder} uses another format or MinHash settings, starting empty")
+            return
+        generation = meta["generation"]
+        if generation == self._generation:
+            return
+        self._signatures = np.load(self._path("signatures", generation), mmap_mode="r")
+        self._band_keys = np.load(self._path("band_keys", generation), mmap_mode="r")
+        self._band_docs = np.load(self._path("band_docs", generation), mmap_mode="r")
+        self._contact_keys = np.load(self._path("contact_keys", generation), mmap_mode="r")
+        self._contact_docs = np.load(self._path("contact_docs", generation), mmap_mode="r")
+        self._content_keys = np.load(self._path("content_keys", generation), mmap_mode="r")
+        self._label_offsets = np.load(self._path("label_offsets", generation), mmap_mode="r")
+        labels_path = os.path.join(self.folder, f"labels.{generation}.bin")
+        if self._label_offsets[-1]:
+            self._label_bytes = np.memmap(labels_path, dtype=np.uint8, mode="r")
+        else:
+            self._label_bytes = np.zeros(0, dtype=np.uint8)  # an empty file can't be mapped
+        self._generation = generation
+
+    def save(self):
+        """
+        Merges the resumes added since the last save into a new generation of
+        arrays, built on the newest generation on disk, then switches
+        meta.json to it; a crash midway leaves the previous generation intact.
+        Resumes another process saved meanwhile are not added twice.
+        """
+        if not self.folder:
+            return
+        with self._lock, self._folder_lock(exclusive=True):
+            self._load()
+            keep = [i for i, content in enumerate(self._new_content_keys)
+                    if not self._is_saved(content)]
+            if not keep:
+                self._clear_new()
+                return
+            generation = uuid.uuid4().hex[:12]
+            saved = len(self._signatures)
+            total = saved + len(keep)
+            doc_ids = {position: saved + n for n, position in enumerate(keep)}
+
+            signatures = open_memmap(self._path("signatures", generation), mode="w+",
+                                     dtype=np.uint32, shape=(total, NUM_PERM))
+            for start in range(0, saved, SAVE_CHUNK):
+                end = min(start + SAVE_CHUNK, saved)
+                signatures[start:end] = self._signatures[start:end]
+            signatures[saved:] = np.stack([self._new_signatures[i] for i in keep])
+            signatures.flush()
+
+            keys = np.empty((BANDS, total), dtype=np.uint64)
+            indexed = np.empty(total, dtype=bool)
+            for start in range(0, total, SAVE_CHUNK):
+                chunk = signatures[start:start + SAVE_CHUNK]
+                keys[:, start:start + len(chunk)] = band_keys(chunk).T
+                indexed[start:start + len(chunk)] = chunk[:, 0] != _EMPTY
+            docs = np.flatnonzero(indexed)
+            keys = keys[:, docs]
+            order = np.argsort(keys, axis=1, kind="stable")
+            np.save(self._path("band_keys", generation), np.take_along_axis(keys, order, axis=1))
+            np.save(self._path("band_docs", generation), docs[order])
+
+            new_rows = np.array([(key, doc_ids[i]) for key, i in self._new_contact_rows if i in doc_ids],
+                                dtype=np.uint64).reshape(-1, 2)
+            contact_keys_all = np.concatenate([self._contact_keys, new_rows[:, 0]])
+            contact_docs_all = np.concatenate([self._contact_docs, new_rows[:, 1].astype(np.int64)])
+            order = np.argsort(contact_keys_all, kind="stable")
+            np.save(self._path("contact_keys", generation), contact_keys_all[order])
+            np.save(self._path("contact_docs", generation), contact_docs_all[order])
+
+            new_content = np.array([self._new_content_keys[i] for i in keep], dtype=np.uint64)
+            np.save(self._path("content_keys", generation), np.sort(np.concatenate([self._content_keys, new_content])))
+
+            encoded = [self._new_labels[i].encode("utf-8") for i in keep]
+            with open(os.path.join(self.folder, f"labels.{generation}.bin"), "wb") as f:
+                for start in range(0, len(self._label_bytes), SAVE_CHUNK * 16):
+                    f.write(self._label_bytes[start:start + SAVE_CHUNK * 16].tobytes())
+                f.write(b"".join(encoded))
+            lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+            np.save(self._path("label_offsets", generation),
+                    np.concatenate([self._label_offsets, self._label_offsets[-1] + np.cumsum(lengths)]))
+
+            meta = {"generation": generation, "format": INDEX_FORMAT, "num_perm": NUM_PERM, "bands": BANDS,
+                    "resumes": total}
+            tmp_path = os.path.join(self.folder, f"meta.json.{generation}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(self.folder, "meta.json"))
+
+            del signatures
+            self._clear_new()
+            self._load()
+            self._remove_other_generations(generation)
+            log.info("Saved similarity index", extra={"fields": {"resumes": total}})
+
+    def _clear_new(self):
+        self._new_labels = []
+        self._new_signatures = []
+        self._new_content_keys = []
+        self._new_content = set()
+        self._new_buckets = {}
+        self._new_contacts = {}
+        self._new_contact_rows = []
+
+    def _remove_other_generations(self, generation):
+        """Processes still on an older generation have it mapped, which outlives its files"""
+        current = {self._path(name, generation) for name in _ARRAYS}
+        current.add(os.path.join(self.folder, f"labels.{generation}.bin"))
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith((".npy", ".bin")) and entry.path not in current:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass  # still mapped on platforms that lock open files; removed next time
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resumes": len(self),
+                "unsaved": len(self._new_signatures),
+                "path": self.folder
+            }
@@ -0,0 +1,162 @@
+# static_assets.py
+
+import os
+import re
+import gzip
+import time
+import hashlib
+import mimetypes
+import threading
+from flask import Response
+from telemetry import log
+
+try:
+    import brotli
+except ImportError:  # optional; without it assets are precompressed with gzip only
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # fingerprinted URLs never change content
+MIN_COMPRESS_BYTES = 512  # smaller files gain less than the Content-Encoding header costs
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# Files whose references to other assets are rewritten to fingerprinted URLs, in build order:
+# a file is only hashed once everything it can reference has its final name
+REWRITE_ORDER = {".css": 1, ".js": 2, ".html": 3}
+ENTRY_EXTENSIONS = {".html"}  # pages keep their URL (they are linked and bookmarked); revalidated each time
+
+
+class Asset:
+    __slots__ = ("mimetype", "etag", "variants")
+
+    def __init__(self, mimetype, etag, variants):
+        self.mimetype = mimetype
+        self.etag = etag
+        self.variants = variants  # content coding ("identity", "gzip", "br") -> bytes
+
+
+class AssetStore:
+    """
+    The frontend, read once at startup and served from memory. Each file
+    is hashed and also published under a fingerprinted name (style.css ->
+    style.<hash>.css) that HTML, CSS and JS references are rewritten to, so
+    it can be cached forever (Cache-Control: immutable). Pages keep their
+    names and are revalidated with their ETag (304 when unchanged).
+    Compressible files are gzip- and, with the brotli package, brotli-
+    compressed at build time, so requests never compress anything.
+    Range requests are honored on the uncompressed bytes.
+    """
+
+    def __init__(self, root, precompress=True):
+        self.root = os.path.abspath(root)
+        self.precompress = precompress
+        self.fingerprints = {}  # path -> fingerprinted path
+        self._assets = {}  # URL path (original or fingerprinted) -> (Asset, immutable)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "not_modified": 0, "partial": 0, "bytes_sent": 0,
+                       "bytes_uncompressed": 0, "serve_seconds": 0.0}
+        self.build_ms = 0.0
+        self._build()
+
+    def _build(self):
+        started = time.perf_counter()
+        paths = []
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                paths.append(os.path.relpath(os.path.join(folder, name), self.root).replace(os.sep, "/"))
+        for path in sorted(paths, key=lambda p: (REWRITE_ORDER.get(os.path.splitext(p)[1].lower(), 0), p)):
+            with open(os.path.join(self.root, path), "rb") as f:
+                data = f.read()
+            stem, ext = os.path.splitext(path)
+            ext = ext.lower()
+            if ext in REWRITE_ORDER:
+                data = self._rewrite_references(data)
+            digest = hashlib.sha256(data).hexdigest()
+            mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            asset = Asset(mimetype, digest[:32], self._encode(data, mimetype))
+            self._assets[path] = (asset, False)
+            if ext not in ENTRY_EXTENSIONS:
+                fingerprinted = f"{stem}.{digest[:10]}{ext}"
+                self.fingerprints[path] = fingerprinted
+                self._assets[fingerprinted] = (asset, True)
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+        log.info("Prepared frontend files", extra={"fields": {"files": len(paths), "build_ms": self.build_ms}})
+
+    def _rewrite_references(self, data):
+        """Points quoted (or url()) references to already fingerprinted files at their new names"""
+        if not self.fingerprints:
+            return data
+        names = sorted(self.fingerprints, key=len, reverse=True)
+        pattern = re.compile(r"(?<=[\"'(])(?:" + "|".join(re.escape(n) for n in names) + r")(?=[\"')?#])")
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return data
+        return pattern.sub(lambda m: self.fingerprints[m.group(0)], text).encode("utf-8")
+
+    def _encode(self, data, mimetype):
+        variants = {"identity": data}
+        if not self.precompress or len(data) < MIN_COMPRESS_BYTES or not mimetype.startswith(COMPRESSIBLE_TYPES):
+            return variants
+        candidates = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            candidates["br"] = brotli.compress(data, quality=11)
+        for coding, encoded in candidates.items():
+            if len(encoded) < len(data):
+                variants[coding] = encoded
+        return variants
+
+    def response(self, request, path):
+        """The Response for a frontend path, or None when there is no such file"""
+        entry = self._assets.get(path)
+        if entry is None:
+            return None
+        started = time.perf_counter()
+        asset, immutable = entry
+        coding = self._negotiate(asset, request)
+        body = asset.variants[coding]
+
+        response = Response(body, mimetype=asset.mimetype)
+        # Each encoding is a different representation, so it gets its own strong ETag
+        response.set_etag(asset.etag if coding == "identity" else f"{asset.etag}-{coding}")
+        if coding != "identity":
+            response.headers["Content-Encoding"] = coding
+        if len(asset.variants) > 1:
+            response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        if immutable:
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        # 304 for a matching If-None-Match, 206 for a satisfiable Range
+        response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+
+        sent = 0 if response.status_code == 304 or request.method == "HEAD" else response.content_length or 0
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["not_modified"] += response.status_code == 304
+            self._stats["partial"] += response.status_code == 206
+            self._stats["bytes_sent"] += sent
+            self._stats["bytes_uncompressed"] += len(asset.variants["identity"]) if request.method != "HEAD" else 0
+            self._stats["serve_seconds"] += time.perf_counter() - started
+        return response
+
+    @staticmethod
+    def _negotiate(asset, request):
+        # Ranges address the uncompressed bytes, which every client can reassemble
+        if "Range" in request.headers:
+            return "identity"
+        accepted = request.accept_encodings
+        for coding in ("br", "gzip"):
+            if coding in asset.variants and accepted[coding] > 0:
+                return coding
+        return "identity"
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["files"] = sum(1 for _, immutable in self._assets.values() if not immutable)
+        stats["bytes_saved"] = stats["bytes_uncompressed"] - stats["bytes_sent"]
+        stats["serve_seconds"] = round(stats["serve_seconds"], 4)
+        stats["build_ms"] = self.build_ms
+        stats["brotli"] = brotli is not None
+        return stats
@@ -0,0 +1,270 @@
+# telemetry.py
+
+import os
+import sys
+import json
+import time
+import uuid
+import bisect
+import logging
+import threading
+import traceback
+import functools
+import contextvars
+from contextlib import contextmanager
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+
+# Seconds; spans range from sub-millisecond scoring to minute-long LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# --- Metrics (Prometheus text exposition format, no client library needed) ---
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_label_text(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect and three additions under a lock"""
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        slot = bisect.bisect_left(self.buckets, value)  # first bucket with bound >= value
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 3)
+            series[slot] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        names = self.labels + ("le",)
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_label_text(names, label_values + (le,))} {cumulative}")
+            label_text = _label_text(self.labels, label_values)
+            lines.append(f"{self.name}_count{label_text} {series[-2]}")
+            lines.append(f"{self.name}_sum{label_text} {round(series[-1], 6)}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("resume_http_request_duration_seconds", "HTTP request latency",
+                            ("method", "route", "status"))
+REQUESTS_TOTAL = Counter("resume_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+STAGE_SECONDS = Histogram("resume_stage_duration_seconds", "Time spent per pipeline stage", ("stage",))
+STAGE_ERRORS = Counter("resume_stage_errors_total", "Pipeline stages that raised", ("stage",))
+PROMPT_TOKENS = Counter("resume_prompt_input_tokens_total", "Estimated prompt input tokens before and after compaction",
+                        ("call", "stage"))
+
+_collectors = []
+
+
+def register_collector(collect):
+    """
+    Adds a callable run at scrape time that returns gauge samples as
+    [(name, help, value), ...], for stats other modules already keep.
+    """
+    _collectors.append(collect)
+
+
+def render_metrics():
+    lines = []
+    for metric in (REQUEST_SECONDS, REQUESTS_TOTAL, STAGE_SECONDS, STAGE_ERRORS, PROMPT_TOKENS):
+        lines.extend(metric.render())
+    seen = set()
+    for collect in _collectors:
+        try:
+            samples = collect()
+        except Exception as e:
+            log.warning("metrics collector failed", extra={"fields": {"error": str(e)}})
+            continue
+        for name, help_text, value in samples:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Request context and spans ---
+class RequestContext:
+    __slots__ = ("request_id", "started", "spans")
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans = []  # (stage, seconds); list.append is atomic, worker threads may add to it
+
+
+_current = contextvars.ContextVar("request_context", default=None)
+
+
+def current_request_id():
+    context = _current.get()
+    return context.request_id if context else None
+
+
+@contextmanager
+def span(stage):
+    """Times a block as one pipeline stage, for the metrics and the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage)
+        context = _current.get()
+        if context is not None:
+            context.spans.append((stage, seconds))
+
+
+def timed(stage):
+    """Decorator form of span()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Structured logging ---
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id and any extra 'fields'"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = current_request_id()
+        if request_id:
+            entry["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+log = logging.getLogger("resume_builder")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(JsonFormatter())
+    log.addHandler(_handler)
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+
+
+def log_exception(where, error):
+    """Replacement for print + traceback.print_exc in request handlers"""
+    log.error(f"Error in {where}: {error}", exc_info=error, extra={"fields": {"where": where}})
+
+
+# --- Request lifecycle, shared by the Flask and ASGI apps ---
+def start_request(request_id=None):
+    """Opens the context the request's spans are recorded in; returns the token for end_request"""
+    return _current.set(RequestContext((request_id or uuid.uuid4().hex)[:64]))
+
+
+def finish_request(response, method, route):
+    """Records the request's metrics and access log line, and adds its id and Server-Timing headers"""
+    context = _current.get()
+    if context is None:
+        return response
+    seconds = time.perf_counter() - context.started
+    status = str(response.status_code)
+    REQUEST_SECONDS.observe(seconds, method, route, status)
+    REQUESTS_TOTAL.inc(method, route, status)
+
+    response.headers["X-Request-ID"] = context.request_id
+    spans = list(context.spans)
+    if spans:
+        response.headers["Server-Timing"] = ", ".join(
+            f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in spans)
+    if ACCESS_LOG and route != "/metrics":
+        log.info("request", extra={"fields": {
+            "method": method, "route": route, "status": response.status_code,
+            "duration_ms": round(seconds * 1000, 2),
+            "spans": [{"stage": stage, "ms": round(s * 1000, 2)} for stage, s in spans]
+        }})
+    return response
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+# --- Flask integration ---
+def init_app(app):
+    """
+    Gives every request an id (taken from X-Request-ID when the caller sends
+    one), times it, and returns the id plus a Server-Timing breakdown of its
+    spans in the response headers.
+    """
+    from flask import request, g
+
+    @app.before_request
+    def _start_request():
+        g.telemetry_token = start_request(request.headers.get("X-Request-ID"))
+
+    @app.after_request
+    def _finish_request(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        return finish_request(response, request.method, route)
+
+    @app.teardown_request
+    def _end_request(error=None):
+        token = g.pop("telemetry_token", None)
+        if token is not None:
+            end_request(token)
@@ -0,0 +1,68 @@
+# conftest.py
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+# The backend modules import each other by bare name; run without a model
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+# Whatever a test starts, nothing is written into the source tree
+_scratch = tempfile.mkdtemp(prefix="resume-builder-tests-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+for _name, _path in (("UPLOAD_FOLDER", "uploads"), ("OUTPUT_FOLDER", "generated"),
+                     ("PARSE_CACHE_PATH", "parse_cache.sqlite3"), ("SIMILARITY_INDEX_PATH", "similarity_index"),
+                     ("JOB_DB_PATH", "jobs.sqlite3")):
+    os.environ[_name] = os.path.join(_scratch, _path)
+
+import pytest
+
+SAMPLE_RESUME = {
+    "personal_info": {"name": "Ada Lovelace", "email": "ada@example.com", "phone": "", "location": "London",
+                      "linkedin": "", "github": ""},
+    "summary": "Engineer who builds data pipelines in Python.",
+    "skills": ["Python", "SQL", "Docker"],
+    "experience": [{"title": "Engineer", "company": "Analytical Engines", "duration": "2020 - 2024",
+                    "description": ["Built ETL jobs in Python", "Ran Postgres on Docker"]}],
+    "education": [],
+    "projects": [],
+    "certifications": [],
+}
+
+
+@pytest.fixture(autouse=True)
+def no_default_app():
+    """The default app (app.app) keeps its caches, uploads and jobs inside the source tree"""
+    yield
+    app_module = sys.modules.get("app")
+    assert app_module is None or "app" not in vars(app_module), "build the app with make_app, not app.app"
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """create_app with every path under tmp_path; keyword arguments override settings"""
+    from app import create_app
+
+    apps = []
+
+    def make(**overrides):
+        settings = dict(
+            UPLOAD_FOLDER=str(tmp_path / "uploads"),
+            OUTPUT_FOLDER=str(tmp_path / "generated"),
+            PARSE_CACHE_PATH=str(tmp_path / "parse_cache.sqlite3"),
+            SIMILARITY_INDEX_PATH=str(tmp_path / "similarity_index"),
+            JOB_DB_PATH=str(tmp_path / "jobs.sqlite3"),
+            STATIC_PRECOMPRESS=False,
+            SHUTDOWN_TIMEOUT=5.0,
+        )
+        settings.update(overrides)
+        app = create_app(**settings)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        app.extensions['resume_builder'].shutdown(timeout=5)
@@ -0,0 +1,77 @@
+# test_admission.py
+
+import threading
+import time
+
+import pytest
+
+from backpressure import ConcurrencyLimit, Overloaded, RequestGate
+from conftest import SAMPLE_RESUME
+
+
+def test_limit_sheds_when_slots_and_queue_are_full():
+    limit = ConcurrencyLimit("test", 1, 0, max_wait=0.05)
+    limit.acquire()
+    with pytest.raises(Overloaded):
+        limit.acquire()
+    limit.release()
+    limit.acquire()
+    limit.release()
+    assert limit.stats()["running"] == 0
+
+
+def test_released_slot_goes_to_a_queued_request():
+    limit = ConcurrencyLimit("test", 1, 1, max_wait=5)
+    limit.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        limit.acquire()
+        admitted.set()
+        limit.release()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    limit.release()
+    assert admitted.wait(5)
+    thread.join()
+
+
+def test_gate_close_waits_for_requests_in_flight():
+    gate = RequestGate()
+    assert gate.enter()
+    threading.Timer(0.05, gate.exit).start()
+    assert gate.close(timeout=5)
+    assert not gate.enter()
+
+
+@pytest.mark.parametrize("route", ["download", "render"])
+def test_file_responses_release_their_slot(make_app, route):
+    # send_file bodies are direct_passthrough; closing them must still free the cpu slot and the gate
+    app = make_app(CPU_ENDPOINT_CONCURRENCY=2, CPU_ENDPOINT_QUEUE=0, ADMISSION_MAX_WAIT=0.1)
+    svc = app.extensions['resume_builder']
+    client = app.test_client()
+
+    if route == "download":
+        with client.post("/api/generate", json={"resume_data": SAMPLE_RESUME, "formats": ["docx"]}) as generated:
+            assert generated.status_code == 200
+            filename = generated.get_json()["files"]["docx"]
+
+        def fetch():
+            return client.get(f"/api/download/{filename}")
+    else:
+        def fetch():
+            return client.post("/api/render", json={"resume_data": SAMPLE_RESUME, "format": "docx"})
+
+    for _ in range(svc.config['CPU_ENDPOINT_CONCURRENCY'] + 1):
+        with fetch() as response:
+            assert response.status_code == 200
+            assert response.data
+
+    assert svc.limits["cpu"].stats()["running"] == 0
+    assert svc.gate.stats()["in_flight"] == 0
+    with client.post("/api/score/batch", json={"resumes": [SAMPLE_RESUME], "job_description": "Python"}) as scored:
+        assert scored.status_code == 200
+    assert svc.shutdown(timeout=1)
@@ -0,0 +1,178 @@
+# test_ai_enhancer.py
+
+import asyncio
+import json
+import threading
+import uuid
+
+import pytest
+
+import ai_enhancer
+import llm_client
+from conftest import SAMPLE_RESUME
+
+
+class RewritingBackend(llm_client.StubBackend):
+    """Answers every enhance prompt with its items upper-cased; holds the first call open until released"""
+
+    def __init__(self, hold_first=False):
+        super().__init__()
+        self.prompts = []
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def _respond(self, prompt):
+        self.prompts.append(prompt)
+        return json.dumps([item.upper() for item in json.loads(super()._respond(prompt))])
+
+    def stream(self, prompt, timeout):
+        first = not self.prompts
+        for chunk in super().stream(prompt, timeout):
+            if isinstance(chunk, tuple) and first:
+                self.release.wait(5)
+            yield chunk
+
+
+@pytest.fixture
+def backend():
+    previous = llm_client.get_client()
+    backend = RewritingBackend()
+    llm_client.set_client(llm_client.LLMClient(backend))
+    yield backend
+    llm_client.set_client(previous)
+
+
+def fresh_resume(jobs=1):
+    # Text no other test has enhanced, so nothing comes from the memo
+    resume = json.loads(json.dumps(SAMPLE_RESUME))
+    resume["summary"] = f"Engineer {uuid.uuid4().hex}"
+    resume["skills"] = ["Python", f"skill-{uuid.uuid4().hex}"]
+    resume["experience"] = [{"title": "Engineer", "company": f"Company {i}", "duration": "",
+                             "description": [f"Built job {uuid.uuid4().hex}"]} for i in range(jobs)]
+    resume["education"] = [{"degree": "BSc", "institution": "Cambridge", "year": "2010", "gpa": ""}]
+    return resume
+
+
+def test_summary_skills_and_bullets_are_rewritten(backend):
+    resume = fresh_resume()
+    enhanced = ai_enhancer.enhance_resume_content(resume, "Senior Python engineer").to_dict()
+
+    assert enhanced["summary"] == resume["summary"].upper()
+    assert enhanced["skills"] == [skill.upper() for skill in resume["skills"]]
+    assert enhanced["experience"][0]["description"] == [resume["experience"][0]["description"][0].upper()]
+    assert enhanced["education"] == resume["education"]
+    assert enhanced["personal_info"] == resume["personal_info"]
+    assert any("skill" in prompt and "Senior Python engineer" in prompt for prompt in backend.prompts)
+
+
+def test_only_changed_bullets_reach_the_model(backend):
+    resume = fresh_resume()
+    ai_enhancer.enhance_resume_content(resume, "Data engineer")
+    calls = len(backend.prompts)
+    assert calls == 3
+
+    ai_enhancer.enhance_resume_content(resume, "Data engineer")
+    assert len(backend.prompts) == calls
+
+    edited = json.loads(json.dumps(resume))
+    edited["experience"][0]["description"].append("Wrote the new bullet")
+    enhanced = ai_enhancer.enhance_resume_content(edited, "Data engineer")
+    assert len(backend.prompts) == calls + 1
+    assert "Wrote the new bullet" in backend.prompts[-1]
+    assert resume["experience"][0]["description"][0] not in backend.prompts[-1]
+    assert enhanced.experience[0].description[1] == "WROTE THE NEW BULLET"
+
+    # The same text under another job description is a different rewrite
+    ai_enhancer.enhance_resume_content(resume, "Frontend developer")
+    assert len(backend.prompts) == calls + 4
+
+
+def test_closing_the_stream_drops_sections_not_started(monkeypatch):
+    monkeypatch.setattr(ai_enhancer, "ENHANCE_CONCURRENCY", 1)
+    previous = llm_client.get_client()
+    backend = RewritingBackend(hold_first=True)
+    llm_client.set_client(llm_client.LLMClient(backend))
+    try:
+        events = ai_enhancer.iter_enhancement_events(fresh_resume(jobs=6), "Backend engineer")
+        assert next(events)[0] == "item"
+        events.close()  # what the server does when the SSE client disconnects
+        backend.release.set()
+        for _ in range(50):
+            if llm_client.metrics()["in_flight"] == 0:
+                break
+            threading.Event().wait(0.02)
+        threading.Event().wait(0.1)
+    finally:
+        llm_client.set_client(previous)
+    assert len(backend.prompts) == 1
+
+
+def test_skills_are_matched_to_the_job_description(backend):
+    resume = fresh_resume()
+    ai_enhancer.enhance_resume_content(resume, "Kubernetes platform engineer")
+    [skills_prompt] = [prompt for prompt in backend.prompts if "Rewrite each skill " in prompt]
+    assert "use the Job Description's name for it" in skills_prompt
+    assert "Kubernetes platform engineer" in skills_prompt
+    assert all("short skill name" not in prompt for prompt in backend.prompts if prompt != skills_prompt)
+
+
+class ScriptedBackend(llm_client.StubBackend):
+    """Answers with the given responses in turn"""
+
+    def __init__(self, *responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.prompts = []
+
+    def _respond(self, prompt):
+        self.prompts.append(prompt)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def scripted():
+    previous = llm_client.get_client()
+
+    def install(*responses):
+        backend = ScriptedBackend(*responses)
+        llm_client.set_client(llm_client.LLMClient(backend))
+        return backend
+
+    yield install
+    llm_client.set_client(previous)
+
+
+def bullets_only(items):
+    resume = fresh_resume()
+    resume.update(summary="", skills=[])
+    resume["experience"][0]["description"] = items
+    return resume
+
+
+def test_items_a_truncated_answer_lost_are_asked_for_again(scripted):
+    backend = scripted('["FIRST", "SEC', '["SECOND", "THIRD"]')
+    resume = bullets_only([f"first {uuid.uuid4().hex}", f"second {uuid.uuid4().hex}", f"third {uuid.uuid4().hex}"])
+    enhanced = ai_enhancer.enhance_resume_content(resume, "Data engineer")
+    assert enhanced.experience[0].description == ["FIRST", "SECOND", "THIRD"]
+    assert resume["experience"][0]["description"][0] not in backend.prompts[1]
+
+
+def test_originals_are_kept_when_the_model_fails(scripted):
+    items = [f"first {uuid.uuid4().hex}", f"second {uuid.uuid4().hex}"]
+    scripted("not json", "still not json")
+    assert ai_enhancer.enhance_resume_content(bullets_only(items), "").experience[0].description == items
+
+    scripted(ValueError("model exploded"))
+    assert ai_enhancer.enhance_resume_content(bullets_only(items), "").experience[0].description == items
+
+
+def test_async_enhancement_matches_sync(backend):
+    resume = fresh_resume(jobs=2)
+    enhanced = asyncio.run(ai_enhancer.enhance_resume_content_async(resume, "Platform engineer"))
+    calls = len(backend.prompts)
+    assert enhanced == ai_enhancer.enhance_resume_content(resume, "Platform engineer")
+    assert len(backend.prompts) == calls  # the sync call was answered from the memo
@@ -0,0 +1,92 @@
+# test_artifact_store.py
+
+import threading
+
+import pytest
+
+from artifact_store import ArtifactStore
+
+
+def write(content):
+    def render(path):
+        with open(path, "w") as f:
+            f.write(content)
+    return render
+
+
+def test_hits_share_one_file(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    name = ArtifactStore.content_key({"a": 1, "b": 2}) + ".txt"
+    assert name == ArtifactStore.content_key({"b": 2, "a": 1}) + ".txt"
+
+    path = store.get_or_create(name, write("first"))
+    assert store.get_or_create(name, write("second")) == path
+    assert open(path).read() == "first"
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+    assert ArtifactStore(str(tmp_path)).get(name) == path
+
+
+def test_failed_render_leaves_no_lock_or_file(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+
+    def fail(path):
+        open(path, "w").close()
+        raise RuntimeError("render failed")
+
+    for i in range(3):
+        with pytest.raises(RuntimeError):
+            store.get_or_create(f"doc-{i}.pdf", fail)
+    assert store._key_locks == {}
+    assert list(tmp_path.iterdir()) == []
+
+    path = store.get_or_create("doc-0.pdf", write("ok"))
+    assert open(path).read() == "ok"
+    assert store._key_locks == {}
+
+
+def test_concurrent_misses_render_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(path):
+        calls.append(path)
+        started.set()
+        release.wait(5)
+        write("done")(path)
+
+    first = threading.Thread(target=store.get_or_create, args=("doc.pdf", slow))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=store.get_or_create, args=("doc.pdf", slow))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert len(calls) == 1
+    assert store._key_locks == {}
+
+
+def test_lru_eviction_keeps_the_byte_budget(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10)
+    store.get_or_create("a", write("12345"))
+    store.get_or_create("b", write("12345"))
+    store.get("a")
+    store.get_or_create("c", write("12345"))
+    assert store.get("b") is None
+    assert store.get("a") and store.get("c")
+    assert store.stats()["evictions"] == 1
+
+
+def test_files_written_by_another_worker_are_found(tmp_path):
+    # Two gunicorn workers share one folder, each with its own index
+    first = ArtifactStore(str(tmp_path))
+    second = ArtifactStore(str(tmp_path))
+    path = first.get_or_create("f.pdf", write("pdf"))
+
+    assert second.get("f.pdf") == path
+    assert second.get_or_create("f.pdf", write("other")) == path
+    assert open(path).read() == "pdf"
+    assert second.stats()["files"] == 1 and second.stats()["bytes"] == 3
+    assert second.get("missing.pdf") is None
@@ -0,0 +1,94 @@
+# test_asgi.py
+
+import asyncio
+import json
+import uuid
+
+import pytest
+
+import llm_client
+from asgi_app import AsyncApp
+from conftest import SAMPLE_RESUME
+
+
+class SlowBackend(llm_client.StubBackend):
+    """The stub model, slow enough to disconnect mid-call, counting calls that were cancelled"""
+
+    def __init__(self, latency):
+        super().__init__(latency)
+        self.started = 0
+        self.cancelled = 0
+
+    async def generate_async(self, prompt, timeout):
+        self.started += 1
+        try:
+            return await super().generate_async(prompt, timeout)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+@pytest.fixture
+def slow_backend():
+    previous = llm_client.get_client()
+    backend = SlowBackend(latency=5)
+    llm_client.set_client(llm_client.LLMClient(backend))
+    yield backend
+    llm_client.set_client(previous)
+
+
+def fresh_resume():
+    # Bullets no earlier test has enhanced, so nothing comes from the memo
+    resume = json.loads(json.dumps(SAMPLE_RESUME))
+    resume["summary"] = f"Engineer {uuid.uuid4().hex}"
+    resume["experience"][0]["description"] = [f"Built job {uuid.uuid4().hex}"]
+    return resume
+
+
+async def call(app, path, payload, disconnect_after_start=False):
+    body = json.dumps(payload).encode("utf-8")
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"",
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]}
+    gone = asyncio.Event()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if disconnect_after_start and message["type"] == "http.response.start":
+            gone.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=4)
+    return sent
+
+
+def test_stream_disconnect_cancels_model_calls(make_app, slow_backend):
+    app = AsyncApp(make_app())
+
+    async def scenario():
+        sent = await call(app, "/api/enhance/stream", {"resume_data": fresh_resume()}, disconnect_after_start=True)
+        await asyncio.sleep(0.05)  # cancellations are delivered on the next loop passes
+        return sent
+
+    sent = asyncio.run(scenario())
+    assert sent[0]["status"] == 200
+    assert slow_backend.started >= 1
+    assert slow_backend.cancelled == slow_backend.started
+    assert app.llm_limit.stats()["running"] == 0
+    assert app.services.gate.stats()["in_flight"] == 0
+
+
+def test_enhance_answers_like_the_flask_app(make_app):
+    flask_app = make_app()
+    app = AsyncApp(flask_app)
+    payload = {"resume_data": fresh_resume(), "job_description": "Python engineer"}
+    sent = asyncio.run(call(app, "/api/enhance", payload))
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    with flask_app.test_client().post("/api/enhance", json=payload) as expected:
+        assert json.loads(body) == expected.get_json()
@@ -0,0 +1,72 @@
+# test_batch_ingest.py
+
+import io
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+from docx import Document
+
+import batch_ingest
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_unpack_zip_extracts_only_resumes_with_safe_names(tmp_path):
+    archive = make_zip({"a/cv.pdf": b"%PDF-1.4 x", "../../evil.docx": b"PK x", "notes.txt": b"skip"})
+    paths = batch_ingest.unpack_zip(archive, str(tmp_path))
+    assert sorted(os.path.basename(p) for p in paths) == ["cv.pdf", "evil.docx"]
+    assert all(os.path.dirname(p) == str(tmp_path) for p in paths)
+
+
+@pytest.mark.parametrize("members, limits", [
+    ({f"{i}.pdf": b"x" for i in range(5)}, {"max_entries": 4}),
+    ({"bomb.pdf": b"\0" * 1_000_000}, {"max_ratio": 100}),
+    ({"a.pdf": os.urandom(600), "b.pdf": os.urandom(600)}, {"max_bytes": 1000}),
+])
+def test_unpack_zip_rejects_archives_over_the_limits_before_writing(tmp_path, members, limits):
+    with pytest.raises(batch_ingest.ArchiveRejected):
+        batch_ingest.unpack_zip(make_zip(members), str(tmp_path), **limits)
+    assert os.listdir(tmp_path) == []
+
+
+def test_batch_endpoint_answers_413_for_a_zip_bomb(make_app):
+    client = make_app().test_client()
+    archive = make_zip({"bomb.pdf": b"\0" * 1_000_000})
+    with client.post("/api/upload/batch", data={"files": (archive, "bomb.zip")}) as response:
+        assert response.status_code == 413
+
+
+def test_closing_the_batch_early_cancels_the_files_not_started(tmp_path, monkeypatch):
+    document = Document()
+    document.add_paragraph("Ada Lovelace")
+    paths = []
+    for i in range(6):
+        path = str(tmp_path / f"resume_{i}.docx")
+        document.save(path)
+        paths.append(path)
+
+    parsed = []
+    lock = threading.Lock()
+
+    def slow_parse(filename, *args):
+        time.sleep(0.2)
+        with lock:
+            parsed.append(filename)
+        return {"filename": filename, "success": True}
+
+    monkeypatch.setattr(batch_ingest, "_parse", slow_parse)
+    results = batch_ingest.ingest_batch(paths, extract_workers=2, llm_concurrency=1)
+    first = next(results)
+    results.close()
+    assert first["success"]
+    assert len(parsed) < len(paths)
@@ -0,0 +1,110 @@
+# test_coalesce.py
+
+import asyncio
+import threading
+import time
+
+from llm_coalesce import AsyncSingleFlight, MicroBatcher, SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_run():
+    flight = SingleFlight("test_sync")
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"value": 1}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True]
+    # Each caller gets its own copy
+    assert results[0][0] == results[1][0] and results[0][0] is not results[1][0]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_items_submitted_within_the_window_share_one_batch():
+    batches = []
+
+    def run_batch(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test_batch", run_batch, window=5, max_size=3)
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.update({n: batcher.submit(n)})) for n in (1, 2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The third item fills the batch, so nobody waits out the window
+    assert len(batches) == 1 and sorted(batches[0]) == [1, 2, 3]
+    assert results == {1: 2, 2: 4, 3: 6}
+    assert batcher.stats() == {"batches": 1, "items": 3, "avg_batch_size": 3.0}
+
+
+class Call:
+    """A slow coroutine that records whether it finished or was cancelled"""
+
+    def __init__(self):
+        self.runs = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return ["done"]
+
+
+def test_async_call_keeps_running_while_someone_waits():
+    async def scenario():
+        flight = AsyncSingleFlight("test_async_shared")
+        call = Call()
+        leader = asyncio.ensure_future(flight.do("key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", call))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        result, shared = await follower
+        return call, result, shared, leader
+
+    call, result, shared, leader = asyncio.run(scenario())
+    assert call.runs == 1 and not call.cancelled
+    assert result == ["done"] and shared
+    assert leader.cancelled()
+
+
+def test_async_call_is_cancelled_with_its_last_waiter():
+    async def scenario():
+        flight = AsyncSingleFlight("test_async_abandoned")
+        call = Call()
+        waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        # A new caller starts a fresh call instead of joining the cancelled one
+        result = await flight.do("key", call)
+        return flight, call, result
+
+    flight, call, result = asyncio.run(scenario())
+    assert call.cancelled
+    assert call.runs == 2 and result == (["done"], False)
+    assert flight.stats()["cancelled"] == 1 and flight.stats()["in_flight"] == 0
@@ -0,0 +1,42 @@
+# test_generate.py
+
+import os
+
+import resume_generator
+from conftest import SAMPLE_RESUME
+
+
+def test_render_document_streams_from_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for fmt, magic in (("pdf", b"%PDF"), ("docx", b"PK")):
+        document = resume_generator.render_document(SAMPLE_RESUME, "classic", fmt)
+        assert document.read(len(magic)) == magic
+    assert os.listdir(tmp_path) == []
+
+
+def test_generate_without_a_store_writes_uniquely_named_files(tmp_path):
+    first = resume_generator.generate_resume(SAMPLE_RESUME, "modern", str(tmp_path), lazy=True)
+    second = resume_generator.generate_resume(SAMPLE_RESUME, "modern", str(tmp_path))
+    assert set(first) == set(second) == {"pdf", "docx"}
+    assert first["pdf"] != second["pdf"]
+    assert sorted(os.listdir(tmp_path)) == sorted(list(first.values()) + list(second.values()))
+
+
+def test_render_endpoint_without_the_artifact_store(make_app, tmp_path):
+    client = make_app(ARTIFACT_CACHE_MAX_BYTES=0).test_client()
+    output = tmp_path / "generated"
+
+    with client.post("/api/render", json={"resume_data": SAMPLE_RESUME, "format": "docx"}) as response:
+        assert response.status_code == 200
+        assert response.data[:2] == b"PK"
+        assert response.headers["Content-Disposition"] == "attachment; filename=resume.docx"
+    assert os.listdir(output) == []
+
+    with client.get("/health") as response:
+        assert response.get_json()["artifacts"] == {"enabled": False}
+    with client.post("/api/generate", json={"resume_data": SAMPLE_RESUME, "lazy": True}) as response:
+        files = response.get_json()["files"]
+    with client.get(f"/api/download/{files['pdf']}") as response:
+        assert response.status_code == 200 and response.data[:4] == b"%PDF"
+    with client.get("/api/download/resume_missing.pdf") as response:
+        assert response.status_code == 404
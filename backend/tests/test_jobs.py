@@ -0,0 +1,89 @@
+# test_jobs.py
+
+import threading
+import time
+
+from jobs import FAILED, QUEUED, SUCCEEDED, JobQueue
+
+
+def wait_for(job_queue, job_id, statuses=(SUCCEEDED, FAILED), timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job and job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {job_queue.get(job_id)}")
+
+
+def test_in_memory_job_runs_and_reports_its_result():
+    job_queue = JobQueue(max_workers=1)
+    job_queue.register("echo", lambda payload: {"echo": payload["value"]})
+    job = wait_for(job_queue, job_queue.submit("echo", {"value": 3}))
+    assert job["result"] == {"echo": 3}
+    assert job_queue.shutdown(timeout=5)
+
+
+def test_failed_job_records_its_error():
+    job_queue = JobQueue(max_workers=1)
+
+    def fail(payload):
+        raise ValueError("bad input")
+
+    job_queue.register("fail", fail)
+    job = wait_for(job_queue, job_queue.submit("fail", {}))
+    assert job["status"] == FAILED and job["error"] == "bad input"
+    job_queue.shutdown(timeout=5)
+
+
+def test_queued_jobs_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    release = threading.Event()
+    first = JobQueue(max_workers=1, db_path=db_path)
+    first.register("work", lambda payload: release.wait(10) and payload["n"])
+    running = first.submit("work", {"n": 1})
+    waiting = first.submit("work", {"n": 2})
+    wait_for(first, running, statuses=("running",))
+    assert not first.shutdown(timeout=0.1)  # the running job is still going
+    release.set()
+    wait_for(first, running)
+
+    # The job that never started is picked up by the next process
+    second = JobQueue(max_workers=1, db_path=db_path)
+    second.register("work", lambda payload: payload["n"])
+    assert second.get(waiting)["status"] == QUEUED
+    assert second.resume_pending() == 1
+    assert wait_for(second, waiting)["result"] == 2
+    assert second.get(running)["result"] == 1
+    second.shutdown(timeout=5)
+
+
+def test_live_lease_is_not_taken_over_until_it_expires(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    release = threading.Event()
+    calls = []
+
+    def work(payload):
+        calls.append(payload["n"])
+        release.wait(10)
+        return "first"
+
+    first = JobQueue(max_workers=1, db_path=db_path, lease_seconds=0.3)
+    first.register("work", work)
+    job_id = first.submit("work", {"n": 1})
+    wait_for(first, job_id, statuses=("running",))
+
+    sibling = JobQueue(max_workers=1, db_path=db_path, lease_seconds=0.3)
+    sibling.register("work", lambda payload: calls.append(payload["n"]) or "sibling")
+    assert sibling.resume_pending() == 0
+    time.sleep(0.5)  # the first process keeps renewing
+    assert calls == [1]
+
+    # The first process dies: its lease lapses and the sibling takes the job over
+    first._stop_leases.set()
+    assert wait_for(sibling, job_id)["result"] == "sibling"
+    release.set()
+    assert first.shutdown(timeout=5)
+    # The old process finishing late doesn't overwrite the sibling's row
+    assert sibling._load(job_id)["result"] == "sibling"
+    sibling.shutdown(timeout=5)
@@ -0,0 +1,89 @@
+# test_keyword_matcher.py
+
+import pytest
+
+import keyword_matcher
+from conftest import SAMPLE_RESUME
+from keyword_matcher import JobIndex, get_job_index, match_resume, ngrams, stem, tokenize
+from resume_model import Resume
+
+JOB = """
+Senior Data Engineer
+We are looking for an engineer with Python, SQL and k8s experience.
+You will build distributed systems and own distributed systems reliability.
+Experience with CI/CD and Postgres is a plus. Python is used daily.
+"""
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("K8s and CI/CD", ["kubernetes", "and", "cicd"]),
+    ("Amazon Web Services, Node", ["aws", "node.js"]),
+    ("sklearn in py", ["scikit", "learn", "in", "python"]),
+    ("C++ and C# and .NET", ["c++", "and", "c#", "and", "net"]),
+    ("no aliases here", ["no", "aliases", "here"]),
+])
+def test_tokenize_resolves_aliases(text, tokens):
+    assert tokenize(text) == tokens
+
+
+@pytest.mark.parametrize("token, stemmed", [
+    ("developing", "develop"), ("developed", "develop"), ("develops", "develop"),
+    ("libraries", "library"), ("class", "class"), ("apis", "apis"), ("s3", "s3"),
+])
+def test_stem(token, stemmed):
+    assert stem(token) == stemmed
+
+
+def test_ngrams_never_start_or_end_on_a_stopword():
+    keys = [key for key, _ in ngrams(["design", "of", "data", "systems"])]
+    assert keys == ["design", "data", "system", "data system", "design of data"]
+
+
+def test_index_keeps_skills_and_repeated_phrases():
+    index = JobIndex(JOB)
+    texts = {text: category for text, category, _ in index.keywords.values()}
+    assert {"python", "sql", "kubernetes", "cicd", "postgresql"} <= texts.keys()
+    assert texts["python"] == "skills" and texts["distributed systems"] == "keywords"
+    # Generic words never count, and neither do the words of a repeated phrase
+    assert not {"experience", "looking", "distributed", "systems"} & texts.keys()
+    # Skills weigh double, and repeating one adds 1 + log(tf)
+    weights = {text: weight for text, _, weight in index.keywords.values()}
+    assert weights["sql"] == 2.0 and weights["python"] > weights["sql"]
+
+
+def test_hyphenated_skills_are_matched():
+    index = JobIndex("Pandas and scikit-learn")
+    assert index.keywords["scikit learn"] == ("scikit learn", "skills", 3.0)
+    assert index.score("Models in sklearn")["matched"]["skills"] == ["scikit learn"]
+
+
+def test_bm25_saturates_and_normalises_length():
+    index = JobIndex("Python and Kafka")
+    assert index.score("")["score"] == 0
+    assert index.score("python kafka")["score"] == 100
+    assert index.score("python")["score"] == 50
+
+    padding = " filler" * 2000
+    long_once = index.score("python" + padding)["score"]
+    long_often = index.score("python " * 20 + padding)["score"]
+    assert 0 < long_once < long_often <= 50  # repetition makes up for length, up to the keyword's weight
+
+
+def test_score_reports_matched_and_missing_by_category():
+    result = JobIndex(JOB).score("Python and Kubernetes on distributed systems")
+    assert set(result["matched"]["skills"]) == {"python", "kubernetes"}
+    assert result["matched"]["keywords"] == ["distributed systems"]
+    assert {"sql", "cicd", "postgresql"} <= set(result["missing"]["skills"])
+    assert 0 < result["score"] < 100
+
+
+def test_match_resume(monkeypatch):
+    get_job_index.cache_clear()
+    resume = Resume.from_dict(SAMPLE_RESUME)
+    assert match_resume(resume, None) is None and match_resume(resume, "  \n") is None
+
+    result = match_resume(resume, JOB)
+    assert {"python", "sql", "postgresql"} <= set(result["matched"]["skills"])
+    # The index for a posting is built once, however many resumes are scored against it
+    monkeypatch.setattr(keyword_matcher, "JobIndex", None)
+    assert match_resume(resume, JOB + "\n") == result
@@ -0,0 +1,142 @@
+# test_llm_client.py
+
+import threading
+import time
+
+import pytest
+
+import llm_client
+from llm_client import LLMClient, LLMError, StubBackend, TokenBucket
+
+
+class FlakyBackend:
+    """Fails with ConnectionError `failures` times, then answers; records peak concurrency"""
+
+    name = "flaky"
+    retryable = (ConnectionError,)
+
+    def __init__(self, failures=0, delay=0.0, error=ConnectionError):
+        self.failures = failures
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            fail = self.calls <= self.failures
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise self.error("model unavailable")
+            return f"answer to {prompt}", 10, 3
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def stream(self, prompt, timeout):
+        text, prompt_tokens, output_tokens = self.generate(prompt, timeout)
+        yield from text.split(" ")
+        yield (prompt_tokens, output_tokens)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF_BASE", 0.0)
+
+
+def test_stub_echoes_the_first_json_value():
+    client = LLMClient(StubBackend())
+    assert client.generate('Rewrite these:\n["a", "b"]\nJob: {"x": 1}') == '["a", "b"]'
+    assert client.generate("no json here") == "{}"
+    long_value = '{"summary": "' + "word " * 200 + '"}'
+    assert "".join(client.generate_stream(f"Resume: {long_value}")) == long_value
+
+
+def test_transient_errors_are_retried():
+    backend = FlakyBackend(failures=2)
+    client = LLMClient(backend, max_retries=3)
+    assert client.generate("q") == "answer to q"
+    metrics = client.metrics()
+    assert (backend.calls, metrics["retries"], metrics["errors"], metrics["calls"]) == (3, 2, 0, 1)
+    assert (metrics["prompt_tokens"], metrics["output_tokens"]) == (10, 3)
+
+
+def test_gives_up_after_max_retries():
+    backend = FlakyBackend(failures=10)
+    client = LLMClient(backend, max_retries=2)
+    with pytest.raises(LLMError, match="after 3 attempts"):
+        client.generate("q")
+    assert backend.calls == 3 and client.metrics()["errors"] == 1
+
+
+def test_other_errors_are_not_retried():
+    backend = FlakyBackend(failures=1, error=ValueError)
+    client = LLMClient(backend, max_retries=3)
+    with pytest.raises(ValueError):
+        client.generate("q")
+    assert backend.calls == 1 and client.metrics()["errors"] == 1
+
+
+def test_stream_is_retried_only_before_the_first_chunk():
+    client = LLMClient(FlakyBackend(failures=1), max_retries=1)
+    assert list(client.generate_stream("q")) == ["answer", "to", "q"]
+
+    class BreaksMidway(FlakyBackend):
+        def stream(self, prompt, timeout):
+            yield "partial"
+            raise ConnectionError("reset")
+
+    with pytest.raises(LLMError):
+        list(LLMClient(BreaksMidway(), max_retries=3).generate_stream("q"))
+
+
+def test_concurrency_is_bounded():
+    backend = FlakyBackend(delay=0.05)
+    client = LLMClient(backend, max_concurrency=2)
+    threads = [threading.Thread(target=client.generate, args=(str(i),)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.calls == 6 and backend.peak == 2
+    assert client.metrics()["in_flight"] == 0
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_a_burst_then_paces(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_client, "time", clock)
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.sleeps == [1.0, 1.0]  # one call per second after the burst
+
+
+def test_set_client_swaps_the_shared_client():
+    previous = llm_client.get_client()
+    try:
+        llm_client.set_client(LLMClient(FlakyBackend()))
+        assert llm_client.generate("q") == "answer to q"
+        assert llm_client.metrics()["backend"] == "flaky"
+    finally:
+        llm_client.set_client(previous)
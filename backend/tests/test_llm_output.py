@@ -0,0 +1,80 @@
+# test_llm_output.py
+
+import json
+
+import pytest
+
+from llm_output import LLMOutputError, iter_json_array, loads, repair_json, validate_resume
+
+
+@pytest.mark.parametrize("fragment, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),  # trailing commas
+    ('{"a": [1, 2]]}', {"a": [1, 2]}),  # stray closing bracket
+    ('{"skills": ["Python", "SQL"', {"skills": ["Python", "SQL"]}),  # cut after a value
+    ('{"summary": "Builds data pipel', {"summary": "Builds data pipel"}),  # cut inside a string
+    ('{"a": "x", "b": tr', {"a": "x"}),  # cut inside a literal: dropped back to the last element
+    ('[{"t": "a"}, {"t": "b", "d": [', [{"t": "a"}, {"t": "b", "d": []}]),
+    ('{"quote": "say \\"hi\\", ok", "n": [1,', {"quote": 'say "hi", ok', "n": [1]}),  # escapes, commas in strings
+])
+def test_repair_json(fragment, expected):
+    assert repair_json(fragment) == expected
+
+
+def test_repair_json_falls_back_to_the_empty_container_then_gives_up():
+    assert repair_json('{"a": }') == {}
+    with pytest.raises(LLMOutputError):
+        repair_json('"a": 1')
+
+
+@pytest.mark.parametrize("text, expected, fault", [
+    ('```json\n{"a": 1}\n```', {"a": 1}, None),
+    ('Here you go: {"a": [1, 2,]} Hope it helps!', {"a": [1, 2]}, "repaired"),
+    ('{"a": {"b": "c"', {"a": {"b": "c"}}, "truncated"),
+])
+def test_loads_reports_how_the_json_was_recovered(text, expected, fault):
+    assert loads(text) == (expected, fault)
+
+
+def test_loads_without_json():
+    with pytest.raises(LLMOutputError):
+        loads("Sorry, I can't help with that.")
+
+
+def test_iter_json_array_yields_each_element_once_complete():
+    chunks = ['```json\n["Led a te', 'am of 5", "Cut costs ', 'by 20%", 4', '2, {"a": [1]}', "]\n```"]
+    seen = []
+    for value in iter_json_array(iter(chunks)):
+        seen.append(value)
+    assert seen == ["Led a team of 5", "Cut costs by 20%", 42, {"a": [1]}]
+
+
+def test_iter_json_array_raises_once_the_stream_ends_unterminated():
+    values = iter_json_array(['["one", "tw'])
+    with pytest.raises(json.JSONDecodeError):
+        list(values)
+
+
+def test_validate_resume_coerces_and_lists_failed_sections():
+    data = {
+        "personal_info": {"name": "Ada", "email": None, "phone": 5551234},
+        "summary": ["Builds", "pipelines"],
+        "skills": "Python, SQL",
+        "experience": {"title": "Engineer", "company": "X", "duration": "2020", "description": "Built ETL"},
+        "education": "BSc",
+        "projects": [{"title": "P", "description": ["a"]}, 7],
+    }
+    resume, failed = validate_resume(data)
+    assert resume["personal_info"]["email"] == "" and resume["personal_info"]["phone"] == "5551234"
+    assert resume["summary"] == "Builds pipelines"
+    assert resume["skills"] == ["Python", "SQL"]
+    assert resume["experience"] == [{"title": "Engineer", "company": "X", "duration": "2020",
+                                     "description": ["Built ETL"]}]
+    assert resume["projects"] == [{"title": "P", "description": ["a"]}]
+    assert failed == ["education", "certifications"]
+    assert resume["education"] == [] and resume["certifications"] == []
+
+
+def test_validate_resume_distrusts_the_section_a_truncated_answer_ended_in():
+    resume, failed = validate_resume({"summary": "s", "skills": ["Py"]}, truncated=True)
+    assert resume["summary"] == "s"
+    assert "skills" in failed and resume["skills"] == []
@@ -0,0 +1,93 @@
+# test_local_parser.py
+
+import pytest
+
+import resume_parser
+from local_parser import parse_resume_locally, section_for
+
+RESUME_TEXT = """Ada Lovelace
+London, UK | ada@example.com | +44 20 7946 0958
+linkedin.com/in/ada-lovelace | github.com/ada
+
+Professional Summary
+Engineer who builds data pipelines in Python.
+
+Technical Skills
+Python, SQL, Docker; Kubernetes | Airflow
+
+Work Experience
+Senior Engineer | Analytical Engines | Jan 2020 - Present
+• Built ETL jobs in Python serving 40 teams
+• Ran Postgres on Docker and cut costs
+  by a third
+Engineer, Difference Works, 2017 - 2019
+- Wrote the scheduler
+
+Education
+BSc Mathematics, University of London, 2016, GPA: 3.9/4.0
+
+Projects
+Note Engine
+• A compiler for punched cards
+
+Certifications
+AWS Certified Developer, Amazon, 2021
+"""
+
+
+def test_sectioned_resume_is_parsed_completely():
+    data, confidence = parse_resume_locally(RESUME_TEXT)
+    assert confidence == 1.0
+    assert data["personal_info"] == {
+        "name": "Ada Lovelace", "email": "ada@example.com", "phone": "+44 20 7946 0958", "location": "London, UK",
+        "linkedin": "linkedin.com/in/ada-lovelace", "github": "github.com/ada"}
+    assert data["summary"] == "Engineer who builds data pipelines in Python."
+    assert data["skills"] == ["Python", "SQL", "Docker", "Kubernetes", "Airflow"]
+    assert data["experience"] == [
+        {"title": "Senior Engineer", "company": "Analytical Engines", "duration": "Jan 2020 - Present",
+         "description": ["Built ETL jobs in Python serving 40 teams",
+                         "Ran Postgres on Docker and cut costs by a third"]},
+        {"title": "Engineer", "company": "Difference Works", "duration": "2017 - 2019",
+         "description": ["Wrote the scheduler"]},
+    ]
+    assert data["education"] == [{"degree": "BSc Mathematics", "institution": "University of London",
+                                  "year": "2016", "gpa": "3.9/4.0"}]
+    assert data["projects"] == [{"title": "Note Engine", "description": ["A compiler for punched cards"]}]
+    assert data["certifications"] == [{"name": "AWS Certified Developer", "issuer": "Amazon", "date": "2021"}]
+
+
+@pytest.mark.parametrize("line, section", [
+    ("WORK EXPERIENCE", "experience"),
+    ("Skills & Tools:", "skills"),
+    ("Licenses & Certifications", "certifications"),
+    ("Experience with distributed systems at scale across many teams", None),
+    ("Python", None),
+])
+def test_section_headings(line, section):
+    assert section_for(line) == section
+
+
+def without(text, *fragments):
+    for fragment in fragments:
+        text = text.replace(fragment, "")
+    return text
+
+
+@pytest.mark.parametrize("text, expected, local", [
+    (RESUME_TEXT, 1.0, True),
+    # No way to contact the candidate: exactly at the cutoff, still trusted
+    (without(RESUME_TEXT, "ada@example.com", "+44 20 7946 0958"), 0.85, True),
+    (without(RESUME_TEXT, "Ada Lovelace\n", "London, UK | ada@example.com | +44 20 7946 0958\n"), 0.7, False),
+    # Jobs without a company aren't complete entries
+    (without(RESUME_TEXT, " | Analytical Engines", ", Difference Works"), 0.7, False),
+    ("I have worked with Python and SQL for many years at several companies.\nI like data.\n", 0.15, False),
+], ids=["complete", "no contact", "no name or contact", "no companies", "prose"])
+def test_confidence_cutoff_decides_whether_the_llm_parses(monkeypatch, text, expected, local):
+    assert resume_parser.LOCAL_PARSE_MIN_CONFIDENCE == 0.85
+    assert parse_resume_locally(text)[1] == expected
+
+    sent = []
+    monkeypatch.setattr(resume_parser, "parse_resume_with_ai", lambda text: sent.append(text) or {"from": "llm"})
+    data = resume_parser.parse_resume_text(text)
+    assert (sent == []) == local
+    assert (data == {"from": "llm"}) == (not local)
@@ -0,0 +1,63 @@
+# test_parse_cache.py
+
+import sqlite3
+
+from parse_cache import ParseCache, hash_text
+
+PARSED = {"summary": "Engineer", "skills": ["Python"]}
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ParseCache(path).put("file-1", hash_text("some resume text"), PARSED)
+
+    reopened = ParseCache(path)
+    assert reopened.get_by_file("file-1") == PARSED
+    # The same text in another file still skips the model, and links that file
+    assert reopened.get_by_text(hash_text("some  resume\ntext"), "file-2") == PARSED
+    assert reopened.get_by_file("file-2") == PARSED
+    assert reopened.stats()["hit_rate"] == 1.0
+
+
+def test_other_parser_versions_are_not_served(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    text_hash = hash_text("some resume text")
+    ParseCache(path, version="1").put("file-1", text_hash, PARSED)
+
+    upgraded = ParseCache(path, version="2")
+    assert upgraded.get_by_file("file-1") is None
+    assert upgraded.get_by_text(text_hash) is None
+    upgraded.put("file-1", text_hash, {"summary": "Re-parsed"})
+    assert upgraded.get_by_file("file-1") == {"summary": "Re-parsed"}
+
+
+def test_older_versions_are_evicted_first(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ParseCache(path, version="1").put(None, "old", PARSED)
+    cache = ParseCache(path, version="2", max_entries=2)
+    cache.put(None, "a", PARSED)
+    cache.put(None, "b", PARSED)
+    assert cache.get_by_text("a") == PARSED and cache.get_by_text("b") == PARSED
+    assert ParseCache(path, version="1").get_by_text("old") is None
+
+
+def test_unversioned_cache_is_dropped_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE parses (text_hash TEXT PRIMARY KEY, data TEXT NOT NULL, created REAL NOT NULL, "
+                 "accessed REAL NOT NULL)")
+    conn.execute("INSERT INTO parses VALUES ('old', '{}', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = ParseCache(path)
+    assert cache.get_by_text("old") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=1)
+    cache.put("file-1", "text-1", PARSED)
+    cache._conn.execute("UPDATE parses SET created = created - 10")
+    assert cache.get_by_file("file-1") is None
+    assert cache.get_by_text("text-1") is None
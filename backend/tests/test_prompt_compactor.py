@@ -0,0 +1,74 @@
+# test_prompt_compactor.py
+
+from prompt_compactor import compact_job_description, compact_json, compact_text, fit_budget, squeeze
+
+
+def test_compact_text_drops_page_furniture_and_noise():
+    pages = []
+    for n, company in enumerate(("Initech", "Hooli", "Globex"), start=1):
+        pages.append(f"Ada Lovelace - Resume - Page {n} of 3\n"
+                     f"Worked   at\t{company}\n"
+                     "•\n"
+                     "----------------\n"
+                     f"Shipped things for {company}\n"
+                     f"{n}\n"
+                     "confidential footer")
+    text = compact_text("\f".join(pages))
+    assert text.split("\n") == [
+        "Ada Lovelace - Resume - Page 1 of 3", "Worked at Initech", "Shipped things for Initech",
+        "confidential footer",
+        "Worked at Hooli", "Shipped things for Hooli",
+        "Worked at Globex", "Shipped things for Globex",
+    ]
+
+
+def test_single_page_keeps_repeated_lines():
+    assert compact_text("Python\n\n\nPython\n  - 2 -  \n") == "Python\nPython"
+
+
+def sectioned(projects=40):
+    return "\n".join(
+        ["Ada Lovelace", "ada@example.com", "Experience"]
+        + [f"Built pipeline number {i} for the analytics team" for i in range(20)]
+        + ["Skills", "Python, SQL", "Projects"]
+        + [f"Side project {i} with a long description of what it did" for i in range(projects)]
+    )
+
+
+def test_fit_budget_cuts_low_priority_sections_first():
+    text = sectioned()
+    assert fit_budget(text, 0) == text
+    assert fit_budget(text, 10000) == text
+
+    kept = fit_budget(text, 400).split("\n")
+    # Header, experience and skills fit whole, in document order; projects get what is left
+    assert kept[:3] == ["Ada Lovelace", "ada@example.com", "Experience"]
+    assert kept[kept.index("Skills"):kept.index("Projects") + 1] == ["Skills", "Python, SQL", "Projects"]
+    assert sum(line.startswith("Built pipeline") for line in kept) == 20
+    assert 0 < sum(line.startswith("Side project") for line in kept) < 40
+    assert len("\n".join(kept)) <= 400 * 4
+
+
+def test_fit_budget_cuts_a_long_paragraph_at_a_word():
+    paragraph = " ".join(f"word{i}" for i in range(200))
+    [cut] = fit_budget(paragraph, 50).split("\n")
+    assert paragraph.startswith(cut) and paragraph[len(cut)] == " "
+    assert len(cut) <= 200
+
+
+def test_job_description_keeps_its_start():
+    job = "\n".join(f"Requirement {i}: experience with system {i}" for i in range(200))
+    compacted = compact_job_description(job, max_tokens=100)
+    assert job.startswith(compacted)
+    assert len(compacted) <= 400
+    assert compact_job_description(None) == ""
+
+
+def test_prompt_formatting_helpers():
+    assert compact_json({"a": ["é", 1]}) == '{"a":["é",1]}'
+    assert squeeze("""
+        Line one
+            indented
+
+        Line two
+    """) == "Line one\nindented\nLine two"
@@ -0,0 +1,76 @@
+# test_resume_model.py
+
+import pytest
+
+from conftest import SAMPLE_RESUME
+from resume_model import Experience, PersonalInfo, Resume, ResumeValidationError, as_resume
+
+
+def test_from_dict_normalizes_loose_input():
+    resume = Resume.from_dict({
+        "personal_info": {"name": "Ada", "email": None, "twitter": "@ada"},
+        "skills": ["Python", {"name": "SQL", "level": "expert"}, "", {"name": None}],
+        "experience": [{"title": "Engineer", "description": "Built ETL jobs"},
+                       {"title": "Intern", "description": ["Wrote docs", 2019]}],
+        "education": [{"degree": "BSc", "year": 2016, "gpa": 3.9}],
+        "projects": None,
+    })
+    assert resume.personal_info == PersonalInfo(name="Ada")
+    assert resume.summary == "" and resume.projects == [] and resume.certifications == []
+    assert resume.skills == ["Python", "SQL"]
+    assert [e.description for e in resume.experience] == [["Built ETL jobs"], ["Wrote docs", "2019"]]
+    assert (resume.education[0].year, resume.education[0].gpa, resume.education[0].institution) == ("2016", "3.9", "")
+    assert Resume.from_dict({"skills": "Python, SQL , ,Docker"}).skills == ["Python", "SQL", "Docker"]
+
+
+@pytest.mark.parametrize("data, field", [
+    ([], "resume"),
+    ({"summary": ["not", "a", "string"]}, "resume.summary"),
+    ({"skills": 5}, "resume.skills"),
+    ({"skills": ["Python", {"name": ["SQL"]}]}, r"resume.skills\[1\].name"),
+    ({"experience": {"title": "Engineer"}}, "resume.experience"),
+    ({"experience": [{}, "Engineer"]}, r"resume.experience\[1\]"),
+    ({"experience": [{"description": ["ok", {"x": 1}]}]}, r"resume.experience\[0\].description\[1\]"),
+    ({"education": [{"year": True}]}, r"resume.education\[0\].year"),
+    ({"personal_info": "Ada"}, "resume.personal_info"),
+])
+def test_validation_errors_name_the_field(data, field):
+    with pytest.raises(ResumeValidationError, match=rf"^{field}: expected"):
+        Resume.from_dict(data)
+
+
+def test_round_trip_and_copy():
+    resume = Resume.from_dict(SAMPLE_RESUME)
+    assert resume.to_dict() == SAMPLE_RESUME
+    assert Resume.from_dict(resume.to_dict()) == resume
+
+    copy = resume.copy()
+    assert copy == resume and copy is not resume
+    copy.skills.append("Rust")
+    copy.experience[0].description.append("Wrote the docs")
+    copy.personal_info.name = "Someone Else"
+    assert resume.to_dict() == SAMPLE_RESUME
+    assert copy != resume
+
+
+def test_personal_info_given_counts_an_object_with_blank_fields():
+    assert Resume.from_dict({"personal_info": {"name": ""}}).personal_info_given
+    assert not Resume.from_dict({"personal_info": {}}).personal_info_given
+    assert not Resume.from_dict({}).personal_info_given
+    assert not Resume().personal_info_given
+    assert Resume(personal_info=PersonalInfo()).personal_info_given
+
+
+def test_records():
+    assert Experience(title="Engineer").to_dict() == {"title": "Engineer", "company": "", "duration": "",
+                                                      "description": []}
+    with pytest.raises(TypeError, match="Experience has no field"):
+        Experience(role="Engineer")
+    assert not PersonalInfo() and PersonalInfo(github="ada")
+    assert Experience(title="Engineer") != PersonalInfo()
+
+
+def test_as_resume_only_normalizes_dicts():
+    resume = Resume.from_dict(SAMPLE_RESUME)
+    assert as_resume(resume) is resume
+    assert as_resume(SAMPLE_RESUME) == resume
@@ -0,0 +1,61 @@
+# test_resume_parser.py
+
+import io
+
+import pytest
+from reportlab.pdfgen import canvas
+
+import resume_parser
+
+
+def make_pdf(pages):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for i in range(pages):
+        pdf.drawString(72, 720, f"Page {i} of the resume")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    monkeypatch.setattr(resume_parser, "PDF_PARALLEL_MIN_PAGES", 8)
+    monkeypatch.setattr(resume_parser, "PDF_PARALLEL_WORKERS", 2)
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_parallel_extraction_matches_sequential(tmp_path, parallel, in_memory):
+    data = make_pdf(20)
+    path = tmp_path / "long.pdf"
+    path.write_bytes(data)
+    source = data if in_memory else str(path)
+
+    sequential = list(resume_parser.iter_pdf_pages(source, parallel=False))
+    assert list(resume_parser.iter_pdf_pages(source)) == sequential
+    assert [text.strip() for text in sequential] == [f"Page {i} of the resume" for i in range(20)]
+
+
+def test_a_worker_parses_each_document_once(tmp_path):
+    path = tmp_path / "long.pdf"
+    path.write_bytes(make_pdf(8))
+    document = ("path", str(path), path.stat().st_mtime_ns)
+
+    first = resume_parser._extract_pdf_pages(document, 0, 4)
+    reader = resume_parser._worker_pdf[1]
+    second = resume_parser._extract_pdf_pages(document, 4, 8)
+    assert resume_parser._worker_pdf[1] is reader
+    assert [text.strip() for text, _ in first + second] == [f"Page {i} of the resume" for i in range(8)]
+
+
+def test_stopping_early_leaves_later_chunks_unread(parallel):
+    stats = {}
+    text = resume_parser.extract_text_from_pdf(make_pdf(40), max_chars=100, stats=stats)
+    assert stats["truncated"] and stats["pages_extracted"] < 40
+    assert len(text) == 100
+
+
+def test_bytes_need_a_filename():
+    with pytest.raises(ValueError, match="filename"):
+        resume_parser.extract_text(make_pdf(1))
+    assert "Page 0" in resume_parser.extract_text(make_pdf(1), filename="cv.PDF")
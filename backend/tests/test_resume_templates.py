@@ -0,0 +1,59 @@
+# test_resume_templates.py
+
+import pytest
+import PyPDF2
+from docx import Document
+
+import resume_generator
+from conftest import SAMPLE_RESUME
+from resume_templates import DEFAULT_TEMPLATE, TEMPLATE_SPECS, TEMPLATES, get_template, list_templates
+
+RESUME = dict(SAMPLE_RESUME, education=[{"degree": "BSc Mathematics", "institution": "University of London",
+                                         "year": "2016"}])
+
+
+def test_registry():
+    assert [t["id"] for t in list_templates()] == ["modern", "classic", "creative"]
+    assert list_templates()[1] == {"id": "classic", "name": "Classic ATS",
+                                   "description": "Traditional format optimized for ATS"}
+    assert get_template("classic") is TEMPLATES["classic"]
+    assert get_template("no-such-template") is TEMPLATES[DEFAULT_TEMPLATE]
+
+
+def test_new_docx_gives_independent_documents():
+    template = get_template("modern")
+    first = template.new_docx()
+    first.add_paragraph("only in the first")
+    assert all(p.text != "only in the first" for p in template.new_docx().paragraphs)
+
+
+@pytest.mark.parametrize("template_id", list(TEMPLATE_SPECS))
+def test_docx_follows_the_template(template_id):
+    spec, template = TEMPLATE_SPECS[template_id], get_template(template_id)
+    doc = Document(resume_generator.render_document(RESUME, template_id, "docx"))
+
+    assert doc.styles["Normal"].font.name == spec["docx_font"]
+    headings = [p.text for p in doc.paragraphs if p.style.style_id == template.docx_heading_style_id]
+    assert headings == [template.section_titles[s] for s in spec["sections"]]
+    assert headings[0] == ("PROFESSIONAL SUMMARY" if spec["heading_case"] == "upper" else "Professional Summary")
+    bullets = [p.text for p in doc.paragraphs if p.style.style_id == template.docx_bullet_style_id]
+    assert bullets == SAMPLE_RESUME["experience"][0]["description"]
+    name = doc.paragraphs[0]
+    assert name.text == "Ada Lovelace" and name.runs[0].font.size == template.docx_name_size
+
+
+@pytest.mark.parametrize("template_id", list(TEMPLATE_SPECS))
+def test_pdf_follows_the_template(template_id):
+    spec, template = TEMPLATE_SPECS[template_id], get_template(template_id)
+    pdf = PyPDF2.PdfReader(resume_generator.render_document(RESUME, template_id, "pdf"))
+    text = "".join(page.extract_text() for page in pdf.pages)
+    positions = [text.index(template.section_titles[s]) for s in spec["sections"]]
+    assert positions == sorted(positions)
+    assert "Ada Lovelace" in text and "Built ETL jobs in Python" in text
+
+
+def test_empty_sections_are_left_out():
+    doc = Document(resume_generator.render_document(dict(RESUME, skills=[], summary=""), "classic", "docx"))
+    template = get_template("classic")
+    headings = [p.text for p in doc.paragraphs if p.style.style_id == template.docx_heading_style_id]
+    assert headings == ["EXPERIENCE", "EDUCATION"]
@@ -0,0 +1,75 @@
+# test_scoring.py
+
+import random
+import time
+
+import pytest
+
+import benchmark
+from ats_score import calculate_ats_score
+import bulk_score
+from bulk_score import rank_resumes, score_resumes
+from conftest import SAMPLE_RESUME
+from resume_model import as_resume
+
+JOB_DESCRIPTIONS = [
+    "",
+    benchmark.JOB_DESCRIPTION,
+    "Senior engineer: k8s, ML, postgres, node.js, C++, CI/CD and REST APIs. Python, Python, Docker.",
+]
+
+
+@pytest.mark.parametrize("job_description", JOB_DESCRIPTIONS)
+def test_bulk_scores_match_single_resume_scores(job_description):
+    rng = random.Random(7)
+    resumes = [as_resume(benchmark.make_resume(rng, size)) for size in ("small", "medium", "large") * 40]
+    resumes.append(as_resume(SAMPLE_RESUME))
+    _, totals, _, _ = score_resumes(resumes, job_description)
+    for resume, total in zip(resumes, totals.tolist()):
+        assert total == calculate_ats_score(resume, job_description)["total_score"]
+
+
+def test_ranking_again_skips_tokenizing(monkeypatch):
+    cache = bulk_score.TokenCache(100000)
+    monkeypatch.setattr(bulk_score, "token_cache", cache)
+    rng = random.Random(11)
+    resumes = [as_resume(benchmark.make_resume(rng, size)) for size in ("small", "medium", "large") * 1000]
+
+    started = time.perf_counter()
+    first = rank_resumes(resumes, benchmark.JOB_DESCRIPTION)
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    again = rank_resumes(resumes, benchmark.JOB_DESCRIPTION)
+    warm = time.perf_counter() - started
+
+    assert again == first
+    assert cache.stats()["hits"] == len(resumes)
+    # Tokenizing is most of a first ranking; measured about 5x faster warm
+    assert warm < cold / 2
+
+    other = JOB_DESCRIPTIONS[2]
+    _, totals, _, _ = score_resumes(resumes[:50], other)  # another posting reuses the same token ids
+    assert cache.stats()["misses"] == len(set(map(bulk_score.resume_text, resumes)))
+    assert totals.tolist() == [calculate_ats_score(r, other)["total_score"] for r in resumes[:50]]
+
+
+def test_ranking_is_by_score_and_keeps_input_positions():
+    weak = dict(SAMPLE_RESUME, skills=[], experience=[])
+    results = rank_resumes([weak, SAMPLE_RESUME], "Python SQL Docker")
+    assert [r["index"] for r in results] == [1, 0]
+    assert results[0]["total_score"] > results[1]["total_score"]
+    assert "python" in results[0]["matched_keywords"]
+
+
+@pytest.mark.parametrize("personal_info, expected", [
+    ({"name": "", "email": "", "phone": ""}, 100),  # the parser's fallback: keys, no values
+    ({"email": "ada@example.com"}, 100),
+    ({}, 40),
+    (None, 40),
+])
+def test_contact_score_counts_a_personal_info_object(personal_info, expected):
+    resume = dict(SAMPLE_RESUME, personal_info=personal_info)
+    assert calculate_ats_score(resume)["category_scores"]["contact_info"] == expected
+    scores, _, _, _ = score_resumes([resume])
+    assert scores[0, 0] == expected
+    assert as_resume(resume).copy().personal_info_given == (expected == 100)
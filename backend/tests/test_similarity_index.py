@@ -0,0 +1,84 @@
+# test_similarity_index.py
+
+import json
+import os
+
+from conftest import SAMPLE_RESUME
+from similarity_index import SimilarityIndex
+
+
+def candidate(n, email=""):
+    """A resume of its own text; n picks the candidate"""
+    words = " ".join(f"word{n}x{i}" for i in range(40))
+    return dict(SAMPLE_RESUME, summary=f"Candidate {n}: {words}",
+                personal_info=dict(SAMPLE_RESUME["personal_info"], email=email))
+
+
+def labels(matches):
+    return [m["label"] for m in matches]
+
+
+def test_add_finds_text_and_contact_duplicates():
+    index = SimilarityIndex()
+    assert index.add(candidate(1), "one.pdf") == []
+    assert index.add(candidate(2), "two.pdf") == []
+
+    reworded = candidate(1)
+    reworded["skills"] = reworded["skills"] + ["Kafka"]
+    [match] = index.add(reworded, "one-again.pdf")
+    assert (match["label"], match["match"]) == ("one.pdf", "text")
+    assert match["similarity"] >= 0.8
+
+    assert index.add(candidate(3, email="Ada@Example.com "), "three.pdf") == []
+    [match] = index.add(candidate(4, email="ada@example.com"), "four.pdf")
+    assert (match["label"], match["match"]) == ("three.pdf", "email")
+    assert labels(index.similar(candidate(2))) == ["two.pdf"]
+
+
+def test_same_resume_is_indexed_once():
+    index = SimilarityIndex()
+    index.add(candidate(1), "one.pdf")
+    assert labels(index.add(candidate(1), "one-copy.pdf")) == ["one.pdf"]
+    assert len(index) == 1
+
+
+def test_saved_index_reloads_with_labels(tmp_path):
+    index = SimilarityIndex(tmp_path, autosave_every=0)
+    for n in range(5):
+        index.add(candidate(n, email=f"c{n}@example.com"), f"résumé {n}.pdf")
+    index.save()
+    index.add(candidate(5), "five.pdf")  # saved on top of the first generation
+    index.save()
+
+    reopened = SimilarityIndex(tmp_path)
+    assert len(reopened) == 6
+    assert labels(reopened.similar(candidate(3))) == ["résumé 3.pdf"]
+    assert labels(reopened.similar(candidate(5))) == ["five.pdf"]
+    assert reopened.similar(candidate(9, email="c2@example.com"))[0]["label"] == "résumé 2.pdf"
+    assert labels(reopened.add(candidate(4, email="c4@example.com"), "again.pdf")) == ["résumé 4.pdf"]
+    assert len(reopened) == 6
+
+    with open(tmp_path / "meta.json", encoding="utf-8") as f:
+        assert "labels" not in json.load(f)
+    # Only the current generation is left on disk
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("signatures.")]) == 1
+
+
+def test_processes_sharing_a_folder_keep_each_others_additions(tmp_path):
+    first = SimilarityIndex(tmp_path, autosave_every=0)
+    second = SimilarityIndex(tmp_path, autosave_every=0)
+    first.add(candidate(1), "one.pdf")
+    first.add(candidate(3), "three.pdf")
+    second.add(candidate(2), "two.pdf")
+    second.add(candidate(3), "three-elsewhere.pdf")
+    first.save()
+
+    # second picks up the new generation on its next lookup, its own additions still count
+    assert labels(second.similar(candidate(1))) == ["one.pdf"]
+    assert labels(second.similar(candidate(2))) == ["two.pdf"]
+    second.save()
+    assert labels(first.similar(candidate(2))) == ["two.pdf"]
+
+    reopened = SimilarityIndex(tmp_path)
+    assert len(reopened) == 3
+    assert labels(reopened.similar(candidate(3))) == ["three.pdf"]
@@ -0,0 +1,95 @@
+# test_static_assets.py
+
+import gzip
+import re
+
+import pytest
+from flask import Flask, abort, request
+
+from static_assets import AssetStore
+
+CSS = "body { color: #333; }\n" + "".join(f".c{i} {{ margin: {i}px; }}\n" for i in range(100))
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_text(CSS)
+    (tmp_path / "main.js").write_text('fetch("css/style.css");\n')
+    (tmp_path / "index.html").write_text('<link href="css/style.css"><script src="main.js"></script>')
+    return tmp_path
+
+
+def client_for(store):
+    app = Flask(__name__)
+
+    @app.route("/<path:path>")
+    def serve(path):
+        return store.response(request, path) or abort(404)
+
+    return app.test_client()
+
+
+def test_assets_are_fingerprinted_and_pages_revalidated(frontend):
+    store = AssetStore(frontend)
+    client = client_for(store)
+    css_url = store.fingerprints["css/style.css"]
+    assert re.fullmatch(r"css/style\.[0-9a-f]{10}\.css", css_url)
+
+    page = client.get("/index.html")
+    js_url = store.fingerprints["main.js"]
+    assert page.get_data(as_text=True) == f'<link href="{css_url}"><script src="{js_url}"></script>'
+    assert "no-cache" in page.headers["Cache-Control"]
+    assert "index.html" not in store.fingerprints  # pages keep their URL
+
+    script = client.get("/" + js_url)
+    assert script.get_data(as_text=True) == f'fetch("{css_url}");\n'
+    assert "immutable" in script.headers["Cache-Control"]
+    assert client.get("/css/style.css").get_data(as_text=True) == CSS  # the original name still works
+    assert client.get("/missing.js").status_code == 404
+
+
+def test_etag_gives_304(frontend):
+    client = client_for(AssetStore(frontend))
+    first = client.get("/index.html")
+    etag = first.headers["ETag"]
+    again = client.get("/index.html", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert client.get("/index.html", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_compressed_variants_have_their_own_etag(frontend):
+    store = AssetStore(frontend)
+    client = client_for(store)
+    plain = client.get("/css/style.css", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/css/style.css", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in plain.headers
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    revalidated = client.get("/css/style.css",
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]})
+    assert revalidated.status_code == 304
+    # Too small to gain from compression
+    assert "Content-Encoding" not in client.get("/main.js", headers={"Accept-Encoding": "gzip"}).headers
+
+    stats = store.stats()
+    assert stats["requests"] == 4 and stats["not_modified"] == 1
+    assert stats["bytes_saved"] > 0
+
+
+def test_range_requests_address_the_uncompressed_bytes(frontend):
+    client = client_for(AssetStore(frontend))
+    part = client.get("/css/style.css", headers={"Range": "bytes=5-9", "Accept-Encoding": "gzip"})
+    assert part.status_code == 206
+    assert part.get_data(as_text=True) == CSS[5:10]
+    assert part.headers["Content-Range"] == f"bytes 5-9/{len(CSS)}"
+    assert "Content-Encoding" not in part.headers
+    assert client.get("/css/style.css", headers={"Range": f"bytes={len(CSS) + 10}-"}).status_code == 416
+
+
+def test_precompression_can_be_turned_off(frontend):
+    client = client_for(AssetStore(frontend, precompress=False))
+    assert "Content-Encoding" not in client.get("/css/style.css", headers={"Accept-Encoding": "gzip, br"}).headers
@@ -0,0 +1,112 @@
+# test_telemetry.py
+
+import json
+import logging
+
+import pytest
+from flask import Flask
+
+import telemetry
+from telemetry import Counter, Histogram, JsonFormatter, span
+
+
+@pytest.fixture(autouse=True)
+def quiet_access_log(monkeypatch):
+    monkeypatch.setattr(telemetry, "ACCESS_LOG", False)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "parse")
+    assert histogram.render() == [
+        "# HELP t_seconds test",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{stage="parse",le="0.1"} 2',
+        't_seconds_bucket{stage="parse",le="1.0"} 3',
+        't_seconds_bucket{stage="parse",le="+Inf"} 4',
+        't_seconds_count{stage="parse"} 4',
+        't_seconds_sum{stage="parse"} 3.65',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("t_total", "test", ("route",))
+    counter.inc('/a"b\\c')
+    counter.inc('/a"b\\c', amount=2)
+    assert counter.render()[-1] == 't_total{route="/a\\"b\\\\c"} 3'
+
+
+def test_collectors_add_gauges_and_a_failing_one_is_skipped(monkeypatch):
+    monkeypatch.setattr(telemetry, "_collectors", [])
+    telemetry.register_collector(lambda: [("t_cache_entries", "entries", 7), ("t_cache_entries", "entries", 8)])
+    telemetry.register_collector(lambda: 1 / 0)
+    text = telemetry.render_metrics()
+    assert text.count("# TYPE t_cache_entries gauge") == 1
+    assert "t_cache_entries 7\nt_cache_entries 8\n" in text
+
+
+def make_app():
+    app = Flask(__name__)
+    telemetry.init_app(app)
+
+    @app.route("/work")
+    def work():
+        with span("t_extract"):
+            pass
+        with span("t_render"):
+            pass
+        return "ok"
+
+    @app.route("/fail")
+    def fail():
+        with span("t_fail"):
+            raise ValueError("boom")
+
+    return app
+
+
+def test_requests_get_an_id_and_server_timing():
+    client = make_app().test_client()
+    response = client.get("/work", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123"
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["t_extract", "t_render"]
+
+    generated = client.get("/work").headers["X-Request-ID"]
+    assert len(generated) == 32 and generated != "abc-123"
+    assert len(client.get("/work", headers={"X-Request-ID": "x" * 100}).headers["X-Request-ID"]) == 64
+    assert 'resume_http_requests_total{method="GET",route="/work",status="200"}' in telemetry.render_metrics()
+
+
+def test_failed_spans_are_counted():
+    app = make_app()
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    before = telemetry.STAGE_ERRORS._values.get(("t_fail",), 0)
+    assert app.test_client().get("/fail").status_code == 500
+    assert telemetry.STAGE_ERRORS._values[("t_fail",)] == before + 1
+    assert telemetry.STAGE_SECONDS._series[("t_fail",)][-2] >= 1
+
+
+def test_log_lines_are_json_with_request_id_and_fields():
+    token = telemetry._current.set(telemetry.RequestContext("req-1"))
+    try:
+        record = logging.LogRecord("resume_builder", logging.INFO, __file__, 1, "parsed %s", ("resume",), None)
+        record.fields = {"pages": 2}
+        entry = json.loads(JsonFormatter().format(record))
+    finally:
+        telemetry._current.reset(token)
+    assert entry["msg"] == "parsed resume" and entry["level"] == "info"
+    assert entry["request_id"] == "req-1" and entry["pages"] == 2
+
+
+def test_log_exception_keeps_the_traceback(caplog):
+    with caplog.at_level(logging.ERROR, logger="resume_builder"):
+        try:
+            raise RuntimeError("disk full")
+        except RuntimeError as e:
+            telemetry.log_exception("save", e)
+    [record] = caplog.records
+    assert record.getMessage() == "Error in save: disk full"
+    assert record.fields == {"where": "save"}
+    assert "RuntimeError: disk full" in JsonFormatter().format(record)
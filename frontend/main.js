@@ -64,6 +64,54 @@ async function enhanceResumeAPI(data, jobDesc="") {
     }
 }
 
+// ---------------------------
+// Streaming Enhance API (Server-Sent Events over fetch)
+// onEvent(eventName, payload) is called for every 'item', 'section', 'done' or 'error' event
+// ---------------------------
+async function enhanceResumeStreamAPI(data, jobDesc="", onEvent=() => {}) {
+    const res = await fetch(`${API_BASE_URL}/api/enhance/stream`, {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({
+            resume_data: data,
+            job_description: jobDesc
+        })
+    });
+    if (!res.ok || !res.body) {
+        const result = await res.json().catch(() => ({}));
+        throw new Error(result.error || `Enhancement failed (${res.status})`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let final = null;
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) >= 0) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = "message";
+            let payload = "";
+            block.split("\n").forEach(line => {
+                if (line.startsWith("event: ")) eventName = line.slice(7);
+                else if (line.startsWith("data: ")) payload += line.slice(6);
+            });
+            const parsed = JSON.parse(payload);
+            if (eventName === "done" || eventName === "error") final = parsed;
+            onEvent(eventName, parsed);
+        }
+    }
+    return final || { success: false, error: "Stream ended unexpectedly" };
+}
+
 // ---------------------------
 // Generate Resume API
 // ---------------------------
@@ -84,6 +132,34 @@ async function generateResumeAPI(data, template="modern") {
     }
 }
 
+// ---------------------------
+// Render & Download Resume API (streamed, nothing stored on the server)
+// ---------------------------
+async function downloadResumeAPI(data, template="modern", format="pdf") {
+    try {
+        const res = await fetch(`${API_BASE_URL}/api/render`, {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({
+                resume_data: data,
+                template,
+                format
+            })
+        });
+        if (!res.ok) return await res.json();
+
+        const url = URL.createObjectURL(await res.blob());
+        const link = document.createElement("a");
+        link.href = url;
+        link.download = `resume.${format}`;
+        link.click();
+        URL.revokeObjectURL(url);
+        return { success: true };
+    } catch (error) {
+        return { success: false, error: error.message };
+    }
+}
+
 // ---------------------------
 // Load Templates UI
 // ---------------------------